@@ -0,0 +1,46 @@
+"""
+Cost of the adaptive sampler: one draw and one answer update (both O(log 169)
+Fenwick operations) versus rebuilding the weights on every answer, and versus
+the plain uniform BoundaryIndex draw.
+
+Run with: uv run python benchmarks/bench_adaptive.py
+"""
+import random
+import time
+from pathlib import Path
+
+from poker_range_practice.adaptive import AdaptiveSampler, pool_weights
+from poker_range_practice.range_manager import RangeManager
+
+RANGES_FILE = Path(__file__).resolve().parent.parent / "src" / "poker_range_practice" / "ranges.json"
+
+
+def _per_call_us(fn, n=50_000):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    rng = random.Random(42)
+    boundary = RangeManager(str(RANGES_FILE)).get_compiled_range("BTN", "open", "100bb").boundary
+    weights = pool_weights(boundary.hands)
+    sampler = AdaptiveSampler(weights)
+    hands = list(boundary.hands)
+
+    def answer():
+        sampler.observe(rng.choice(hands), rng.random() < 0.7)
+
+    def rebuild():
+        sampler.rebase(weights)
+
+    print(f"pool: {len(hands)} hands")
+    print(f"uniform draw        {_per_call_us(lambda: boundary.pick(rng=rng)):7.2f} us")
+    print(f"adaptive draw       {_per_call_us(lambda: sampler.pick(rng)):7.2f} us")
+    print(f"adaptive answer     {_per_call_us(answer):7.2f} us")
+    print(f"full rebuild        {_per_call_us(rebuild, n=5_000):7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
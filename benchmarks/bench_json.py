@@ -0,0 +1,67 @@
+"""
+Response encoding time per endpoint: FastAPI's default path (jsonable_encoder
+then JSONResponse's stdlib json) versus FastJSONResponse (orjson when
+installed), on representative payloads of each hot endpoint. The range matrix
+is also timed with its pre-encoded Fragment, as /api/range-matrix serves it.
+
+Run with: uv run python benchmarks/bench_json.py
+"""
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import poker_range_practice as app
+from poker_range_practice.fast_json import FastJSONResponse, orjson
+
+
+def _per_call_us(fn, n=20_000):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def _payloads():
+    app._init_state()
+    ranges = app._range_manager.snapshot
+    cards = [{"rank": r, "suit": s} for r, s in (("A", "♠"), ("K", "♠"))]
+    flop = [{"rank": r, "suit": s} for r, s in (("7", "♥"), ("2", "♦"), ("9", "♣"))]
+    matrix = app._range_matrix(ranges, "BTN", "open", "100bb", "matrix")
+    return {
+        "next-hand": {"hand": "AKs"},
+        "check-answer": {"correct": False, "actual_action": "fold", "user_action": "in_range", "closest_hand": "K9s"},
+        "eval/next-hand": {
+            "hand": "AQo", "position": "CO", "stack_depth": "100bb", "scenario_action": "vs BB",
+            "scenario_label": "Open CO, BB vous 3bet", "available_actions": ["4bet", "call", "3bet_light"],
+        },
+        "flop/check-cbet": {
+            "correct": True, "correct_action": "bet", "correct_sizing": 25, "texture": "TRES_DRY",
+            "texture_label": "Très Dry", "cbet_frequency": "range entier", "hand_strength": "sd_value",
+            "hand_label": "Showdown value (A/K-high, underpair)",
+        },
+        "flop/bb-deal": {
+            "bb_hand": "AKs", "bb_cards": cards, "flop_cards": flop, "villain_hand": "QJo",
+            "villain_cards": cards, "villain_sizing": 33, "villain_combos": 412,
+            "texture": "INTERMEDIAIRE", "texture_label": "Intermédiaire",
+        },
+        "range-matrix (dict)": dict(matrix, range=json.loads(matrix["range"].raw)),
+        "range-matrix (fragment)": matrix,
+    }
+
+
+def main():
+    print(f"orjson: {orjson.__version__ if orjson is not None else 'not installed (stdlib fallback)'}")
+    print(f"{'endpoint':<24} {'default':>10} {'fast':>10}")
+    for name, payload in _payloads().items():
+        fast = _per_call_us(lambda: FastJSONResponse(payload))
+        if "fragment" in name:  # jsonable_encoder cannot walk a Fragment
+            print(f"{name:<24} {'-':>10} {fast:8.2f}us")
+            continue
+        default = _per_call_us(lambda: JSONResponse(jsonable_encoder(payload)))
+        print(f"{name:<24} {default:8.2f}us {fast:8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
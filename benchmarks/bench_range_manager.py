@@ -0,0 +1,46 @@
+"""
+Per-request cost of range lookups: parsing notation on every call (the old
+`get_range` behaviour) versus the precompiled RangeManager cache.
+
+Run with: uv run python benchmarks/bench_range_manager.py
+"""
+import time
+from pathlib import Path
+
+from poker_range_practice.range_manager import RangeManager, compile_range
+
+RANGES_FILE = Path(__file__).resolve().parent.parent / "src" / "poker_range_practice" / "ranges.json"
+
+
+def _per_call_us(fn, keys, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for key in keys:
+            fn(*key)
+    return (time.perf_counter() - start) / (repeat * len(keys)) * 1e6
+
+
+def main():
+    start = time.perf_counter()
+    rm = RangeManager(str(RANGES_FILE))
+    load_ms = (time.perf_counter() - start) * 1e3
+
+    keys = [
+        (pos, action["value"], depth)
+        for pos in rm.get_available_positions()
+        for action in rm.get_available_actions(pos)
+        for depth in rm.get_available_stack_depths(pos, action["value"])
+    ]
+
+    def parse_per_request(pos, action, depth):
+        return compile_range(rm.ranges[pos][action][depth]).hands
+
+    before = _per_call_us(parse_per_request, keys)
+    after = _per_call_us(rm.get_range, keys, repeat=2000)
+    print(f"nodes compiled at load: {len(keys)} in {load_ms:.1f} ms")
+    print(f"get_range, parse per request: {before:10.2f} us/call")
+    print(f"get_range, precompiled:       {after:10.2f} us/call  ({before / after:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
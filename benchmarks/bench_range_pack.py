@@ -0,0 +1,66 @@
+"""
+Cold start and memory: booting the app from ranges.json versus a compiled range pack.
+
+Each mode runs in fresh interpreters that import the app (which loads the range
+library) and then serve one lookup per scenario, like the first requests would.
+
+Run with: uv run python benchmarks/bench_range_pack.py
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from poker_range_practice.range_pack import pack_ranges
+
+RANGES_FILE = Path(__file__).resolve().parent.parent / "src" / "poker_range_practice" / "ranges.json"
+RUNS = 5
+
+_CHILD = r"""
+import json, resource, time
+start = time.perf_counter()
+import poker_range_practice as app
+app._init_state()
+boot = time.perf_counter() - start
+ranges = app._range_manager.snapshot
+keys = [(p, a["value"], d) for p in ranges.get_available_positions()
+        for a in ranges.get_available_actions(p)
+        for d in ranges.get_available_stack_depths(p, a["value"])]
+start = time.perf_counter()
+for key in keys:
+    ranges.get_compiled_range(*key)
+first_lookups = time.perf_counter() - start
+print(json.dumps({"boot": boot, "first_lookups": first_lookups,
+                  "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def _run(ranges_file):
+    env = dict(os.environ, RANGES_FILE=str(ranges_file))
+    out = subprocess.run([sys.executable, "-c", _CHILD], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        pack_file = Path(tmp) / "ranges.pack"
+        with open(RANGES_FILE) as f:
+            pack_file.write_bytes(pack_ranges(json.load(f)))
+        print(f"ranges.json: {RANGES_FILE.stat().st_size:,} bytes, "
+              f"ranges.pack: {pack_file.stat().st_size:,} bytes")
+
+        for label, path in (("json", RANGES_FILE), ("pack", pack_file)):
+            runs = [_run(path) for _ in range(RUNS)]
+            boot = statistics.median(r["boot"] for r in runs) * 1e3
+            lookups = statistics.median(r["first_lookups"] for r in runs) * 1e3
+            rss = statistics.median(r["rss_kb"] for r in runs) / 1024
+            print(f"{label}: app import {boot:7.1f} ms, first lookup of every node {lookups:6.1f} ms, "
+                  f"max RSS {rss:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
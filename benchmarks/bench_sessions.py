@@ -0,0 +1,90 @@
+"""
+Session cookie size and middleware overhead for a large eval selection: the
+signed-cookie SessionMiddleware versus ServerSessionMiddleware with the memory
+and SQLite stores.
+
+Each backend wraps a bare ASGI endpoint that reads the session, so the timings
+are the middleware's own per-request cost.
+
+Run with: uv run python benchmarks/bench_sessions.py
+"""
+import asyncio
+import tempfile
+import time
+from http.cookies import SimpleCookie
+from pathlib import Path
+
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.requests import Request
+
+from poker_range_practice.range_manager import RangeManager
+from poker_range_practice.sessions import MemorySessionStore, ServerSessionMiddleware, SQLiteSessionStore
+
+RANGES_FILE = Path(__file__).resolve().parent.parent / "src" / "poker_range_practice" / "ranges.json"
+
+
+def _eval_config():
+    """eval_config as /api/eval/start stores it with every position and depth selected."""
+    catalog = RangeManager(str(RANGES_FILE)).snapshot.eval_catalog
+    return {"catalog": catalog.token, "groups": list(range(len(catalog.keys)))}
+
+
+async def _endpoint(scope, receive, send):
+    request = Request(scope, receive)
+    if scope["path"] == "/start":
+        request.session["eval_config"] = EVAL_CONFIG
+    else:
+        assert request.session["eval_config"]["groups"]
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _scope(path, cookie=None):
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return {"type": "http", "method": "GET", "path": path, "headers": headers, "query_string": b""}
+
+
+async def _call(app, scope):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return dict(sent[0]["headers"])
+
+
+async def _measure(name, app, n=5000):
+    headers = await _call(app, _scope("/start"))
+    set_cookie = headers[b"set-cookie"].decode()
+    morsel = next(iter(SimpleCookie(set_cookie).values()))
+    cookie = f"{morsel.key}={morsel.value}"
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await _call(app, _scope("/next", cookie))
+    per_request = (time.perf_counter() - start) / n * 1e6
+    print(f"{name:<16} cookie {len(cookie):6,} bytes   {per_request:8.1f} us/request")
+
+
+async def main():
+    print(f"eval selection: {len(EVAL_CONFIG['groups'])} position/depth combos")
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_store = SQLiteSessionStore(Path(tmp) / "sessions.db")
+        backends = [
+            ("signed cookie", SessionMiddleware(_endpoint, secret_key="bench")),
+            ("memory store", ServerSessionMiddleware(_endpoint, MemorySessionStore())),
+            ("sqlite store", ServerSessionMiddleware(_endpoint, sqlite_store)),
+        ]
+        for name, app in backends:
+            await _measure(name, app)
+        sqlite_store.close()
+
+
+EVAL_CONFIG = _eval_config()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,192 @@
+"""
+Microbenchmarks of the range and flop evaluators, with a baseline gate.
+
+Every case runs its function over a fixed list of seeded inputs (range
+notations and lookups from ranges.json, random hands and flops) and reports:
+
+- ops/s: calls per second, best of --repeat timed passes
+- alloc B/call: peak memory traced by tracemalloc during a call, averaged
+- held blocks: memory blocks still allocated after that pass (caches, leaks)
+
+--save writes the results to a JSON baseline; --compare reads one and exits
+with status 1 when a case is more than --fail-above times slower (ops/s).
+Baselines are only comparable on the same machine and Python version.
+
+Run with: uv run python benchmarks/bench_suite.py
+          uv run python benchmarks/bench_suite.py --save bench.json
+          uv run python benchmarks/bench_suite.py --compare bench.json --fail-above 1.2
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from poker_range_practice.combos import SUITS
+from poker_range_practice.flop.bb_defense import _has_backdoor_straight, get_bb_defense_recommendation
+from poker_range_practice.flop.cbet_bvb import classify_board_bvb
+from poker_range_practice.flop.cbet_limp_sb import classify_board_limp_sb
+from poker_range_practice.flop.cbet_vs_bb import classify_board_vs_bb
+from poker_range_practice.flop.cbet_vs_sb import classify_board_vs_sb
+from poker_range_practice.flop.hand_eval import Card, _oesd_or_gutshot, evaluate_hand
+from poker_range_practice.poker_hands import (
+    Hand,
+    find_closest_hand_in_range,
+    generate_all_hands,
+    parse_range_notation,
+    pick_boundary_hand,
+)
+from poker_range_practice.range_manager import RangeManager
+
+RANGES_FILE = Path(__file__).resolve().parent.parent / "src" / "poker_range_practice" / "ranges.json"
+N_INPUTS = 256
+
+
+def _notations(rm, keys):
+    """Every notation string of the range nodes (sub-action notations of split nodes)."""
+    for pos, action, depth in keys:
+        node = rm.ranges[pos][action][depth]
+        yield from (node.values() if isinstance(node, dict) else (node,))
+
+
+def _deals(rng, n):
+    """n (hole, board) pairs of flop Cards dealt from a shuffled deck."""
+    deck = [Card(r, s) for r in Hand.RANKS for s in SUITS]
+    deals = []
+    for _ in range(n):
+        cards = rng.sample(deck, 5)
+        deals.append((cards[:2], cards[2:]))
+    return deals
+
+
+def build_cases(seed=0) -> dict:
+    """{name: (fn, [args, ...])} with inputs drawn from random.Random(seed)."""
+    rng = random.Random(seed)
+    rm = RangeManager(str(RANGES_FILE))
+    keys = [
+        (pos, action["value"], depth)
+        for pos in rm.get_available_positions()
+        for action in rm.get_available_actions(pos)
+        for depth in rm.get_available_stack_depths(pos, action["value"])
+    ]
+    notations = sorted(set(_notations(rm, keys)))
+    all_hands = generate_all_hands()
+    ranges = [rm.get_range(*key) for key in keys]
+    deals = _deals(rng, N_INPUTS)
+    boards = [(board,) for _, board in deals]
+    all5 = [(hole + board,) for hole, board in deals]
+
+    return {
+        "parse_range_notation": (parse_range_notation, [(rng.choice(notations),) for _ in range(N_INPUTS)]),
+        "RangeManager.get_range": (rm.get_range, [rng.choice(keys) for _ in range(N_INPUTS)]),
+        "pick_boundary_hand": (pick_boundary_hand, [(rng.choice(ranges), all_hands) for _ in range(N_INPUTS // 8)]),
+        "find_closest_hand_in_range": (
+            find_closest_hand_in_range,
+            [(rng.choice(all_hands), list(rng.choice(ranges))) for _ in range(N_INPUTS)],
+        ),
+        "evaluate_hand": (evaluate_hand, deals),
+        "_oesd_or_gutshot": (_oesd_or_gutshot, all5),
+        "_has_backdoor_straight": (_has_backdoor_straight, all5),
+        "classify_board_vs_bb": (classify_board_vs_bb, boards),
+        "classify_board_vs_sb": (classify_board_vs_sb, boards),
+        "classify_board_bvb": (classify_board_bvb, boards),
+        "classify_board_limp_sb": (classify_board_limp_sb, boards),
+        "get_bb_defense_recommendation": (
+            get_bb_defense_recommendation,
+            [(hole, board, rng.choice((100, 50, 25, 20))) for hole, board in deals],
+        ),
+    }
+
+
+def _pass(fn, inputs):
+    for args in inputs:
+        fn(*args)
+
+
+def measure(fn, inputs, repeat=5, min_time=0.1) -> dict:
+    _pass(fn, inputs)  # warm lazy caches before timing
+    passes = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(passes):
+            _pass(fn, inputs)
+        if time.perf_counter() - start >= min_time / 2:
+            break
+        passes *= 2
+    best = min(_timed(fn, inputs, passes) for _ in range(repeat))
+
+    # Allocations are traced in a separate, untimed pass
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    tracemalloc.start()
+    held = tracemalloc.take_snapshot().filter_traces(ignore)
+    peaks = 0
+    for args in inputs:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(*args)
+        peaks += tracemalloc.get_traced_memory()[1] - current
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    tracemalloc.stop()
+
+    return {
+        "ops_per_s": round(passes * len(inputs) / best),
+        "alloc_bytes_per_call": round(peaks / len(inputs)),
+        "held_blocks": sum(stat.count_diff for stat in after.compare_to(held, "filename")),
+    }
+
+
+def _timed(fn, inputs, passes) -> float:
+    start = time.perf_counter()
+    for _ in range(passes):
+        _pass(fn, inputs)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the range and flop evaluators.")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per case (best is kept)")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timed pass")
+    parser.add_argument("--save", type=Path, help="write the results to this JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+    parser.add_argument("--fail-above", type=float, default=1.25,
+                        help="with --compare, exit 1 if a case is this many times slower (default 1.25)")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.compare.read_text())["cases"] if args.compare else {}
+    header = f"{'case':<32} {'ops/s':>12} {'alloc B/call':>13} {'held blocks':>12}"
+    print(header + (f" {'vs base':>8}" if baseline else ""))
+
+    results, regressions = {}, []
+    for name, (fn, inputs) in build_cases(args.seed).items():
+        if args.filter not in name:
+            continue
+        result = results[name] = measure(fn, inputs, args.repeat, args.min_time)
+        line = (f"{name:<32} {result['ops_per_s']:>12,} {result['alloc_bytes_per_call']:>13,} "
+                f"{result['held_blocks']:>12,}")
+        if name in baseline:
+            slowdown = baseline[name]["ops_per_s"] / result["ops_per_s"]
+            line += f" {slowdown:>7.2f}x"
+            if slowdown > args.fail_above:
+                regressions.append(f"{name}: {slowdown:.2f}x slower than baseline")
+        print(line)
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "cases": results,
+        }, indent=2) + "\n")
+        print(f"saved {args.save}")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
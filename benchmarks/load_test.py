@@ -0,0 +1,289 @@
+"""
+Load test: concurrent simulated users replaying practice sessions, with
+throughput and p50/p95/p99 latency per route.
+
+Each user has its own cookie jar and loops over one of the session flows:
+
+- preflop: /api/start, then /api/next-hand -> /api/check-answer rounds
+- eval:    /api/eval/start, then /api/eval/next-hand -> /api/eval/check-answer rounds
+- flop:    /api/flop/bb-deal -> /api/flop/bb-defense
+
+By default requests go through httpx's ASGI transport into an in-process app
+(no sockets: measures the app itself). --url targets a running server, and
+--serve starts uvicorn on a free port for a real-socket run.
+
+Results can be saved as a JSON baseline (--save) and compared with an earlier
+one (--compare); --fail-above makes the run exit 1 when a route's p95 grew by
+more than that factor.
+
+Run with: uv run python benchmarks/load_test.py --users 20 --duration 10
+          uv run python benchmarks/load_test.py --serve --workers 2 --save baseline.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+FLOWS = ("preflop", "eval", "flop")
+ROUNDS_PER_SESSION = 20  # answers before a user starts a new session
+
+
+class Recorder:
+    """Latencies and error counts per route label ("GET /api/next-hand")."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method, route, url=None, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url or route, **kwargs)
+        self.latencies[f"{method} {route}"].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[f"{method} {route}"] += 1
+        return response
+
+
+def _percentile(sorted_values, q) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def _discover(client: httpx.AsyncClient) -> dict:
+    """Practice configurations the server offers, to pick sessions from."""
+    preflop = []
+    for position in (await client.get("/api/positions")).json():
+        for action in (await client.get(f"/api/actions/{position}")).json():
+            depths = (await client.get(f"/api/stack-depths/{position}/{action['value']}")).json()
+            preflop.extend((position, action["value"], depth) for depth in depths)
+    eval_depths = {}
+    for position in ("LJ", "HJ", "CO", "BTN", "SB"):
+        response = await client.get(f"/api/eval/stack-depths/{position}")
+        if response.status_code == 200 and response.json():
+            eval_depths[position] = response.json()
+    bb_depths = [int(d.removesuffix("bb")) for d in (await client.get("/api/stack-depths/BB/vs BTN")).json()
+                 if d.removesuffix("bb").isdigit()]
+    return {"preflop": preflop, "eval": eval_depths, "bb_depths": bb_depths or [100]}
+
+
+async def _preflop_session(client, rec: Recorder, config, rng):
+    position, action, depth = rng.choice(config["preflop"])
+    response = await rec.request(client, "POST", "/api/start",
+                                 json={"position": position, "action": action, "stack_depth": depth})
+    if response.status_code != 200:
+        return
+    answers = response.json()["available_actions"] + ["fold"]
+    for _ in range(ROUNDS_PER_SESSION):
+        hand = (await rec.request(client, "GET", "/api/next-hand")).json()["hand"]
+        await rec.request(client, "POST", "/api/check-answer", json={"hand": hand, "action": rng.choice(answers)})
+
+
+async def _eval_session(client, rec: Recorder, config, rng):
+    positions = rng.sample(sorted(config["eval"]), k=min(2, len(config["eval"])))
+    depths = sorted({d for p in positions for d in config["eval"][p]})
+    response = await rec.request(client, "POST", "/api/eval/start",
+                                 json={"positions": positions, "stack_depths": depths})
+    if response.status_code != 200:
+        return
+    for _ in range(ROUNDS_PER_SESSION):
+        spot = (await rec.request(client, "GET", "/api/eval/next-hand")).json()
+        await rec.request(client, "POST", "/api/eval/check-answer", json={
+            "hand": spot["hand"], "scenario_action": spot["scenario_action"], "position": spot["position"],
+            "stack_depth": spot["stack_depth"], "user_action": rng.choice(spot["available_actions"] + ["fold"]),
+        })
+
+
+async def _flop_session(client, rec: Recorder, config, rng):
+    for _ in range(ROUNDS_PER_SESSION // 4):
+        villain = rng.choice(("BTN", "CO"))
+        stack_depth = rng.choice(config["bb_depths"])
+        response = await rec.request(client, "POST", "/api/flop/bb-deal",
+                                     json={"villain_position": villain, "stack_depth": stack_depth})
+        if response.status_code != 200:
+            continue
+        deal = response.json()
+        await rec.request(client, "POST", "/api/flop/bb-defense", json={
+            "hero_cards": deal["bb_cards"], "board_cards": deal["flop_cards"], "villain_position": villain,
+            "stack_depth": stack_depth, "user_action": rng.choice(("fold", "call", "raise")),
+        })
+
+
+_SESSIONS = {"preflop": _preflop_session, "eval": _eval_session, "flop": _flop_session}
+
+
+async def _user(make_client, rec: Recorder, config, flow, deadline, seed):
+    rng = random.Random(seed)
+    async with make_client() as client:
+        while time.perf_counter() < deadline:
+            await _SESSIONS[flow](client, rec, config, rng)
+
+
+async def run_load(make_client, users, duration, flows, seed=0) -> dict:
+    """Run `users` concurrent users for `duration` seconds; flows are assigned round-robin."""
+    async with make_client() as client:
+        config = await _discover(client)
+    rec = Recorder()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        _user(make_client, rec, config, flows[i % len(flows)], deadline, seed + i) for i in range(users)
+    ))
+    elapsed = time.perf_counter() - start
+
+    routes = {}
+    for route, values in sorted(rec.latencies.items()):
+        values.sort()
+        routes[route] = {
+            "count": len(values),
+            "errors": rec.errors.get(route, 0),
+            "rps": round(len(values) / elapsed, 1),
+            "mean_ms": round(sum(values) / len(values) * 1e3, 3),
+            "p50_ms": round(_percentile(values, 50) * 1e3, 3),
+            "p95_ms": round(_percentile(values, 95) * 1e3, 3),
+            "p99_ms": round(_percentile(values, 99) * 1e3, 3),
+        }
+    total = sum(r["count"] for r in routes.values())
+    return {"elapsed_s": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 1), "routes": routes}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(workers) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "--factory", "poker_range_practice:create_app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ])
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(url + "/api/positions", timeout=1)
+            return server, url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_report(result, baseline=None):
+    header = f"{'route':<32} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+    for route, r in result["routes"].items():
+        line = (f"{route:<32} {r['count']:>7} {r['errors']:>5} {r['rps']:>8} "
+                f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+        base = baseline["routes"].get(route) if baseline else None
+        if base:
+            line += f" {r['p95_ms'] / base['p95_ms']:>11.2f}x"
+        print(line)
+    print(f"total: {result['requests']} requests in {result['elapsed_s']}s = {result['rps']} req/s")
+
+
+def _regressions(result, baseline, factor) -> list[str]:
+    return [
+        f"{route}: p95 {r['p95_ms']:.2f} ms vs {baseline['routes'][route]['p95_ms']:.2f} ms"
+        for route, r in result["routes"].items()
+        if route in baseline["routes"] and r["p95_ms"] > baseline["routes"][route]["p95_ms"] * factor
+    ]
+
+
+async def _run(args) -> dict:
+    flows = args.flows.split(",")
+    if args.url is None:
+        from poker_range_practice import create_app
+
+        app = create_app()
+        transport = httpx.ASGITransport(app=app)
+
+        def make_client():
+            return httpx.AsyncClient(transport=transport, base_url="http://loadtest")
+
+        async with app.router.lifespan_context(app):
+            return await run_load(make_client, args.users, args.duration, flows, args.seed)
+
+    limits = httpx.Limits(max_connections=4)
+
+    def make_client():
+        return httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30)
+
+    return await run_load(make_client, args.users, args.duration, flows, args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay practice sessions and report latency per route.")
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"comma-separated subset of {','.join(FLOWS)}")
+    parser.add_argument("--seed", type=int, default=0)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="running server to target (default: in-process ASGI app)")
+    target.add_argument("--serve", action="store_true", help="start uvicorn on a free port and target it")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --serve")
+    parser.add_argument("--save", type=Path, help="write the results to this JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+    parser.add_argument("--fail-above", type=float, help="exit 1 if a route's p95 exceeds the baseline by this factor")
+    args = parser.parse_args(argv)
+    unknown = set(args.flows.split(",")) - set(FLOWS)
+    if unknown:
+        parser.error(f"unknown flows: {', '.join(sorted(unknown))}")
+
+    server = None
+    if args.serve:
+        server, args.url = _start_server(args.workers)
+    try:
+        result = asyncio.run(_run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    result = {
+        "commit": _git_commit(),
+        "mode": "asgi" if args.url is None else ("serve" if args.serve else "url"),
+        "users": args.users,
+        "duration_s": args.duration,
+        "flows": args.flows.split(","),
+        "workers": args.workers if args.serve else None,
+        "python": platform.python_version(),
+        **result,
+    }
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    if baseline and (baseline["mode"], baseline["users"]) != (result["mode"], result["users"]):
+        print(f"warning: baseline ran {baseline['users']} users in {baseline['mode']} mode")
+    _print_report(result, baseline)
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"saved {args.save}")
+    if baseline and args.fail_above:
+        regressions = _regressions(result, baseline, args.fail_above)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
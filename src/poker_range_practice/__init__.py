@@ -2,24 +2,46 @@
 FastAPI backend for poker range practice web app.
 """
 
+import asyncio
+import gzip
+import hashlib
+import json
 import os
 import random
+import secrets
+import time
+import threading
+import weakref
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.sessions import SessionMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from .poker_hands import (
     generate_all_hands,
-    find_closest_hand_in_range,
-    find_bottom_of_range_category,
-    pick_boundary_hand,
     Hand,
 )
-from .range_manager import RangeManager
+from .combos import ComboRange, combo_hand, SUITS as COMBO_SUITS
+from .range_manager import CompiledRange, RangeManager, RangeSnapshot
+from .range_store import RangeStore, TenantRanges
+from .adaptive import AdaptiveSamplers, combo_weights, pool_weights
+from .answer_log import AnswerLog, DIMENSIONS as STATS_DIMENSIONS
+from .assets import DIST_DIR, STATIC_DIR, StaticAssets, accepts_encoding, is_fresh
+from .fast_json import FastJSONResponse, dumps as json_dumps
+from .flop_pool import FlopPool, PoolBusy, deal_bb_defense_counted
+from . import metrics
+from .profiler import ProfileMiddleware
+from .sessions import (
+    DEFAULT_TTL as SESSION_TTL,
+    CookieSessionMiddleware,
+    MemorySessionStore,
+    ServerSessionMiddleware,
+    SQLiteSessionStore,
+)
 from .flop import (
     Card as FlopCard,
     get_cbet_recommendation,
@@ -54,11 +76,16 @@ class CheckAnswerRequest(BaseModel):
     action: str
 
 
+class CheckAnswersRequest(BaseModel):
+    answers: list[CheckAnswerRequest]
+
+
 class FlopHeroHandRequest(BaseModel):
     hero: str
     villain: str
     stackDepth: int
     scenario: Optional[str] = None
+    adaptive: bool = False
 
 
 class CardData(BaseModel):
@@ -81,6 +108,10 @@ class BoardInfoRequest(BaseModel):
     board_cards: list[CardData]
 
 
+class RangeWriteRequest(BaseModel):
+    range: Union[str, dict[str, str]]
+
+
 class BBDealRequest(BaseModel):
     villain_position: str
     stack_depth: int
@@ -96,81 +127,587 @@ class CheckBBDefenseRequest(BaseModel):
 
 
 _base_dir = Path(__file__).parent
-_range_manager = RangeManager(str(_base_dir / "ranges.json"))
+
+# Process-wide state, built by _init_state() on the first create_app(). Not at
+# import: flop workers import this package too (spawn re-imports the module of
+# the task function) and must not compile ranges, replay the answer log or open
+# the range database.
+_range_manager: Optional[RangeManager] = None
+_tenant_ranges: Optional[TenantRanges] = None
+_answer_log: Optional[AnswerLog] = None
+_flop_pool: Optional[FlopPool] = None
+
+
+def _init_state():
+    global _range_manager, _tenant_ranges, _answer_log, _flop_pool
+    if _range_manager is not None:
+        return
+    # RANGES_FILE may be a JSON file, a .pack or a shard directory; RANGES_CACHE_MB caps compiled shards
+    _range_manager = RangeManager(
+        os.environ.get("RANGES_FILE", str(_base_dir / "ranges.json")),
+        cache_bytes=int(float(os.environ.get("RANGES_CACHE_MB", "64")) * 1024 * 1024),
+    )
+    # RANGES_DB enables per-user libraries (X-Range-User header) stored in SQLite
+    if os.environ.get("RANGES_DB"):
+        _tenant_ranges = TenantRanges(
+            RangeStore(os.environ["RANGES_DB"], pool_size=int(os.environ.get("RANGES_DB_POOL", "4"))),
+            _range_manager,
+        )
+    # ANSWER_LOG names the append-only answer log (one writer process); without it stats are
+    # kept in memory only. ANSWER_STATS_MAX_USERS caps the users whose counters stay in memory.
+    _answer_log = AnswerLog(os.environ.get("ANSWER_LOG"),
+                            max_users=int(os.environ.get("ANSWER_STATS_MAX_USERS", "10000")))
+    # FLOP_WORKERS processes for the BB defense deal (0 runs it on the request threadpool)
+    flop_workers = int(os.environ.get("FLOP_WORKERS", str(min(2, os.cpu_count() or 1))))
+    if flop_workers > 0:
+        _flop_pool = FlopPool(
+            flop_workers,
+            max_queue=int(os.environ.get("FLOP_QUEUE", "16")),
+            timeout=float(os.environ.get("FLOP_TIMEOUT", "2")),
+        )
+        metrics.Callback("flop_pool_tasks", "BB defense deals in the flop pool, running or queued.", "gauge",
+                         lambda: {("in_flight",): _flop_pool.in_flight,
+                                  ("queued",): max(0, _flop_pool.in_flight - _flop_pool.workers)}, ("state",))
+        metrics.Callback("flop_pool_failures_total", "BB defense deals refused (queue full), timed out or failed.",
+                         "counter", lambda: {("rejected",): _flop_pool.rejected, ("timeout",): _flop_pool.timeouts,
+                                             ("error",): _flop_pool.errors}, ("reason",))
+
+
+# Error-weighted hand draws (adaptive=true), fed by the same graded answers
+_adaptive = AdaptiveSamplers()
 _all_hands = generate_all_hands()
 
-_ALL_RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
-_ALL_SUITS = ['♠', '♥', '♦', '♣']
-
-
-def _deal_concrete_hand(
-    abstract: str,
-    deck: list[tuple[str, str]],
-) -> tuple[Optional[list[tuple[str, str]]], list[tuple[str, str]]]:
-    """Instantiate an abstract hand (e.g. 'AKs') from `deck`. Returns (cards, new_deck) or (None, deck)."""
-    deck = list(deck)
-    rank1 = abstract[0]
-    rank2 = abstract[1] if len(abstract) >= 2 else abstract[0]
-    hand_type = abstract[2] if len(abstract) > 2 else 'pair'
-
-    if hand_type == 'pair':
-        opts = [(r, s) for r, s in deck if r == rank1]
-        if len(opts) < 2:
-            return None, deck
-        c1, c2 = random.sample(opts, 2)
-        deck.remove(c1)
-        deck.remove(c2)
-        return [c1, c2], deck
-
-    if hand_type == 's':
-        suit_order = random.sample(_ALL_SUITS, 4)
-        for suit in suit_order:
-            c1 = next(((r, s) for r, s in deck if r == rank1 and s == suit), None)
-            c2 = next(((r, s) for r, s in deck if r == rank2 and s == suit), None)
-            if c1 and c2:
-                deck.remove(c1)
-                deck.remove(c2)
-                return [c1, c2], deck
-        return None, deck
-
-    # offsuit
-    c1_opts = [(r, s) for r, s in deck if r == rank1]
-    random.shuffle(c1_opts)
-    for c1 in c1_opts:
-        c2_opts = [(r, s) for r, s in deck if r == rank2 and s != c1[1]]
-        if c2_opts:
-            c2 = random.choice(c2_opts)
-            deck.remove(c1)
-            deck.remove(c2)
-            return [c1, c2], deck
-    return None, deck
+_ALL_COMBOS = ComboRange.full()
+_ALL_CARDS = [(r, s) for r in Hand.RANKS for s in COMBO_SUITS]
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Hot-reload ranges.json; RANGES_RELOAD_INTERVAL=0 disables the watcher
+    interval = float(os.environ.get("RANGES_RELOAD_INTERVAL", "2"))
+    if interval > 0:
+        _range_manager.start_watching(interval)
+    _answer_log.start()
+    if _flop_pool is not None:
+        _flop_pool.start()
+    yield
+    _range_manager.stop_watching()
+    _answer_log.close()
+    if _flop_pool is not None:
+        _flop_pool.shutdown()
+    if _tenant_ranges is not None:
+        _tenant_ranges.store.close()
+
+
+def _session_store(backend: str, ttl: int):
+    """Session store for SESSION_BACKEND=memory|sqlite (SESSION_DB names the database)."""
+    if backend == "memory":
+        return MemorySessionStore(int(os.environ.get("SESSION_MAX", "10000")), ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.environ.get("SESSION_DB", "sessions.db"), ttl=ttl)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+def _ranges_for(request: Request) -> RangeSnapshot:
+    """Range library for a request: the X-Range-User's own library, or the shared one."""
+    user = request.headers.get("X-Range-User")
+    if user and _tenant_ranges is not None:
+        return _tenant_ranges.snapshot(user)
+    return _range_manager.snapshot
+
+
+def _compiled_range_for(request: Request, position, action, stack_depth) -> Optional[CompiledRange]:
+    """A node of the request's library; may compile it or read SQLite, so async code runs it on the threadpool."""
+    return _ranges_for(request).get_compiled_range(position, action, stack_depth)
+
+
+_GZIP_MIN_SIZE = 512
+_RESPONSE_CACHE_SIZE = 4096  # per snapshot; beyond it (e.g. junk URLs) responses are built per request
+
+
+class _CachedBody:
+    """
+    A pre-serialized JSON response: body, gzipped body (if worth it) and a
+    strong ETag for each (strong validators differ between content codings).
+    """
+
+    __slots__ = ('body', 'gzipped', 'etag', 'gzip_etag')
+
+    def __init__(self, content):
+        self.body = json_dumps(content)
+        self.gzipped = gzip.compress(self.body, 6) if len(self.body) >= _GZIP_MIN_SIZE else None
+        digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+
+# Serialized read-only responses, per library snapshot: dropped with the snapshot on reload
+_response_cache: "weakref.WeakKeyDictionary[RangeSnapshot, dict]" = weakref.WeakKeyDictionary()
+_response_cache_lock = threading.Lock()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _cached_json(request: Request, ranges: RangeSnapshot, key, build, cache: Optional[dict] = None) -> Response:
+    """
+    Serve a read-only response serialized once per range library snapshot (or
+    in `cache`, e.g. a compiled node's), with strong ETags. Answers 304 when
+    If-None-Match matches, and sends the pre-gzipped body to clients that accept it.
+    """
+    if cache is None:
+        cache = _response_cache.get(ranges)
+    if cache is None:
+        with _response_cache_lock:
+            cache = _response_cache.setdefault(ranges, {})
+    cached = cache.get(key)
+    if cached is None:
+        metrics.RANGE_CACHE.inc(1, ("response", "miss"))
+        cached = _CachedBody(build())
+        if len(cache) < _RESPONSE_CACHE_SIZE:
+            cached = cache.setdefault(key, cached)
+    else:
+        metrics.RANGE_CACHE.inc(1, ("response", "hit"))
+
+    gzipped = cached.gzipped is not None and accepts_encoding(request.headers.get("accept-encoding", ""), "gzip")
+    etag = cached.gzip_etag if gzipped else cached.etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding, X-Range-User",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(cached.gzipped, media_type="application/json", headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+def _practice_range(request: Request):
+    """Compiled range of the session's classic practice config (400 if none)."""
+    config = request.session.get("config")
+    if config is None:
+        raise HTTPException(status_code=400, detail="No active practice session")
+
+    compiled = _ranges_for(request).get_compiled_range(
+        config["position"], config["action"], config["stack_depth"]
+    )
+    if compiled is None:
+        raise HTTPException(status_code=400, detail="No active practice session")
+    return compiled
+
+
+def _grade_answer(compiled, hand: Hand, user_action: str) -> dict:
+    """Grade one answer against a compiled range, with the bottom/closest-hand feedback."""
+    actual_action = compiled.hands.get(hand, "fold")
+    is_correct = user_action == actual_action
+
+    response = {
+        "correct": is_correct,
+        "actual_action": actual_action,
+        "user_action": user_action,
+    }
+    if actual_action != "fold":
+        bottom = compiled.bottom[hand.index]
+        if bottom:
+            response["bottom_of_range"] = str(bottom)
+    if not is_correct and actual_action == "fold":
+        closest = compiled.closest[hand.index]
+        if closest:
+            response["closest_hand"] = str(closest)
+    return response
+
+
+def _grading_data(compiled, hand: Hand) -> dict:
+    """A hand with everything a client needs to grade it locally (see _grade_answer)."""
+    item = {"hand": str(hand), "actual_action": compiled.hands.get(hand, "fold")}
+    feedback = compiled.bottom[hand.index] if item["actual_action"] != "fold" else compiled.closest[hand.index]
+    if feedback:
+        item["bottom_of_range" if item["actual_action"] != "fold" else "closest_hand"] = str(feedback)
+    return item
+
+
+def _range_matrix(ranges: RangeSnapshot, position, action, stack_depth, format) -> dict:
+    """Body of /api/range-matrix: the 169-hand matrix or the per-action notation."""
+    if format == "notation":
+        notation = ranges.get_range_notation(position, action, stack_depth)
+        if notation is None:
+            raise HTTPException(status_code=404, detail="Range not found")
+        available_actions = ranges.get_available_range_actions(position, action, stack_depth)
+        return {"notation": notation, "available_actions": available_actions}
+    if format != "matrix":
+        raise HTTPException(status_code=400, detail="format must be 'matrix' or 'notation'")
+    compiled = ranges.get_compiled_range(position, action, stack_depth)
+    if compiled is None:
+        raise HTTPException(status_code=404, detail="Range not found")
+    available_actions = ranges.get_available_range_actions(position, action, stack_depth)
+    # The matrix is encoded once per compiled node, shared across reloads and tenants
+    return {"range": compiled.matrix, "available_actions": available_actions}
+
+
+def _range_user(request: Request) -> str:
+    if _tenant_ranges is None:
+        raise HTTPException(status_code=404, detail="Per-user range storage is not enabled")
+    user = request.headers.get("X-Range-User")
+    if not user:
+        raise HTTPException(status_code=400, detail="X-Range-User header required")
+    return user
+
+
+def _range_writer(request: Request, claim=False) -> tuple[str, Optional[str]]:
+    """
+    (user, new token) for a library write, checked against the library's
+    X-Range-Token. With `claim`, a write without a token claims a library
+    nobody owns yet and the new token is returned.
+    """
+    user = _range_user(request)
+    token = request.headers.get("X-Range-Token")
+    if token:
+        if not _tenant_ranges.store.check_token(user, token):
+            raise HTTPException(status_code=403, detail="Invalid X-Range-Token")
+        return user, None
+    token = _tenant_ranges.store.claim(user) if claim else None
+    if token is None:
+        raise HTTPException(status_code=401, detail="X-Range-Token header required")
+    return user, token
+
+
+def _answer_user(request: Request) -> str:
+    """
+    Whose answer this is: an anonymous id kept in the session. Not the
+    X-Range-User header, which anyone can send to write or read another
+    user's answers.
+    """
+    return request.session.setdefault("uid", "anon:" + secrets.token_urlsafe(9))
+
+
+def _hole_hand(cards) -> Optional[Hand]:
+    """Hand class of two hole cards, None if they are not two valid cards."""
+    try:
+        return combo_hand([(c.rank, c.suit) for c in cards])
+    except (KeyError, TypeError):
+        return None
+
+
+def _preflop_scenario(config: dict) -> str:
+    return f"{config['position']}/{config['action']}@{config['stack_depth']}"
+
+
+def _flop_spot(hero, villain, stack_depth: int, scenario=None) -> tuple[str, str]:
+    """(kind, scenario) of a flop drill, as check-cbet and bb-defense record it."""
+    if hero == "BB":
+        return "bb_defense", f"BB vs {villain}@{stack_depth}bb"
+    return "cbet", f"{hero} vs {villain}@{stack_depth}bb" + (f"/{scenario}" if scenario else "")
+
+
+def _record_answer(user, kind, scenario, hand: Optional[Hand], texture, correct):
+    """Count a graded answer in the answer log and the user's adaptive sampler."""
+    _answer_log.record(user, kind, scenario, str(hand) if hand is not None else None, texture, correct)
+    if hand is not None:
+        _adaptive.observe(user, f"{kind}/{scenario}", hand, correct)
+
+
+def _pick_boundary(request: Request, spot: str, boundary, weighted: bool, adaptive: bool) -> Hand:
+    """A hand from a boundary index: uniform/weighted draw, or error-weighted for the caller's session."""
+    if not adaptive:
+        return boundary.pick(weighted)
+    hands = boundary.weighted_hands if weighted else boundary.hands
+    return _adaptive.pick(_answer_user(request), spot, hands, lambda: pool_weights(hands))
+
+
+def _flop_hero_combos(ranges: RangeSnapshot, hero, villain, stack_depth: int, scenario=None):
+    """(range action used, hero's combos) for a flop drill; all combos if the range is missing."""
+    action = "open"
+    if hero == "BB":
+        if villain == "BTN":
+            action = "vs BTN"
+        elif villain == "CO":
+            action = "vs CO"
+        elif villain == "SB":
+            action = "vs sb_raise"
+    elif hero == "BTN":
+        if villain == "BB":
+            action = "vs BB"
+    elif hero == "SB":
+        action = "open_limp" if scenario == "limp" else "open"
+
+    compiled = ranges.get_compiled_range(hero, action, f"{stack_depth}bb")
+
+    # Weight classes by combo count (AKo is 3x as likely as AKs)
+    hero_combos = compiled.combos if compiled else None
+    return action, hero_combos or _ALL_COMBOS
+
+
+_CBET_SPOTS = {
+    "BTN": ("BB", "SB"),
+    "CO":  ("BB",),
+    "SB":  ("BB",),
+}
+
+
+def _check_cbet_spot(hero, villain):
+    if hero not in _CBET_SPOTS:
+        raise HTTPException(status_code=400, detail=f"Position héro non supportée : {hero}")
+    if villain not in _CBET_SPOTS[hero]:
+        raise HTTPException(status_code=400, detail=f"Situation {hero} vs {villain} non supportée")
+
+
+def _grade_cbet(hole, board, hero, villain, stack_depth: int, scenario, user_action, user_sizing) -> dict:
+    """Grade a bet/check decision (and sizing, within 8%) against the cbet strategy."""
+    rec = get_cbet_recommendation(hole, board, hero, villain, stack_depth, scenario=scenario)
+
+    user_bets = user_action == "bet"
+    is_correct = user_bets == rec["should_bet"]
+
+    if is_correct and user_bets and user_sizing is not None:
+        is_correct = abs(user_sizing - rec["correct_sizing"]) <= 8
+
+    return {
+        "correct": is_correct,
+        "correct_action": "bet" if rec["should_bet"] else "check",
+        "correct_sizing": rec["correct_sizing"],
+        "texture": rec["texture"],
+        "texture_label": rec["texture_label"],
+        "cbet_frequency": rec["cbet_frequency"],
+        "hand_strength": rec["hand_strength"],
+        "hand_label": rec["hand_label"],
+    }
+
+
+def _grade_bb_defense(hole, board, stack_depth: int, user_action, user_sizing) -> dict:
+    """Grade a fold/call/raise facing a cbet (and the check-raise multiplier, within 0.5x)."""
+    rec = get_bb_defense_recommendation(hole, board, stack_depth)
+
+    is_correct = user_action == rec['action']
+    if is_correct and user_action == 'raise' and user_sizing is not None:
+        correct_mult = rec['raise_sizing'] or 0
+        is_correct = abs(user_sizing - correct_mult) <= 0.5
+
+    return {
+        'correct':         is_correct,
+        'correct_action':  rec['action'],
+        'correct_sizing':  rec['raise_sizing'],
+        'texture':         rec['texture'],
+        'texture_label':   rec['texture_label'],
+        'villain_sizing':  rec['villain_sizing'],
+        'hand_strength':   rec['hand_strength'],
+        'hand_label':      rec['hand_label'],
+    }
+
+
+def _bb_deal_combos(request: Request, villain_position, stack_depth: int) -> tuple:
+    """(BB's calling combos, villain's opening combos) of a deal: lookups that may compile, for the threadpool."""
+    ranges = _ranges_for(request)
+    stack_str = f"{stack_depth}bb"
+
+    # BB's calling range
+    bb_range = ranges.get_compiled_range('BB', f"vs {villain_position}", stack_str)
+    bb_combos = bb_range.combos if bb_range else None
+
+    # Villain's opening range
+    villain_range = ranges.get_compiled_range(villain_position, 'open', stack_str)
+    villain_combos = villain_range.combos if villain_range else None
+
+    return bb_combos or _ALL_COMBOS, villain_combos or _ALL_COMBOS
+
+
+async def _deal_bb_defense(request: Request, villain_position, stack_depth: int) -> dict:
+    """A BB defense deal from the flop pool (or the threadpool when FLOP_WORKERS=0)."""
+    bb_combos, villain_combos = await run_in_threadpool(_bb_deal_combos, request, villain_position, stack_depth)
+    args = (bb_combos, villain_combos, villain_position, stack_depth)
+    if _flop_pool is None:
+        deal, stats = await run_in_threadpool(deal_bb_defense_counted, *args)
+    else:
+        try:
+            deal, stats = await _flop_pool.run(deal_bb_defense_counted, *args)
+        except PoolBusy:
+            raise HTTPException(status_code=503, detail="Serveur occupé, réessayez")
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Délai de calcul dépassé")
+        # Evaluations in a worker process are not seen by this process's counter
+        metrics.EVALUATE_HAND_CALLS.inc(stats["evaluate_hand"])
+    _record_deal(deal, stats)
+    return deal
+
+
+def _record_deal(deal: dict, stats: dict):
+    metrics.BB_DEAL_VILLAIN_COMBOS.observe(deal["villain_combos"])
+    metrics.BB_DEAL_CBET_CANDIDATES.observe(stats["candidates"])
+    if stats["errors"]:
+        metrics.BB_DEAL_EVAL_ERRORS.inc(stats["errors"])
+    if stats["fallback"] is not None:
+        metrics.BB_DEAL_FALLBACKS.inc(1, (stats["fallback"],))
+
+
+# /ws/practice: a ping after WS_HEARTBEAT idle seconds, closed if the next period stays silent
+_WS_HEARTBEAT = float(os.environ.get("WS_HEARTBEAT", "20"))
+_WS_SEND_TIMEOUT = 10.0  # a client that stops reading is dropped instead of buffered for
+
+
+class _Drill:
+    """A /ws/practice connection's drill: its config and the hand awaiting an answer."""
+
+    __slots__ = ('mode', 'config', 'compiled', 'current')
+
+    def __init__(self, mode, config, compiled=None):
+        self.mode = mode
+        self.config = config
+        self.compiled = compiled
+        self.current = None
+
+
+async def _ws_start(websocket: WebSocket, message: dict) -> _Drill:
+    """Validate a "start" message into a drill (HTTPException on bad input, like the REST endpoints)."""
+    mode = message.get("mode", "preflop")
+    if mode == "preflop":
+        config = {k: message.get(k) for k in ("position", "action", "stack_depth")}
+        compiled = await run_in_threadpool(_compiled_range_for, websocket, *config.values())
+        if compiled is None:
+            raise HTTPException(status_code=404, detail="Range not found")
+        config["weighted"] = bool(message.get("weighted"))
+        config["adaptive"] = bool(message.get("adaptive"))
+        return _Drill(mode, config, compiled)
+    try:
+        stack_depth = int(message.get("stack_depth"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="stack_depth doit être un entier")
+    if mode == "cbet":
+        _check_cbet_spot(message.get("hero"), message.get("villain"))
+        return _Drill(mode, {"hero": message["hero"], "villain": message["villain"], "stack_depth": stack_depth,
+                             "scenario": message.get("scenario"), "adaptive": bool(message.get("adaptive"))})
+    if mode == "bb_defense":
+        if message.get("villain") not in ('BTN', 'CO'):
+            raise HTTPException(status_code=400, detail="Villain doit être BTN ou CO")
+        return _Drill(mode, {"villain": message["villain"], "stack_depth": stack_depth})
+    raise HTTPException(status_code=400, detail="mode must be 'preflop', 'cbet' or 'bb_defense'")
+
+
+async def _ws_deal(websocket: WebSocket, drill: _Drill) -> dict:
+    """Deal the drill's next hand, keep it as the pending one and return its message."""
+    config = drill.config
+    if drill.mode == "preflop":
+        spot = "preflop/" + _preflop_scenario(config)
+        hand = _pick_boundary(websocket, spot, drill.compiled.boundary, config["weighted"], config["adaptive"])
+        drill.current = hand
+        return {"type": "hand", "mode": "preflop", "hand": str(hand)}
+
+    if drill.mode == "cbet":
+        _, hero_combos = await run_in_threadpool(
+            lambda: _flop_hero_combos(_ranges_for(websocket), config["hero"], config["villain"],
+                                      config["stack_depth"], config["scenario"]))
+        if config["adaptive"]:
+            spot = "/".join(_flop_spot(config["hero"], config["villain"], config["stack_depth"], config["scenario"]))
+            hand = _adaptive.pick(_answer_user(websocket), spot, hero_combos, lambda: combo_weights(hero_combos))
+            hero_combos = ComboRange(hero_combos.mask & ComboRange.from_hands([hand]).mask)
+        hole = list(hero_combos.sample())
+        board = random.sample([c for c in _ALL_CARDS if c not in hole], 3)
+        drill.current = (hole, board)
+        return {"type": "hand", "mode": "cbet", "hand": str(combo_hand(hole)),
+                "hero_cards": [{"rank": r, "suit": s} for r, s in hole],
+                "board_cards": [{"rank": r, "suit": s} for r, s in board]}
+
+    deal = await _deal_bb_defense(websocket, config["villain"], config["stack_depth"])
+    drill.current = (
+        [(c["rank"], c["suit"]) for c in deal["bb_cards"]],
+        [(c["rank"], c["suit"]) for c in deal["flop_cards"]],
+    )
+    return {"type": "hand", "mode": "bb_defense", **deal}
+
+
+def _ws_grade(websocket: WebSocket, drill: _Drill, message: dict) -> dict:
+    """Grade an "answer" message against the pending hand and record it."""
+    user_action = message.get("action")
+    sizing = message.get("sizing")
+    if sizing is not None and not isinstance(sizing, (int, float)):
+        raise HTTPException(status_code=400, detail="sizing must be a number")
+    user = _answer_user(websocket)
+    config = drill.config
+    if drill.mode == "preflop":
+        result = _grade_answer(drill.compiled, drill.current, user_action)
+        _record_answer(user, "preflop", _preflop_scenario(config), drill.current, None, result["correct"])
+        return result
+
+    hole, board = drill.current
+    hole_cards = [FlopCard(r, s) for r, s in hole]
+    board_cards = [FlopCard(r, s) for r, s in board]
+    if drill.mode == "cbet":
+        result = _grade_cbet(hole_cards, board_cards, config["hero"], config["villain"], config["stack_depth"],
+                             config["scenario"], user_action, sizing)
+        kind, scenario = _flop_spot(config["hero"], config["villain"], config["stack_depth"], config["scenario"])
+    else:
+        result = _grade_bb_defense(hole_cards, board_cards, config["stack_depth"], user_action, sizing)
+        kind, scenario = _flop_spot("BB", config["villain"], config["stack_depth"])
+    _record_answer(user, kind, scenario, combo_hand(hole), result["texture"], result["correct"])
+    return result
+
+
+async def _ws_send(websocket: WebSocket, message: dict):
+    await asyncio.wait_for(websocket.send_text(json_dumps(message).decode("utf-8")), _WS_SEND_TIMEOUT)
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    _init_state()
+    app = FastAPI(lifespan=_lifespan, default_response_class=FastJSONResponse)
+
+    # Sessions are signed cookies by default, which survive restarts and are shared
+    # by every worker; SESSION_BACKEND=sqlite or memory keeps them server-side
+    session_backend = os.environ.get("SESSION_BACKEND", "cookie")
+    if session_backend == "cookie":
+        secret_key = os.environ.get("SECRET_KEY", "dev_key_for_poker_practice_local")
+        app.add_middleware(CookieSessionMiddleware, secret_key=secret_key)
+    else:
+        ttl = int(os.environ.get("SESSION_TTL", str(SESSION_TTL)))
+        app.add_middleware(ServerSessionMiddleware, store=_session_store(session_backend, ttl), max_age=ttl)
+    # Wraps the session middleware, so request latency includes loading and saving the session
+    app.add_middleware(metrics.MetricsMiddleware)
+    # Request profiling, only installed when PROFILE_RATE or PROFILE_TOKEN is set; added last, so
+    # it is outermost and a profile covers the metrics and session middleware too
+    profile_rate = float(os.environ.get("PROFILE_RATE", "0"))
+    profile_token = os.environ.get("PROFILE_TOKEN")
+    if profile_rate > 0 or profile_token:
+        app.add_middleware(
+            ProfileMiddleware,
+            directory=os.environ.get("PROFILE_DIR", "profiles"),
+            rate=profile_rate,
+            token=profile_token,
+            interval=float(os.environ.get("PROFILE_INTERVAL", "0.001")),
+            keep=int(os.environ.get("PROFILE_KEEP", "50")),
+        )
 
-    secret_key = os.environ.get("SECRET_KEY", "dev_key_for_poker_practice_local")
-    app.add_middleware(SessionMiddleware, secret_key=secret_key)
+    # Endpoints that only compute in memory (flop grading, stats, counters) are
+    # async and run on the event loop. The ones that look up ranges stay sync on
+    # the threadpool: a lookup may compile a node lazily (packs, shards) or read
+    # a per-user library from SQLite. The async BB deal runs its lookups there too.
 
     @app.get("/api/positions")
-    def get_positions():
-        return _range_manager.get_available_positions()
+    def get_positions(request: Request):
+        ranges = _ranges_for(request)
+        return _cached_json(request, ranges, ("positions",), ranges.get_available_positions)
 
     @app.get("/api/actions/{position}")
-    def get_actions(position: str):
-        return _range_manager.get_available_actions(position)
+    def get_actions(position: str, request: Request):
+        ranges = _ranges_for(request)
+        return _cached_json(request, ranges, ("actions", position),
+                            lambda: ranges.get_available_actions(position))
 
     @app.get("/api/stack-depths/{position}/{action}")
-    def get_stack_depths(position: str, action: str):
-        return _range_manager.get_available_stack_depths(position, action)
+    def get_stack_depths(position: str, action: str, request: Request):
+        ranges = _ranges_for(request)
+        return _cached_json(request, ranges, ("stack-depths", position, action),
+                            lambda: ranges.get_available_stack_depths(position, action))
 
     @app.post("/api/start")
     def start_practice(body: StartRequest, request: Request):
-        current_range = _range_manager.get_range(body.position, body.action, body.stack_depth)
-        if current_range is None:
+        ranges = _ranges_for(request)
+        compiled = ranges.get_compiled_range(body.position, body.action, body.stack_depth)
+        if compiled is None:
             raise HTTPException(status_code=404, detail="Range not found")
 
-        range_actions = _range_manager.get_available_range_actions(
+        range_actions = ranges.get_available_range_actions(
             body.position, body.action, body.stack_depth
         )
 
@@ -182,221 +719,96 @@ def create_app() -> FastAPI:
 
         return {
             "success": True,
-            "range_size": len(current_range),
+            "range_size": len(compiled.combos),
             "available_actions": range_actions,
         }
 
     @app.get("/api/next-hand")
-    def get_next_hand(request: Request):
-        config = request.session.get("config")
-        if config is None:
-            raise HTTPException(status_code=400, detail="No active practice session")
-
-        current_range = _range_manager.get_range(
-            config["position"], config["action"], config["stack_depth"]
-        )
-        if current_range is None:
-            raise HTTPException(status_code=400, detail="No active practice session")
-
-        hand = pick_boundary_hand(current_range, _all_hands)
-        return {"hand": str(hand)}
+    def get_next_hand(request: Request, weighted: bool = False, adaptive: bool = False):
+        compiled = _practice_range(request)
+        spot = "preflop/" + _preflop_scenario(request.session["config"])
+        hand = _pick_boundary(request, spot, compiled.boundary, weighted, adaptive)
+        return FastJSONResponse({"hand": str(hand)})
+
+    @app.get("/api/next-hands")
+    def get_next_hands(request: Request, n: int = Query(50, ge=1, le=200), weighted: bool = True,
+                       adaptive: bool = False):
+        # One round trip for a whole drill: the client grades locally and
+        # reports the answers back in bulk through /api/check-answers. Draws
+        # are boundary-weighted unless weighted=false.
+        compiled = _practice_range(request)
+        spot = "preflop/" + _preflop_scenario(request.session["config"])
+        return FastJSONResponse({"hands": [
+            _grading_data(compiled, _pick_boundary(request, spot, compiled.boundary, weighted, adaptive))
+            for _ in range(n)
+        ]})
 
     @app.post("/api/check-answer")
     def check_answer(body: CheckAnswerRequest, request: Request):
-        config = request.session.get("config")
-        if config is None:
-            raise HTTPException(status_code=400, detail="No active practice session")
-
-        current_range = _range_manager.get_range(
-            config["position"], config["action"], config["stack_depth"]
-        )
-        if current_range is None:
-            raise HTTPException(status_code=400, detail="No active practice session")
-
+        compiled = _practice_range(request)
         hand = Hand(body.hand)
-        actual_action = current_range.get(hand, "fold")
-        is_correct = body.action == actual_action
-
-        response = {
-            "correct": is_correct,
-            "actual_action": actual_action,
-            "user_action": body.action,
-        }
-
-        if actual_action != "fold":
-            specific_range_hands = [
-                h for h, act in current_range.items() if act == actual_action
-            ]
-            bottom = find_bottom_of_range_category(hand, specific_range_hands)
-            if bottom:
-                response["bottom_of_range"] = str(bottom)
-
-        if not is_correct and actual_action == "fold":
-            closest = find_closest_hand_in_range(hand, set(current_range.keys()))
-            if closest:
-                response["closest_hand"] = str(closest)
-
-        return response
+        result = _grade_answer(compiled, hand, body.action)
+        _record_answer(_answer_user(request), "preflop", _preflop_scenario(request.session["config"]),
+                       hand, None, result["correct"])
+        return FastJSONResponse(result)
+
+    @app.post("/api/check-answers")
+    def check_answers(body: CheckAnswersRequest, request: Request):
+        if len(body.answers) > 500:
+            raise HTTPException(status_code=400, detail="At most 500 answers per batch")
+        compiled = _practice_range(request)
+        try:
+            hands = [Hand(a.hand) for a in body.answers]
+            results = [_grade_answer(compiled, hand, a.action) for hand, a in zip(hands, body.answers)]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        scenario = _preflop_scenario(request.session["config"])
+        user = _answer_user(request)
+        for hand, result in zip(hands, results):
+            _record_answer(user, "preflop", scenario, hand, None, result["correct"])
+        return FastJSONResponse({
+            "results": results,
+            "correct": sum(1 for r in results if r["correct"]),
+            "total": len(results),
+        })
 
     @app.post("/api/flop/hero-hand")
-    def get_flop_hero_hand(body: FlopHeroHandRequest):
-        stack_depth = f"{body.stackDepth}bb"
-
-        action = "open"
-        if body.hero == "BB":
-            if body.villain == "BTN":
-                action = "vs BTN"
-            elif body.villain == "CO":
-                action = "vs CO"
-            elif body.villain == "SB":
-                action = "vs sb_raise"
-        elif body.hero == "BTN":
-            if body.villain == "BB":
-                action = "vs BB"
-        elif body.hero == "SB":
-            action = "open_limp" if body.scenario == "limp" else "open"
-
-        current_range = _range_manager.get_range(body.hero, action, stack_depth)
-
-        valid_hands = []
-        if current_range:
-            valid_hands = [str(h) for h, act in current_range.items() if act != "fold"]
-
-        if not valid_hands:
-            valid_hands = [str(h) for h in _all_hands]
-
-        chosen_hand = random.choice(valid_hands)
-        return {"hand": chosen_hand, "action_used": action}
+    def get_flop_hero_hand(body: FlopHeroHandRequest, request: Request):
+        action, hero_combos = _flop_hero_combos(_ranges_for(request), body.hero, body.villain,
+                                                body.stackDepth, body.scenario)
+        if body.adaptive:
+            spot = "/".join(_flop_spot(body.hero, body.villain, body.stackDepth, body.scenario))
+            chosen_hand = _adaptive.pick(_answer_user(request), spot, hero_combos, lambda: combo_weights(hero_combos))
+        else:
+            chosen_hand = combo_hand(hero_combos.sample())
+        return FastJSONResponse({"hand": str(chosen_hand), "action_used": action})
 
     @app.post("/api/flop/check-cbet")
-    def check_cbet(body: CheckCbetRequest):
-        supported = {
-            "BTN": ("BB", "SB"),
-            "CO":  ("BB",),
-            "SB":  ("BB",),
-        }
-        if body.hero_position not in supported:
-            raise HTTPException(status_code=400, detail=f"Position héro non supportée : {body.hero_position}")
-        if body.villain_position not in supported[body.hero_position]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Situation {body.hero_position} vs {body.villain_position} non supportée"
-            )
-
+    async def check_cbet(body: CheckCbetRequest, request: Request):
+        _check_cbet_spot(body.hero_position, body.villain_position)
         hole = [FlopCard(c.rank, c.suit) for c in body.hero_cards]
         board = [FlopCard(c.rank, c.suit) for c in body.board_cards]
+        result = _grade_cbet(hole, board, body.hero_position, body.villain_position, body.stack_depth,
+                             body.scenario, body.user_action, body.user_sizing)
 
-        rec = get_cbet_recommendation(
-            hole, board, body.hero_position, body.villain_position, body.stack_depth,
-            scenario=body.scenario,
-        )
-
-        user_bets = body.user_action == "bet"
-        is_correct = user_bets == rec["should_bet"]
-
-        if is_correct and user_bets and body.user_sizing is not None:
-            is_correct = abs(body.user_sizing - rec["correct_sizing"]) <= 8
-
-        return {
-            "correct": is_correct,
-            "correct_action": "bet" if rec["should_bet"] else "check",
-            "correct_sizing": rec["correct_sizing"],
-            "texture": rec["texture"],
-            "texture_label": rec["texture_label"],
-            "cbet_frequency": rec["cbet_frequency"],
-            "hand_strength": rec["hand_strength"],
-            "hand_label": rec["hand_label"],
-        }
+        kind, scenario = _flop_spot(body.hero_position, body.villain_position, body.stack_depth, body.scenario)
+        _record_answer(_answer_user(request), kind, scenario, _hole_hand(body.hero_cards),
+                       result["texture"], result["correct"])
+        return FastJSONResponse(result)
 
     @app.post("/api/flop/bb-deal")
-    def bb_deal(body: BBDealRequest):
+    async def bb_deal(body: BBDealRequest, request: Request):
         if body.villain_position not in ('BTN', 'CO'):
             raise HTTPException(status_code=400, detail="Villain doit être BTN ou CO")
 
-        stack_str = f"{body.stack_depth}bb"
-
-        # BB's calling range
-        bb_action = f"vs {body.villain_position}"
-        bb_range = _range_manager.get_range('BB', bb_action, stack_str) or {}
-        valid_bb = [str(h) for h, act in bb_range.items() if act != 'fold']
-        if not valid_bb:
-            valid_bb = [str(h) for h in _all_hands]
-
-        # Villain's opening range
-        villain_range = _range_manager.get_range(body.villain_position, 'open', stack_str) or {}
-        valid_villain = [str(h) for h, act in villain_range.items() if act != 'fold']
-        if not valid_villain:
-            valid_villain = [str(h) for h in _all_hands]
-
-        # Build and shuffle deck
-        deck: list[tuple[str, str]] = [(r, s) for r in _ALL_RANKS for s in _ALL_SUITS]
-        random.shuffle(deck)
-
-        # Deal BB hand
-        bb_abstract = random.choice(valid_bb)
-        bb_cards, deck = _deal_concrete_hand(bb_abstract, deck)
-        if bb_cards is None:
-            bb_abstract = random.choice(valid_bb)
-            bb_cards, deck = _deal_concrete_hand(bb_abstract, deck)
-        if bb_cards is None:
-            bb_cards = [deck.pop(0), deck.pop(0)]
-
-        # Burn + deal flop
-        deck.pop(0)
-        flop = [deck.pop(0), deck.pop(0), deck.pop(0)]
-        flop_cards = [FlopCard(r, s) for r, s in flop]
-
-        # Board texture for villain cbet sizing
-        texture = classify_board_vs_bb(flop_cards)
-        villain_sizing = {
-            BoardTexture.EXTRA_DRY:      25,
-            BoardTexture.INTERMEDIAIRE:  33,
-            BoardTexture.DRAWY:          50,
-        }[texture]
+        return FastJSONResponse(await _deal_bb_defense(request, body.villain_position, body.stack_depth))
 
-        # Filter villain range to hands that cbet on this flop
-        cbet_candidates: list[tuple[str, list[tuple[str, str]]]] = []
-        for villain_abstract in valid_villain:
-            v_cards, _ = _deal_concrete_hand(villain_abstract, list(deck))
-            if v_cards is None:
-                continue
-            v_hole = [FlopCard(r, s) for r, s in v_cards]
-            try:
-                rec = get_cbet_recommendation(
-                    v_hole, flop_cards, body.villain_position, 'BB', body.stack_depth
-                )
-                if rec['should_bet']:
-                    cbet_candidates.append((villain_abstract, v_cards))
-            except Exception:
-                pass
-
-        if cbet_candidates:
-            villain_abstract, villain_cards = random.choice(cbet_candidates)
-        else:
-            # Fallback: any instantiable villain hand
-            villain_abstract, villain_cards = None, None
-            random.shuffle(valid_villain)
-            for va in valid_villain:
-                vc, _ = _deal_concrete_hand(va, list(deck))
-                if vc is not None:
-                    villain_abstract, villain_cards = va, vc
-                    break
-            if villain_cards is None:
-                villain_cards = [deck.pop(0), deck.pop(0)]
-
-        return {
-            'bb_hand':         bb_abstract,
-            'bb_cards':        [{'rank': r, 'suit': s} for r, s in bb_cards],
-            'flop_cards':      [{'rank': r, 'suit': s} for r, s in flop],
-            'villain_hand':    villain_abstract,
-            'villain_cards':   [{'rank': r, 'suit': s} for r, s in villain_cards],
-            'villain_sizing':  villain_sizing,
-            'texture':         texture.value,
-            'texture_label':   BB_TEXTURE_LABELS[texture.value],
-        }
+    @app.get("/api/flop/pool")
+    async def get_flop_pool_stats():
+        return _flop_pool.stats() if _flop_pool is not None else {"workers": 0}
 
     @app.post("/api/flop/board-info")
-    def get_board_info(body: BoardInfoRequest):
+    async def get_board_info(body: BoardInfoRequest):
         board = [FlopCard(c.rank, c.suit) for c in body.board_cards]
         texture = classify_board_vs_bb(board)
         villain_sizing = {
@@ -411,129 +823,205 @@ def create_app() -> FastAPI:
         }
 
     @app.post("/api/flop/bb-defense")
-    def check_bb_defense(body: CheckBBDefenseRequest):
+    async def check_bb_defense(body: CheckBBDefenseRequest, request: Request):
         if body.villain_position not in ('BTN', 'CO'):
             raise HTTPException(status_code=400, detail=f"Villain non supporté: {body.villain_position}")
 
         hole  = [FlopCard(c.rank, c.suit) for c in body.hero_cards]
         board = [FlopCard(c.rank, c.suit) for c in body.board_cards]
-
-        rec = get_bb_defense_recommendation(hole, board, body.stack_depth)
-
-        is_correct = body.user_action == rec['action']
-        if is_correct and body.user_action == 'raise' and body.user_sizing is not None:
-            correct_mult = rec['raise_sizing'] or 0
-            is_correct = abs(body.user_sizing - correct_mult) <= 0.5
-
-        return {
-            'correct':         is_correct,
-            'correct_action':  rec['action'],
-            'correct_sizing':  rec['raise_sizing'],
-            'texture':         rec['texture'],
-            'texture_label':   rec['texture_label'],
-            'villain_sizing':  rec['villain_sizing'],
-            'hand_strength':   rec['hand_strength'],
-            'hand_label':      rec['hand_label'],
-        }
+        result = _grade_bb_defense(hole, board, body.stack_depth, body.user_action, body.user_sizing)
+
+        kind, scenario = _flop_spot("BB", body.villain_position, body.stack_depth)
+        _record_answer(_answer_user(request), kind, scenario, _hole_hand(body.hero_cards),
+                       result['texture'], result['correct'])
+        return FastJSONResponse(result)
+
+    # ── WebSocket drills ───────────────────────────────────────────────────────
+
+    @app.websocket("/ws/practice")
+    async def practice_ws(websocket: WebSocket):
+        """
+        One connection per drill: {"type": "start", "mode": ...} deals the first
+        hand, and every {"type": "answer", "action": ...} gets its result followed
+        by the next hand. A client holds at most one ungraded hand.
+        """
+        # Assign the anonymous answer id before accepting, so the session cookie sent
+        # with the accept carries it and /api/stats sees this socket's answers
+        _answer_user(websocket)
+        await websocket.accept()
+        drill = None
+        last_seen = time.monotonic()
+        try:
+            while True:
+                try:
+                    text = await asyncio.wait_for(websocket.receive_text(), _WS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if time.monotonic() - last_seen >= 1.5 * _WS_HEARTBEAT:
+                        await websocket.close(code=1001, reason="heartbeat timeout")
+                        return
+                    await _ws_send(websocket, {"type": "ping"})
+                    continue
+                last_seen = time.monotonic()
+                try:
+                    message = json.loads(text)
+                    kind = message.get("type")
+                    if kind == "ping":
+                        await _ws_send(websocket, {"type": "pong"})
+                    elif kind == "pong":
+                        pass
+                    elif kind == "start":
+                        drill = await _ws_start(websocket, message)
+                        await _ws_send(websocket, await _ws_deal(websocket, drill))
+                    elif kind == "answer":
+                        if drill is None or drill.current is None:
+                            raise HTTPException(status_code=400, detail="No hand to answer, send start first")
+                        await _ws_send(websocket, {"type": "result", **_ws_grade(websocket, drill, message)})
+                        drill.current = None
+                        await _ws_send(websocket, await _ws_deal(websocket, drill))
+                    else:
+                        raise HTTPException(status_code=400, detail=f"Unknown message type: {kind}")
+                except HTTPException as e:
+                    await _ws_send(websocket, {"type": "error", "status": e.status_code, "detail": e.detail})
+                except (ValueError, AttributeError, KeyError):
+                    await _ws_send(websocket, {"type": "error", "status": 400, "detail": "Malformed message"})
+                except (WebSocketDisconnect, asyncio.TimeoutError):
+                    raise
+                except Exception as e:  # e.g. BrokenProcessPool: report it, keep the drill's socket open
+                    print(f"Error in /ws/practice: {e!r}")
+                    await _ws_send(websocket, {"type": "error", "status": 500, "detail": "Erreur interne"})
+        except WebSocketDisconnect:
+            return
+        except asyncio.TimeoutError:
+            # Backpressure: the client stopped reading; drop it rather than buffer
+            await websocket.close(code=1013, reason="client too slow")
 
     # ── Eval mode ──────────────────────────────────────────────────────────────
 
     @app.get("/api/eval/stack-depths/{position}")
-    def eval_stack_depths(position: str):
-        return _range_manager.get_eval_stack_depths(position)
+    def eval_stack_depths(position: str, request: Request):
+        ranges = _ranges_for(request)
+        return _cached_json(request, ranges, ("eval-stack-depths", position),
+                            lambda: ranges.get_eval_stack_depths(position))
 
     @app.post("/api/eval/start")
     def eval_start(body: EvalStartRequest, request: Request):
-        combos = []
+        catalog = _ranges_for(request).eval_catalog
+        group_ids = []
+        total_scenarios = 0
         for pos in body.positions:
             for depth in body.stack_depths:
-                scenarios = _range_manager.get_eval_scenarios(pos, depth)
-                if scenarios:
-                    combos.append({"position": pos, "stack_depth": depth, "scenario_count": len(scenarios)})
-        if not combos:
+                group_id = catalog.group_id(pos, depth)
+                if group_id is not None and catalog.group(group_id):
+                    group_ids.append(group_id)
+                    total_scenarios += len(catalog.group(group_id))
+        if not group_ids:
             raise HTTPException(status_code=404, detail="Aucun scénario disponible")
-        request.session["eval_config"] = {"combos": combos}
-        total_scenarios = sum(c["scenario_count"] for c in combos)
+        # Only compact catalog ids go into the session
+        request.session["eval_config"] = {"catalog": catalog.token, "groups": group_ids}
         return {"success": True, "scenario_count": total_scenarios}
 
     @app.get("/api/eval/next-hand")
-    def eval_next_hand(request: Request):
+    def eval_next_hand(request: Request, weighted: bool = False, adaptive: bool = False):
         config = request.session.get("eval_config")
         if config is None:
             raise HTTPException(status_code=400, detail="No active eval session")
-        combo = random.choice(config["combos"])
-        scenarios = _range_manager.get_eval_scenarios(combo["position"], combo["stack_depth"])
-        if not scenarios:
+        catalog = _ranges_for(request).eval_catalog
+        if config.get("catalog") != catalog.token:
+            # The range library's positions or depths changed since eval/start
+            raise HTTPException(status_code=400, detail="Eval session out of date, restart it")
+        scenario = catalog.sample(config["groups"])
+        if scenario is None:
             raise HTTPException(status_code=400, detail="No scenarios available")
-        scenario = random.choice(scenarios)
-
-        scenario_range = _range_manager.get_range(
-            combo['position'], scenario['action'], combo['stack_depth']
-        ) or {}
-
-        hand = None
-        parent_open = scenario.get('parent_open')
-        if parent_open:
-            parent_pos, parent_action = parent_open
-            parent_range = _range_manager.get_range(parent_pos, parent_action, combo['stack_depth'])
-            if parent_range:
-                opened_hands = [h for h, act in parent_range.items() if act != 'fold']
-                if opened_hands:
-                    hand = pick_boundary_hand(scenario_range, opened_hands)
-        if hand is None:
-            hand = pick_boundary_hand(scenario_range, _all_hands)
 
-        return {
+        if scenario.boundary is not None:
+            spot = f"eval/{scenario.position}/{scenario.action}@{scenario.stack_depth}"
+            hand = _pick_boundary(request, spot, scenario.boundary, weighted, adaptive)
+        else:
+            hand = random.choice(_all_hands)
+
+        return FastJSONResponse({
             "hand": str(hand),
-            "position":           combo["position"],
-            "stack_depth":        combo["stack_depth"],
-            "scenario_action":    scenario["action"],
-            "scenario_label":     scenario["label"],
-            "available_actions":  scenario["available_actions"],
-        }
+            "position":           scenario.position,
+            "stack_depth":        scenario.stack_depth,
+            "scenario_action":    scenario.action,
+            "scenario_label":     scenario.label,
+            "available_actions":  list(scenario.available_actions),
+        })
 
     @app.post("/api/eval/check-answer")
     def eval_check_answer(body: EvalCheckRequest, request: Request):
         if request.session.get("eval_config") is None:
             raise HTTPException(status_code=400, detail="No active eval session")
-        current_range = _range_manager.get_range(
+        compiled = _ranges_for(request).get_compiled_range(
             body.position, body.scenario_action, body.stack_depth
         )
-        if current_range is None:
+        if compiled is None:
             raise HTTPException(status_code=400, detail="Range not found")
-
         hand = Hand(body.hand)
-        actual_action = current_range.get(hand, "fold")
-        is_correct = body.user_action == actual_action
-
-        response = {
-            "correct":      is_correct,
-            "actual_action": actual_action,
-            "user_action":  body.user_action,
-        }
-        if actual_action != "fold":
-            specific = [h for h, act in current_range.items() if act == actual_action]
-            bottom = find_bottom_of_range_category(hand, specific)
-            if bottom:
-                response["bottom_of_range"] = str(bottom)
-        if not is_correct and actual_action == "fold":
-            closest = find_closest_hand_in_range(hand, set(current_range.keys()))
-            if closest:
-                response["closest_hand"] = str(closest)
-        return response
-
-    @app.get("/api/range-matrix")
-    def get_range_matrix(position: str, action: str, stack_depth: str):
-        range_data = _range_manager.get_range(position, action, stack_depth)
-        if range_data is None:
+        result = _grade_answer(compiled, hand, body.user_action)
+        _record_answer(_answer_user(request), "eval", f"{body.position}/{body.scenario_action}@{body.stack_depth}",
+                       hand, None, result["correct"])
+        return FastJSONResponse(result)
+
+    @app.get("/api/stats")
+    async def get_stats(request: Request, dimension: Optional[str] = None):
+        """Accuracy of the caller's answers, overall and by scenario, hand and texture."""
+        if dimension is not None and dimension not in STATS_DIMENSIONS:
+            raise HTTPException(status_code=400, detail=f"dimension must be one of {', '.join(STATS_DIMENSIONS)}")
+        return _answer_log.stats.summary(_answer_user(request), dimension)
+
+    @app.get("/metrics")
+    async def get_metrics():
+        return Response(metrics.exposition(), media_type=metrics.CONTENT_TYPE)
+
+    @app.get("/api/range-cache")
+    async def get_range_cache_stats():
+        return _range_manager.cache_stats()
+
+    @app.put("/api/ranges/{position}/{action}/{stack_depth}")
+    def put_user_range(position: str, action: str, stack_depth: str, body: RangeWriteRequest, request: Request):
+        _range_user(request)
+        try:
+            # Validated before a claim, so a rejected range does not swallow the new token
+            _tenant_ranges.check_range(position, body.range)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        user, token = _range_writer(request, claim=True)
+        compiled = _tenant_ranges.put_range(user, position, action, stack_depth, body.range)
+        result = {"success": True, "available_actions": list(compiled.actions)}
+        if token is not None:
+            result["token"] = token
+        return result
+
+    @app.delete("/api/ranges/{position}/{action}/{stack_depth}")
+    def delete_user_range(position: str, action: str, stack_depth: str, request: Request):
+        user, _ = _range_writer(request)
+        if not _tenant_ranges.delete_range(user, position, action, stack_depth):
             raise HTTPException(status_code=404, detail="Range not found")
-        available_actions = _range_manager.get_available_range_actions(position, action, stack_depth)
-        result = {str(h): range_data.get(h, "fold") for h in _all_hands}
-        return {"range": result, "available_actions": available_actions}
-
-    # Static files mounted last so API routes take precedence
-    app.mount("/", StaticFiles(directory=str(_base_dir / "static"), html=True), name="static")
+        return {"success": True}
 
+    @app.get("/api/range-matrix")
+    def get_range_matrix(request: Request, position: str, action: str, stack_depth: str, format: str = "matrix"):
+        ranges = _ranges_for(request)
+        # Cached on the node: a shard evicted from the range cache takes its bodies along
+        compiled = ranges.get_compiled_range(position, action, stack_depth)
+        return _cached_json(request, ranges, ("range-matrix", position, action, stack_depth, format),
+                            lambda: _range_matrix(ranges, position, action, stack_depth, format),
+                            compiled.responses if compiled is not None else None)
+
+    # Static files mounted last so API routes take precedence. Built assets
+    # (poker-practice-build-assets) are served from memory, precompressed, as
+    # long as they were built from the current static/ sources.
+    dist_dir = Path(os.environ.get("STATIC_DIST", str(DIST_DIR)))
+    if (dist_dir / "index.html").is_file() and is_fresh(dist_dir, STATIC_DIR):
+        app.mount("/", StaticAssets(dist_dir), name="static")
+    else:
+        if (dist_dir / "index.html").is_file():
+            print(f"Warning: {dist_dir} was built from other static sources, serving {STATIC_DIR} as is "
+                  "(re-run poker-practice-build-assets)")
+        app.mount("/", StaticFiles(directory=str(STATIC_DIR), html=True), name="static")
+
+    metrics.instrument_routes(app.router.routes)
     return app
 
 
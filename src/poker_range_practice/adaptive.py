@@ -0,0 +1,192 @@
+"""
+Adaptive hand selection: draw the hands a user keeps getting wrong more often.
+
+Each (user, spot) has an AdaptiveSampler over the 169 hand classes, the user
+being the caller's session id (never a client-supplied name). A hand's
+weight is its base weight in the spot's pool (boundary hands, combo counts...)
+scaled up by the user's error rate on it:
+
+    weight = base * (1 + ERROR_BOOST * error)
+
+`error` is an exponential moving average of the hand's misses, and it fades
+with every later answer in the spot (half-life HALF_LIFE answers), so recent
+mistakes count most and old ones are forgotten. Both terms live in Fenwick
+trees, so an answer updates one entry in O(log 169) and a draw is one prefix
+search; the global fading is a shared scale factor rather than a rewrite.
+"""
+import random
+import threading
+from collections import OrderedDict
+
+from .poker_hands import Hand
+
+ERROR_BOOST = 4.0   # a hand always answered wrong is drawn 5x as often as its base weight
+ERROR_ALPHA = 0.35  # weight of the latest answer in a hand's error average
+HALF_LIFE = 150     # answers in the spot after which an error counts half
+_RESCALE_AT = 1e12  # fold the fading scale back into the entries past this growth
+
+
+class FenwickTree:
+    """Binary indexed tree of non-negative weights: point updates and weighted draws in O(log n)."""
+
+    __slots__ = ('size', '_values', '_tree', '_top')
+
+    def __init__(self, values):
+        self.size = len(values)
+        self._values = [float(v) for v in values]
+        tree = [0.0] + self._values
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def __getitem__(self, index) -> float:
+        return self._values[index]
+
+    def add(self, index, delta):
+        self._values[index] += delta
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def set(self, index, value):
+        self.add(index, value - self._values[index])
+
+    def total(self) -> float:
+        total = 0.0
+        i = self.size
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, target) -> int:
+        """Smallest index whose prefix sum exceeds `target` (0 <= target < total)."""
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        # Rounding drift in the inner sums can land on a zero-weight entry (or past
+        # the end): take the nearest drawable entry before it, else after it
+        pos = min(pos, self.size - 1)
+        if self._values[pos] > 0:
+            return pos
+        for i in range(pos - 1, -1, -1):
+            if self._values[i] > 0:
+                return i
+        for i in range(pos + 1, self.size):
+            if self._values[i] > 0:
+                return i
+        raise ValueError("No entry has a positive weight")
+
+
+class AdaptiveSampler:
+    """Error-weighted draws over the hand classes of one user's spot."""
+
+    def __init__(self, base_weights, source=None):
+        self._growth = 2 ** (1 / HALF_LIFE)
+        self._scale = 1.0            # growth ** answers since the last rescale
+        self._errors = [0.0] * 169   # error averages, stored times the scale at their last update
+        self._base: FenwickTree | None = None
+        self._boost: FenwickTree | None = None
+        self.answers = 0
+        self.rebase(base_weights, source)
+
+    def rebase(self, base_weights, source=None):
+        """Switch to a new pool (e.g. the range was edited), keeping the error history."""
+        self.source = source
+        self._base = FenwickTree(base_weights)
+        self._boost = FenwickTree([w * e for w, e in zip(base_weights, self._errors)])
+
+    def pick(self, rng=random) -> Hand:
+        base_total = self._base.total()
+        boost_total = self._boost.total() * ERROR_BOOST / self._scale
+        target = rng.random() * (base_total + boost_total)
+        if target < base_total or boost_total <= 0:
+            return Hand.from_index(self._base.find(target))
+        return Hand.from_index(self._boost.find((target - base_total) * self._scale / ERROR_BOOST))
+
+    def error(self, hand: Hand) -> float:
+        """Current (faded) error average of a hand."""
+        return self._errors[hand.index] / self._scale
+
+    def observe(self, hand: Hand, correct: bool):
+        """Fold one answer into the hand's error average: O(log 169)."""
+        self.answers += 1
+        self._scale *= self._growth
+        if self._scale > _RESCALE_AT:
+            self._rescale()
+        i = hand.index
+        error = self._errors[i] / self._scale
+        error += ERROR_ALPHA * ((not correct) - error)
+        self._errors[i] = error * self._scale
+        self._boost.set(i, self._base[i] * self._errors[i])
+
+    def _rescale(self):
+        self._errors = [e / self._scale for e in self._errors]
+        self._scale = 1.0
+        self._boost = FenwickTree([self._base[i] * e for i, e in enumerate(self._errors)])
+
+
+def pool_weights(hands) -> list[float]:
+    """Base weights from a sequence of hands, repeats counting once each."""
+    weights = [0.0] * 169
+    for hand in hands:
+        weights[hand.index] += 1
+    return weights
+
+
+def combo_weights(combos) -> list[float]:
+    """Base weights from a ComboRange: each class weighted by its combo count."""
+    weights = [0.0] * 169
+    for hand, count in combos.counts_by_hand().items():
+        weights[hand.index] = float(count)
+    return weights
+
+
+class AdaptiveSamplers:
+    """
+    The samplers of every (user, spot) seen by this process; least recently used
+    dropped past `max_samplers`.
+    """
+
+    def __init__(self, max_samplers=4096):
+        self.max_samplers = max_samplers
+        self._samplers: OrderedDict[tuple[str, str], AdaptiveSampler] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pick(self, user, spot, source, base_weights, rng=random) -> Hand:
+        """
+        Draw a hand for the user's spot. `source` identifies the pool (compared
+        with `is`); `base_weights()` builds its weights, only when the pool is
+        new to this sampler.
+        """
+        key = (user, spot)
+        with self._lock:
+            sampler = self._samplers.get(key)
+            if sampler is None:
+                sampler = self._samplers[key] = AdaptiveSampler(base_weights(), source)
+                while len(self._samplers) > self.max_samplers:
+                    self._samplers.popitem(last=False)
+            else:
+                self._samplers.move_to_end(key)
+                if sampler.source is not source:
+                    sampler.rebase(base_weights(), source)
+            return sampler.pick(rng)
+
+    def observe(self, user, spot, hand: Hand, correct: bool):
+        """Record an answer; ignored for spots the user never drew adaptively."""
+        with self._lock:
+            sampler = self._samplers.get((user, spot))
+            if sampler is not None:
+                sampler.observe(hand, correct)
+
+    def __len__(self):
+        return len(self._samplers)
@@ -0,0 +1,245 @@
+"""
+Append-only log of graded answers, with counters maintained as answers arrive.
+
+Every check endpoint records (time, user, kind, scenario, hand, texture, correct).
+Recording only updates in-memory counters and queues the record: a background
+thread appends queued records to the log file in batches, so grading never waits
+on disk. Counters per user are kept for every scenario, hand and texture (and
+overall), so accuracy queries cost the same however long the history is.
+At startup the log is replayed to rebuild the counters. Only the most recently
+active `max_users` keep their counters in memory: a user evicted for being idle
+starts again from zero until the next restart replays the log.
+
+A log has a single writer: the writer holds an exclusive lock on the file, and
+a second process starting on the same log fails, since its counters would never
+see the other process's answers. Run one worker per log.
+
+A failed append (disk full...) keeps the unwritten bytes and writes them first
+on the next flush, so the log catches up with the counters; only past
+`max_retry_bytes` are the oldest answers dropped, and counted in a metric.
+
+Log lines are compact JSON arrays: [ts, user, kind, scenario, hand, texture, correct].
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .metrics import ANSWER_LOG_DROPPED, ANSWER_LOG_WRITE_ERRORS
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: the single writer is not enforced there
+    fcntl = None
+
+DIMENSIONS = ("scenario", "hand", "texture")
+
+
+class Counter:
+    """Correct/total answers for one key."""
+
+    __slots__ = ('correct', 'total')
+
+    def __init__(self):
+        self.correct = 0
+        self.total = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "correct": self.correct,
+            "total": self.total,
+            "accuracy": round(self.correct / self.total, 4) if self.total else None,
+        }
+
+
+class AnswerStats:
+    """
+    Counters per user: overall, and by scenario, hand and texture. The least
+    recently active users are dropped past `max_users`.
+    """
+
+    def __init__(self, max_users=10000):
+        # user -> dimension -> key -> Counter; "all" holds the user's overall counter
+        self._users: OrderedDict[str, dict[str, dict[str, Counter]]] = OrderedDict()
+        self.max_users = max_users
+        self._lock = threading.Lock()
+
+    def add(self, user, kind, scenario, hand, texture, correct):
+        keys = {"all": "all", "scenario": f"{kind}/{scenario}", "hand": hand,
+                "texture": f"{kind}/{texture}" if texture else None}
+        with self._lock:
+            dims = self._users.get(user)
+            if dims is None:
+                dims = self._users[user] = {"all": {}, **{d: {} for d in DIMENSIONS}}
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(user)
+            for dimension, key in keys.items():
+                if key is None:
+                    continue
+                counter = dims[dimension].get(key)
+                if counter is None:
+                    counter = dims[dimension][key] = Counter()
+                counter.total += 1
+                counter.correct += bool(correct)
+
+    def get(self, user, dimension, key) -> dict:
+        """One counter, e.g. get(user, "scenario", "preflop/BTN/open@20bb")."""
+        with self._lock:
+            counter = self._users.get(user, {}).get(dimension, {}).get(key)
+        return counter.as_dict() if counter is not None else Counter().as_dict()
+
+    def summary(self, user, dimension=None) -> dict:
+        """A user's counters: {dimension: {key: counts}}, or one dimension's {key: counts}."""
+        with self._lock:
+            dims = self._users.get(user, {})
+            if dimension is not None:
+                return {key: c.as_dict() for key, c in dims.get(dimension, {}).items()}
+            overall = dims.get("all", {}).get("all", Counter())
+            return {
+                "overall": overall.as_dict(),
+                **{d: {key: c.as_dict() for key, c in dims.get(d, {}).items()} for d in DIMENSIONS},
+            }
+
+
+class AnswerLog:
+    """
+    Records graded answers into AnswerStats and, when `path` is set, appends
+    them to the log file from a background writer thread.
+    """
+
+    def __init__(self, path=None, flush_interval=0.5, batch_size=512, max_users=10000,
+                 max_retry_bytes=16 * 1024 * 1024):
+        self.path = Path(path) if path else None
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_retry_bytes = max_retry_bytes
+        self.stats = AnswerStats(max_users)
+        self.written = 0
+        self._file = None  # held open (and locked) while the writer runs
+        self._pending: list[list] = []
+        self._unwritten = b""  # tail of a failed append, written first by the next flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer: threading.Thread | None = None
+        if self.path is not None:
+            self._replay()
+
+    def _replay(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    _, user, kind, scenario, hand, texture, correct = json.loads(line)
+                except ValueError:
+                    continue  # torn final line after a crash
+                self.stats.add(user, kind, scenario, hand, texture, correct)
+
+    def record(self, user, kind, scenario, hand=None, texture=None, correct=False):
+        """Count one graded answer and queue it for the log. Never touches the disk."""
+        self.stats.add(user, kind, scenario, hand, texture, correct)
+        if self.path is None:
+            return
+        with self._lock:
+            self._pending.append([round(time.time(), 3), user, kind, scenario, hand, texture, bool(correct)])
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Append every queued record to the log file in one write. On OSError the
+        unwritten bytes are kept for the next flush and the error is raised.
+        """
+        if self.path is None:
+            return
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            data = self._unwritten + "".join(
+                json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in batch
+            ).encode("utf-8")
+            self._unwritten = b""
+            if not data:
+                return
+            f = self._file
+            view = memoryview(data)
+            done = 0
+            try:
+                if f is None:
+                    f = open(self.path, "ab", buffering=0)
+                while done < len(data):
+                    done += f.write(view[done:])
+            except OSError:
+                ANSWER_LOG_WRITE_ERRORS.inc()
+                self._keep_unwritten(data[done:])
+                raise
+            finally:
+                self.written += data.count(b"\n", 0, done)
+                if f is not None and f is not self._file:
+                    f.close()
+
+    def _keep_unwritten(self, data: bytes):
+        # The first record may be half on disk already: it is always kept, so its line gets completed
+        first = data.find(b"\n") + 1
+        head, rest = data[:first], data[first:]
+        excess = len(data) - self.max_retry_bytes
+        if excess > 0:
+            # Then drop whole records, the oldest first
+            cut = rest.find(b"\n", excess - 1) + 1 or len(rest)
+            ANSWER_LOG_DROPPED.inc(rest.count(b"\n", 0, cut))
+            rest = rest[cut:]
+        self._unwritten = head + rest
+
+    def _open(self):
+        """Open the log for appending and take its writer lock; RuntimeError if another process holds it."""
+        f = open(self.path, "ab", buffering=0)
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                raise RuntimeError(
+                    f"Answer log {self.path} is already written by another process: "
+                    "run a single worker, or give each its own ANSWER_LOG"
+                ) from None
+        self._file = f
+
+    def start(self):
+        """Start the background writer (no-op without a log file)."""
+        if self.path is None or (self._writer is not None and self._writer.is_alive()):
+            return
+        if self._file is None:
+            self._open()
+        self._stop.clear()
+
+        def write_loop():
+            while not self._stop.is_set():
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except OSError as e:  # keep the writer alive; the unwritten records are retried
+                    print(f"Error writing answer log: {e}")
+
+        self._writer = threading.Thread(target=write_loop, name="answer-log-writer", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        """Stop the writer and flush what is left."""
+        self._stop.set()
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+            self._writer = None
+        try:
+            self.flush()
+        finally:
+            if self._file is not None:
+                self._file.close()  # releases the writer lock
+                self._file = None
@@ -0,0 +1,371 @@
+"""
+Static asset pipeline: fingerprinted, minified, precompressed copies of static/.
+
+`poker-practice-build-assets` writes every asset of static/ to static_dist/
+under a content-hashed name (app.js -> app.3f2a9c1b.js), with .gz and, when the
+optional `brotli` package is installed, .br siblings, and rewrites index.html to
+reference the hashed names. StaticAssets serves such a directory from memory,
+picking the precompressed variant from Accept-Encoding; hashed files are cached
+by browsers as immutable.
+
+The build also records a hash of every source file; is_fresh tells whether a
+built directory still matches static/, so the app never serves a stale build
+over edited sources.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are built without it
+    brotli = None
+
+STATIC_DIR = Path(__file__).parent / "static"
+DIST_DIR = Path(__file__).parent / "static_dist"
+MANIFEST_FILE = "manifest.json"
+SOURCES_FILE = "sources.json"
+
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+_IMMUTABLE = "public, max-age=31536000, immutable"
+_REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = re.compile(r"(?:^|[^\w$])(?:return|typeof|case|do|else|in|of|void|delete|new|throw)$")
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header value accepts `coding`: `q=0` refuses it, `*` covers unlisted codings."""
+    wildcard = False
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name == coding:
+            return q > 0
+        if name == "*":
+            wildcard = q > 0
+    return wildcard
+
+
+def _skip_string(src, i) -> int:
+    """Index just past the quoted string starting at src[i]."""
+    quote = src[i]
+    i += 1
+    while src[i] != quote:
+        i += 2 if src[i] == "\\" else 1
+    return i + 1
+
+
+def _skip_template(src, i) -> int:
+    """Index just past the template literal starting at src[i], ${...} included."""
+    i += 1
+    while src[i] != "`":
+        if src[i] == "\\":
+            i += 2
+        elif src.startswith("${", i):
+            i += 2
+            depth = 1
+            while depth:
+                c = src[i]
+                if c in "'\"":
+                    i = _skip_string(src, i)
+                    continue
+                if c == "`":
+                    i = _skip_template(src, i)
+                    continue
+                depth += (c == "{") - (c == "}")
+                i += 1
+        else:
+            i += 1
+    return i + 1
+
+
+def _skip_regex(src, i) -> int:
+    """Index just past the regex literal (flags included) starting at src[i]."""
+    i += 1
+    in_class = False
+    while in_class or src[i] != "/":
+        if src[i] == "\\":
+            i += 1
+        elif src[i] == "[":
+            in_class = True
+        elif src[i] == "]":
+            in_class = False
+        i += 1
+    i += 1
+    while i < len(src) and src[i].isalpha():
+        i += 1
+    return i
+
+
+def minify_js(src: str) -> str:
+    """
+    Conservative JavaScript minifier: drops comments, indentation and blank
+    lines and the spaces around punctuation. Strings, template literals and
+    regex literals are copied untouched, and line breaks that could matter for
+    automatic semicolon insertion are kept.
+    """
+    out: list[str] = []
+    prev = ""  # last emitted character
+    space = newline = False
+    i, n = 0, len(src)
+    while i < n:
+        c = src[i]
+        if c in " \t\r":
+            space = True
+            i += 1
+            continue
+        if c == "\n":
+            newline = True
+            i += 1
+            continue
+        if src.startswith("//", i):
+            end = src.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if src.startswith("/*", i):
+            i = src.index("*/", i + 2) + 2
+            space = True
+            continue
+
+        if newline and prev and prev not in "{;,([" and c not in ")]}":
+            out.append("\n")
+        elif (space or newline) and prev and prev not in "{}()[];,:=<>?!&|*%^~" \
+                and c not in "{}()[];,:=<>?!&|*%^~":
+            out.append(" ")
+        space = newline = False
+
+        if c in "'\"":
+            end = _skip_string(src, i)
+        elif c == "`":
+            end = _skip_template(src, i)
+        elif c == "/" and (not prev or prev in _REGEX_PREFIX
+                           or _REGEX_KEYWORDS.search("".join(out[-12:]).rstrip())):
+            end = _skip_regex(src, i)
+        else:
+            end = i + 1
+        out.append(src[i:end])
+        prev = src[end - 1]
+        i = end
+    return "".join(out) + "\n"
+
+
+def minify_css(src: str) -> str:
+    """CSS minifier: drops comments and collapses whitespace outside strings."""
+    out: list[str] = []
+    space = False
+    i, n = 0, len(src)
+    while i < n:
+        c = src[i]
+        if c.isspace():
+            space = True
+            i += 1
+            continue
+        if src.startswith("/*", i):
+            i = src.index("*/", i + 2) + 2
+            space = True
+            continue
+        prev = out[-1][-1] if out else ""
+        if c == "}" and prev == ";":
+            out[-1] = out[-1][:-1]
+        elif space and prev and prev not in "{};,>:" and c not in "{};,>":
+            out.append(" ")
+        space = False
+        end = _skip_string(src, i) if c in "'\"" else i + 1
+        out.append(src[i:end])
+        i = end
+    return "".join(out) + "\n"
+
+
+_MINIFIERS = {".js": minify_js, ".css": minify_css}
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    """app.js -> app.<10 hex chars of the content hash>.js"""
+    stem, dot, suffix = name.rpartition(".")
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}.{suffix}"
+
+
+def _compressed_variants(data: bytes) -> dict[str, bytes]:
+    variants = {"gzip": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return variants
+
+
+def build_assets(source=STATIC_DIR, output=DIST_DIR) -> dict[str, str]:
+    """
+    Build `output` from `source`: every asset minified (js, css), written under a
+    fingerprinted name with precompressed siblings; index.html rewritten to the
+    new names. Returns the {original name: fingerprinted name} manifest.
+    """
+    source, output = Path(source), Path(output)
+    if output.exists():
+        shutil.rmtree(output)
+    output.mkdir(parents=True)
+
+    manifest = {}
+    for path in sorted(source.iterdir()):
+        if not path.is_file() or path.name == "index.html":
+            continue
+        data = path.read_bytes()
+        minify = _MINIFIERS.get(path.suffix)
+        if minify is not None:
+            data = minify(data.decode("utf-8")).encode("utf-8")
+        name = fingerprint(path.name, data)
+        _write_asset(output / name, data)
+        manifest[path.name] = name
+
+    index = (source / "index.html").read_text("utf-8")
+    for original, name in manifest.items():
+        index = re.sub(rf'(\b(?:href|src)=["\']){re.escape(original)}(["\'])', rf"\g<1>{name}\g<2>", index)
+    _write_asset(output / "index.html", index.encode("utf-8"))
+    (output / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    (output / SOURCES_FILE).write_text(json.dumps(_source_hashes(source), indent=2))
+    return manifest
+
+
+def _source_hashes(source: Path) -> dict[str, str]:
+    return {
+        path.name: hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted(source.iterdir()) if path.is_file()
+    }
+
+
+def is_fresh(output=DIST_DIR, source=STATIC_DIR) -> bool:
+    """True when `output` holds a build of the current contents of `source`."""
+    try:
+        built = json.loads((Path(output) / SOURCES_FILE).read_text())
+    except (OSError, ValueError):
+        return False
+    return built == _source_hashes(Path(source))
+
+
+def _write_asset(path: Path, data: bytes):
+    path.write_bytes(data)
+    for encoding, compressed in _compressed_variants(data).items():
+        if len(compressed) < len(data):
+            path.with_name(path.name + (".gz" if encoding == "gzip" else ".br")).write_bytes(compressed)
+
+
+class _Asset:
+    __slots__ = ('media_type', 'variants', 'etags', 'cache_control')
+
+    def __init__(self, media_type, variants, etags, cache_control):
+        self.media_type = media_type
+        self.variants = variants  # {content-encoding or "": body}
+        self.etags = etags  # {content-encoding or "": strong ETag}, one per variant
+        self.cache_control = cache_control
+
+
+class StaticAssets:
+    """
+    ASGI app serving a built asset directory from memory.
+
+    Every file and its .gz/.br siblings are read once at startup. Responses carry
+    the best variant the client accepts (br, then gzip), a strong ETag of their
+    own (a strong validator differs between content codings), and immutable
+    caching for fingerprinted names; index.html is revalidated.
+    """
+
+    def __init__(self, directory=DIST_DIR):
+        self.directory = Path(directory)
+        self.assets: dict[str, _Asset] = {}
+        for path in sorted(self.directory.iterdir()):
+            if not path.is_file() or path.suffix in (".gz", ".br") or path.name in (MANIFEST_FILE, SOURCES_FILE):
+                continue
+            body = path.read_bytes()
+            variants = {"": body}
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                compressed = path.with_name(path.name + suffix)
+                if compressed.is_file():
+                    variants[encoding] = compressed.read_bytes()
+            media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            if media_type.startswith("text/") or media_type in ("application/javascript", "image/svg+xml"):
+                media_type += "; charset=utf-8"
+            digest = hashlib.sha256(body).hexdigest()[:32]
+            etags = {encoding: f'"{digest}-{encoding}"' if encoding else f'"{digest}"' for encoding in variants}
+            cache_control = _IMMUTABLE if _FINGERPRINTED.search(path.name) else "no-cache"
+            self.assets[path.name] = _Asset(media_type, variants, etags, cache_control)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            # Unknown WebSocket paths fall through to the "/" mount: refuse them
+            await send({"type": "websocket.close", "code": 1000})
+            return
+        assert scope["type"] == "http"
+        path = scope["path"].lstrip("/") or "index.html"
+        asset = self.assets.get(path)
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            status = 404 if asset is None else 405
+            await send({"type": "http.response.start", "status": status,
+                        "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+            await send({"type": "http.response.body", "body": b"Not Found" if status == 404 else b"Method Not Allowed"})
+            return
+
+        headers = {}
+        for key, value in scope["headers"]:
+            if key in (b"accept-encoding", b"if-none-match"):
+                headers[key] = value.decode("latin-1")
+        accepted = headers.get(b"accept-encoding", "")
+        encoding = ""
+        for candidate in ("br", "gzip"):
+            if candidate in asset.variants and accepts_encoding(accepted, candidate):
+                encoding = candidate
+                break
+        etag = asset.etags[encoding]
+        response_headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", asset.cache_control.encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if_none_match = headers.get(b"if-none-match")
+        if if_none_match:
+            tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+            if etag in tags or "*" in tags:
+                await send({"type": "http.response.start", "status": 304, "headers": response_headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        body = asset.variants[encoding]
+        response_headers.append((b"content-type", asset.media_type.encode()))
+        response_headers.append((b"content-length", str(len(body)).encode()))
+        if encoding:
+            response_headers.append((b"content-encoding", encoding.encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body if scope["method"] == "GET" else b""})
+
+
+def main(argv=None):
+    """Entry point for `poker-practice-build-assets`."""
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed static assets.")
+    parser.add_argument("--source", type=Path, default=STATIC_DIR, help="static source directory")
+    parser.add_argument("-o", "--output", type=Path, default=DIST_DIR, help="output directory")
+    args = parser.parse_args(argv)
+
+    manifest = build_assets(args.source, args.output)
+    for original, name in manifest.items():
+        size = (args.source / original).stat().st_size
+        built = (args.output / name).stat().st_size
+        compressed = [
+            f"{suffix[1:]} {(args.output / (name + suffix)).stat().st_size:,}"
+            for suffix in (".gz", ".br") if (args.output / (name + suffix)).is_file()
+        ]
+        print(f"{original} -> {name}: {size:,} -> {built:,} bytes" + (f" ({', '.join(compressed)})" if compressed else ""))
+    if brotli is None:
+        print("brotli not installed: only gzip variants were written")
+
+
+if __name__ == "__main__":
+    main()
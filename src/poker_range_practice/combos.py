@@ -0,0 +1,138 @@
+"""
+Combo-level ranges: the 1326 concrete two-card starting hands as a bitmask.
+
+Cards are (rank, suit) tuples using the same symbols as the web app, e.g. ('A', '♠').
+Bit i of a ComboRange mask is COMBOS[i]; every card and every one of the 169 hand
+classes has a precomputed mask, so dead-card removal and per-class counts are a
+handful of big-integer operations instead of Python loops over combos.
+"""
+import random
+from itertools import combinations
+
+from .poker_hands import Hand
+
+SUITS = ['♠', '♥', '♦', '♣']
+CARDS = [(rank, suit) for rank in Hand.RANKS for suit in SUITS]
+_CARD_INDEX = {card: i for i, card in enumerate(CARDS)}
+
+COMBOS: list[tuple[tuple[str, str], tuple[str, str]]] = []
+COMBO_HANDS: list[Hand] = []
+_CARD_MASKS = [0] * len(CARDS)
+_CLASS_MASKS = [0] * 169
+
+for _i, (_c1, _c2) in enumerate(combinations(CARDS, 2)):
+    # Higher rank first, so ('A', '♠'), ('K', '♠') reads like "AKs"
+    _hi, _lo = (_c2, _c1) if Hand.RANK_VALUES[_c2[0]] > Hand.RANK_VALUES[_c1[0]] else (_c1, _c2)
+    if _hi[0] == _lo[0]:
+        _hand = Hand(_hi[0] + _lo[0])
+    else:
+        _hand = Hand(_hi[0] + _lo[0] + ('s' if _hi[1] == _lo[1] else 'o'))
+    COMBOS.append((_hi, _lo))
+    COMBO_HANDS.append(_hand)
+    _CARD_MASKS[_CARD_INDEX[_c1]] |= 1 << _i
+    _CARD_MASKS[_CARD_INDEX[_c2]] |= 1 << _i
+    _CLASS_MASKS[_hand.index] |= 1 << _i
+del _i, _c1, _c2, _hi, _lo, _hand
+
+_COMBO_INDEX = {combo: i for i, combo in enumerate(COMBOS)}
+_COMBO_INDEX.update({(c2, c1): i for i, (c1, c2) in enumerate(COMBOS)})
+
+
+def combo_hand(combo) -> Hand:
+    """Hand class of a combo, e.g. (('A', '♠'), ('K', '♠')) -> Hand('AKs')."""
+    return COMBO_HANDS[_COMBO_INDEX[tuple(map(tuple, combo))]]
+
+
+def dead_card_mask(cards) -> int:
+    """Mask of every combo that uses at least one of `cards`."""
+    mask = 0
+    for card in cards:
+        mask |= _CARD_MASKS[_CARD_INDEX[tuple(card)]]
+    return mask
+
+
+class ComboRange:
+    """A set of concrete combos stored as a 1326-bit integer mask."""
+
+    __slots__ = ('mask',)
+
+    FULL_MASK = (1 << len(COMBOS)) - 1
+
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    @classmethod
+    def full(cls):
+        """All 1326 combos."""
+        return cls(cls.FULL_MASK)
+
+    @classmethod
+    def from_hands(cls, hands):
+        """Every combo of the given Hand classes (or a RangeBits)."""
+        mask = 0
+        for hand in hands:
+            mask |= _CLASS_MASKS[hand.index]
+        return cls(mask)
+
+    def without_cards(self, cards):
+        """Combos that don't use any of the dead `cards` (board, hero hand...)."""
+        return ComboRange(self.mask & ~dead_card_mask(cards))
+
+    def without_combo(self, combo):
+        """This range minus one combo given as a pair of cards."""
+        return ComboRange(self.mask & ~(1 << _COMBO_INDEX[tuple(map(tuple, combo))]))
+
+    def counts_by_hand(self):
+        """{Hand: live combo count} for every class with at least one combo left."""
+        mask = self.mask
+        counts = {}
+        for index, class_mask in enumerate(_CLASS_MASKS):
+            n = (mask & class_mask).bit_count()
+            if n:
+                counts[Hand.from_index(index)] = n
+        return counts
+
+    def sample(self, rng=random):
+        """Return one combo, uniformly over the combos in range, as (card, card)."""
+        mask = self.mask
+        if not mask:
+            raise ValueError("Cannot sample from an empty combo range")
+        target = rng.randrange(mask.bit_count())
+        # Walk the 169 class masks to find the class holding the target combo,
+        # then the target bit within that class (at most 12 combos).
+        for class_mask in _CLASS_MASKS:
+            live = mask & class_mask
+            n = live.bit_count()
+            if target < n:
+                for _ in range(target):
+                    live &= live - 1
+                return COMBOS[(live & -live).bit_length() - 1]
+            target -= n
+        raise AssertionError("unreachable")
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __contains__(self, combo):
+        return (self.mask >> _COMBO_INDEX[tuple(map(tuple, combo))]) & 1 == 1
+
+    def __iter__(self):
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            yield COMBOS[low.bit_length() - 1]
+            mask ^= low
+
+    def __eq__(self, other):
+        if not isinstance(other, ComboRange):
+            return NotImplemented
+        return self.mask == other.mask
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __repr__(self):
+        return f"ComboRange({len(self)} combos)"
@@ -0,0 +1,72 @@
+"""
+JSON encoding for responses: orjson when installed, compact stdlib json otherwise.
+
+FastJSONResponse renders straight to bytes; endpoints that return it directly
+also skip FastAPI's jsonable_encoder pass. Fragment holds an already encoded
+JSON value (a label, a whole range matrix) that is copied into the output
+as-is: through orjson.Fragment when the installed orjson has it (3.9.10+),
+otherwise by splicing the top-level values of a dict.
+"""
+import json
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+_NATIVE_FRAGMENT = orjson is not None and hasattr(orjson, "Fragment")
+
+
+class Fragment:
+    """A pre-encoded JSON value."""
+
+    __slots__ = ('raw', '_native')
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._native = orjson.Fragment(raw) if _NATIVE_FRAGMENT else None
+
+    @classmethod
+    def of(cls, value) -> "Fragment":
+        return cls(_encode(value))
+
+    def __repr__(self):
+        return f"Fragment({self.raw!r})"
+
+
+def _default(obj):
+    if type(obj) is Fragment:
+        # Nested fragment without orjson.Fragment: decode so it is encoded again
+        return obj._native if obj._native is not None else json.loads(obj.raw)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+if orjson is not None:
+    def _encode(content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def _encode(content) -> bytes:
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+        ).encode("utf-8")
+
+
+def dumps(content) -> bytes:
+    """Encode `content` to compact UTF-8 JSON, copying Fragment values verbatim."""
+    if not _NATIVE_FRAGMENT and type(content) is dict and any(type(v) is Fragment for v in content.values()):
+        return b"{" + b",".join(
+            _encode(str(key)) + b":" + (value.raw if type(value) is Fragment else _encode(value))
+            for key, value in content.items()
+        ) + b"}"
+    return _encode(content)
+
+
+class FastJSONResponse(Response):
+    """JSONResponse rendered with `dumps` (orjson when available)."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from enum import Enum
 from itertools import combinations
 
+from ..metrics import EVALUATE_HAND_CALLS
+
 RANK_VALUES = {
     '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8,
     '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14,
@@ -78,6 +80,7 @@ def _oesd_or_gutshot(cards: list[Card]) -> tuple[bool, bool]:
 
 
 def evaluate_hand(hole: list[Card], board: list[Card]) -> HandStrength:
+    EVALUATE_HAND_CALLS.inc()
     all5 = hole + board
     hv = sorted([c.value for c in hole], reverse=True)
     bv = sorted([c.value for c in board], reverse=True)
@@ -0,0 +1,242 @@
+"""
+CPU-heavy flop work (the BB defense deal) run in a bounded process pool.
+
+A deal evaluates villain combos with get_cbet_recommendation until one cbets;
+on the request threadpool that work holds the GIL and slows every other
+endpoint. FlopPool runs it in worker processes instead, with a cap on queued
+deals (beyond it requests are refused at once), a per-deal timeout and
+queue-depth counters. Workers are spawned at startup and one deal primes the
+evaluators' lookup caches. They hold no range library: each task carries the
+ComboRanges it deals from.
+"""
+import asyncio
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .combos import ComboRange, SUITS, combo_hand
+from .poker_hands import Hand
+from .metrics import EVALUATE_HAND_CALLS
+from .flop import (
+    Card as FlopCard,
+    get_cbet_recommendation,
+    classify_board_vs_bb,
+    BB_TEXTURE_LABELS,
+    BoardTexture,
+)
+
+_ALL_CARDS = [(r, s) for r in Hand.RANKS for s in SUITS]
+
+_VILLAIN_SIZING = {
+    BoardTexture.EXTRA_DRY:      25,
+    BoardTexture.INTERMEDIAIRE:  33,
+    BoardTexture.DRAWY:          50,
+}
+
+
+def deal_bb_defense(bb_combos: ComboRange, villain_combos: ComboRange, villain_position, stack_depth,
+                    stats: dict | None = None) -> dict:
+    """
+    Deal a BB defense spot: BB's hand from `bb_combos` (combo-weighted), a flop,
+    and a villain hand from `villain_combos` that cbets that flop. The deal
+    also reports the villain's range after card removal: its combo count and,
+    per hand class, the combos that BB's cards and the flop leave live.
+
+    When given, `stats` receives the number of villain combos evaluated
+    (`candidates`) and of evaluations that raised (`errors`), and the `fallback`
+    used when none cbets ("combo", "deck" or None).
+    """
+    # Deal BB hand (combo-weighted), then burn + flop from the rest of the deck
+    bb_cards = list(bb_combos.sample())
+    bb_abstract = str(combo_hand(bb_cards))
+    deck: list[tuple[str, str]] = [c for c in _ALL_CARDS if c not in bb_cards]
+    random.shuffle(deck)
+    deck.pop(0)
+    flop = [deck.pop(0), deck.pop(0), deck.pop(0)]
+    flop_cards = [FlopCard(r, s) for r, s in flop]
+
+    # Board texture for villain cbet sizing
+    texture = classify_board_vs_bb(flop_cards)
+    villain_sizing = _VILLAIN_SIZING[texture]
+
+    # Villain combos not blocked by BB's hand or the flop. Sample without
+    # replacement until one cbets: uniform over the cbetting combos, and
+    # usually only a few evaluations instead of one per range class.
+    live_villain = villain_combos.without_cards(bb_cards + flop)
+    villain_cards = None
+    candidates = live_villain
+    evaluated = errors = 0
+    while candidates:
+        combo = candidates.sample()
+        evaluated += 1
+        v_hole = [FlopCard(r, s) for r, s in combo]
+        try:
+            rec = get_cbet_recommendation(
+                v_hole, flop_cards, villain_position, 'BB', stack_depth
+            )
+        except Exception:
+            errors += 1
+            rec = None
+        if rec is not None and rec['should_bet']:
+            villain_cards = list(combo)
+            break
+        candidates = candidates.without_combo(combo)
+
+    fallback = None
+    if villain_cards is None:
+        # Fallback: any live villain combo, or any two cards left in the deck
+        if live_villain:
+            villain_cards = list(live_villain.sample())
+            fallback = "combo"
+        else:
+            villain_cards = [deck.pop(0), deck.pop(0)]
+            fallback = "deck"
+    if stats is not None:
+        stats.update(candidates=evaluated, errors=errors, fallback=fallback)
+    villain_abstract = str(combo_hand(villain_cards))
+
+    return {
+        'bb_hand':         bb_abstract,
+        'bb_cards':        [{'rank': r, 'suit': s} for r, s in bb_cards],
+        'flop_cards':      [{'rank': r, 'suit': s} for r, s in flop],
+        'villain_hand':    villain_abstract,
+        'villain_cards':   [{'rank': r, 'suit': s} for r, s in villain_cards],
+        'villain_sizing':  villain_sizing,
+        'villain_combos':  len(live_villain),
+        'villain_range':   {str(hand): n for hand, n in live_villain.counts_by_hand().items()},
+        'texture':         texture.value,
+        'texture_label':   BB_TEXTURE_LABELS[texture.value],
+    }
+
+
+def deal_bb_defense_counted(*args) -> tuple[dict, dict]:
+    """
+    deal_bb_defense returning its stats too, plus the evaluate_hand calls it
+    made: run in a worker, the deal's counters must travel back with the result.
+    """
+    stats = {}
+    before = EVALUATE_HAND_CALLS.value()
+    deal = deal_bb_defense(*args, stats=stats)
+    stats["evaluate_hand"] = EVALUATE_HAND_CALLS.value() - before
+    return deal, stats
+
+
+def _warm_worker():
+    # Spawned workers start from a fresh interpreter: seed from the OS so no two
+    # workers deal the same sequence, and run one deal to fill the lookup caches
+    random.seed()
+    deal_bb_defense(ComboRange.full(), ComboRange.full(), 'BTN', 100)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class PoolBusy(Exception):
+    """Raised when the pool already holds `max_queue` waiting tasks."""
+
+
+class FlopPool:
+    """
+    A process pool of `workers` processes accepting at most `max_queue` tasks
+    beyond the ones running. `run` is awaited from the event loop and gives up
+    after `timeout` seconds (the worker finishes the abandoned task regardless).
+    """
+
+    def __init__(self, workers=2, max_queue=16, timeout=2.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self._busy_seconds = 0.0
+
+    def start(self):
+        """Spawn and warm the workers (done on first use if not called)."""
+        if self._executor is not None:
+            return
+        # spawn, not fork: the app process runs threads (range watcher, answer log writer)
+        self._executor = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_warm_worker
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_ping)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _finished(self, start):
+        self.in_flight -= 1
+        self._busy_seconds += time.perf_counter() - start
+
+    async def run(self, fn, *args):
+        """
+        Run `fn(*args)` in a worker. Raises PoolBusy or asyncio.TimeoutError.
+
+        A task counts as in flight until its worker is done with it, even once
+        `run` gave up on it: a running task cannot be cancelled, and abandoned
+        tasks must keep counting against `max_queue`.
+        """
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolBusy(f"{self.in_flight} flop tasks in flight")
+        self.start()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.submitted += 1
+        start = time.perf_counter()
+        future = self._executor.submit(fn, *args)
+        loop = asyncio.get_running_loop()
+
+        def done(_):
+            # Called on the executor's thread: count on the event loop
+            try:
+                loop.call_soon_threadsafe(self._finished, start)
+            except RuntimeError:  # the loop closed first, at shutdown
+                pass
+
+        future.add_done_callback(done)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()  # drops it if still queued
+            self.timeouts += 1
+            raise
+        except BrokenProcessPool:
+            # A worker died: the next task starts a fresh pool
+            self.errors += 1
+            self.shutdown()
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        finished = self.completed + self.timeouts + self.errors
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "timeout": self.timeout,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "max_in_flight": self.max_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "avg_ms": round(self._busy_seconds / finished * 1e3, 2) if finished else None,
+        }
@@ -0,0 +1,298 @@
+"""
+Prometheus metrics, served in the text exposition format at /metrics.
+
+Updates are meant for hot paths: each thread counts into its own dict (the
+event loop, every threadpool worker), so an increment is a thread-local lookup
+and a dict store, with no lock. A scrape copies and sums the per-thread dicts.
+When a thread exits, its dict is folded into the metric's retired totals, so
+threadpool churn does not leave one dict behind per dead thread.
+Values kept elsewhere (the flop pool's queue depth and failure counters) are
+registered as callbacks and only read at scrape time.
+
+MetricsMiddleware times every HTTP request by route template; instrument_routes
+wraps each route to track requests (and websockets) in flight.
+"""
+import bisect
+import threading
+import time
+import weakref
+
+from starlette.routing import Mount
+
+_registry: list = []
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra="") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _ThreadOwner:
+    """Held only by a thread's threading.local, so it is freed when the thread exits."""
+
+    __slots__ = ('__weakref__',)
+
+
+class _Metric:
+    """A metric family whose values are kept in one dict per thread."""
+
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._retired: dict = {}  # values of threads that have exited
+        self._lock = threading.Lock()  # not taken by updates, only when a thread starts or exits
+        _registry.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            owner = self._local.owner = _ThreadOwner()
+            with self._lock:
+                self._shards.append(values)
+            weakref.finalize(owner, self._retire, values)
+            return values
+
+    def _retire(self, values: dict):
+        with self._lock:
+            self._shards.remove(values)
+            for labels, value in values.items():
+                self._merge(labels, value)
+
+    def _merge(self, labels, value):
+        self._retired[labels] = self._retired.get(labels, 0) + value
+
+    def _snapshot(self) -> list[dict]:
+        # Copied under the lock, so a thread retiring meanwhile is counted once
+        with self._lock:
+            return [shard.copy() for shard in self._shards] + [self._retired.copy()]
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, labels=()):
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._shard()
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return sum(shard.get(labels, 0) for shard in self._snapshot())
+
+    def _totals(self) -> dict:
+        totals = {}
+        for shard in self._snapshot():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def collect(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._totals().items())
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down (summed across threads like a Counter)."""
+
+    kind = "gauge"
+
+    def dec(self, amount=1, labels=()):
+        self.inc(-amount, labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _merge(self, labels, row):
+        total = self._retired.get(labels)
+        # A new list: a scrape may still be reading the previous one
+        self._retired[labels] = list(row) if total is None else [a + b for a, b in zip(total, row)]
+
+    def observe(self, value, labels=()):
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._shard()
+        row = values.get(labels)
+        if row is None:
+            # One count per bucket plus +Inf, then the sum of observed values
+            row = values[labels] = [0] * (len(self.buckets) + 1) + [0]
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def collect(self) -> list[str]:
+        totals = {}
+        for shard in self._snapshot():
+            for labels, row in shard.items():
+                row = list(row)
+                total = totals.get(labels)
+                totals[labels] = row if total is None else [a + b for a, b in zip(total, row)]
+        lines = self._header()
+        for labels, row in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Callback(_Metric):
+    """A family read from `fn()` at scrape time: {label values tuple: value}."""
+
+    def __init__(self, name, help, kind, fn, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def collect(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.fn().items())
+        ]
+
+
+def exposition() -> bytes:
+    """Every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# HTTP
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    LATENCY_BUCKETS, ("method", "route"),
+)
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests and websockets being handled, by route.", ("route",))
+
+# Flop evaluation
+
+EVALUATE_HAND_CALLS = Counter(
+    "evaluate_hand_calls_total", "Flop hand strength evaluations, including those run in flop workers."
+)
+BB_DEAL_VILLAIN_COMBOS = Histogram(
+    "bb_deal_villain_combos", "Villain combos left after card removal, per BB defense deal.",
+    (50, 100, 150, 200, 300, 400, 600, 800, 1326),
+)
+BB_DEAL_CBET_CANDIDATES = Histogram(
+    "bb_deal_cbet_candidates", "Villain combos evaluated before one cbets, per BB defense deal.",
+    (1, 2, 3, 5, 8, 13, 21, 50, 100, 200),
+)
+BB_DEAL_FALLBACKS = Counter(
+    "bb_deal_fallbacks_total", "BB defense deals where no villain combo cbets, by the hand dealt instead.", ("kind",)
+)
+BB_DEAL_EVAL_ERRORS = Counter(
+    "bb_deal_eval_errors_total", "Villain combos whose cbet recommendation raised during a BB defense deal."
+)
+
+# Range lookups
+
+RANGE_CACHE = Counter(
+    "range_cache_lookups_total", "Range library cache lookups by cache and result.", ("cache", "result")
+)
+
+# Answer log
+
+ANSWER_LOG_WRITE_ERRORS = Counter(
+    "answer_log_write_errors_total", "Appends to the answer log that failed (the unwritten bytes are retried)."
+)
+ANSWER_LOG_DROPPED = Counter(
+    "answer_log_dropped_total", "Answers dropped from the answer log because the retry buffer was full."
+)
+
+
+def _route_label(route) -> str:
+    if isinstance(route, Mount):
+        return route.path + "/{path}"
+    return route.path
+
+
+class _InFlight:
+    """Route wrapper counting the requests it is handling; also labels the scope for MetricsMiddleware."""
+
+    def __init__(self, app, label):
+        self.app = app
+        self.label = label
+        self.labels = (label,)
+
+    async def __call__(self, scope, receive, send):
+        scope["metrics.route"] = self.label
+        IN_FLIGHT.inc(1, self.labels)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            IN_FLIGHT.dec(1, self.labels)
+
+
+def instrument_routes(routes):
+    """Wrap every route's app to track in-flight requests (call once all routes are added)."""
+    for route in routes:
+        if hasattr(route, "app") and not isinstance(route.app, _InFlight):
+            route.app = _InFlight(route.app, _route_label(route))
+
+
+class MetricsMiddleware:
+    """Record latency and status of every HTTP request under its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("metrics.route", "unmatched")
+            REQUEST_DURATION.observe(time.perf_counter() - start, (scope["method"], route))
+            REQUESTS.inc(1, (scope["method"], route, status))
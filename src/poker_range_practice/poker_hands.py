@@ -6,71 +6,107 @@ import random
 
 
 class Hand:
-    """Represents a poker starting hand."""
-    
+    """Represents a poker starting hand.
+
+    Hands are interned: the 169 canonical hands are built once at import, and
+    Hand("AKs") or Hand.from_index(i) always returns the shared instance.
+    `index` is the hand's position in generate_all_hands() (0..168).
+    """
+
     RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
     RANK_VALUES = {r: i for i, r in enumerate(RANKS)}
-    
-    def __init__(self, hand_str):
+
+    __slots__ = ('rank1', 'rank2', 'is_pair', 'is_suited',
+                 'rank1_value', 'rank2_value', 'index', '_str', '_hash')
+
+    _interned: dict = {}   # canonical string -> Hand
+    _by_index: list = []   # index -> Hand
+
+    def __new__(cls, hand_str):
         """
-        Initialize a hand from string notation.
-        Examples: 'AA', 'AKs', 'T9o'
+        Return the shared hand for a string notation.
+        Examples: 'AA', 'AKs', 'T9o' (also 'KAs', ' AKO ')
         """
-        self.hand_str = hand_str.strip()
-        self.parse()
-    
-    def parse(self):
-        """Parse the hand string into components."""
-        if len(self.hand_str) < 2:
-            raise ValueError(f"Invalid hand: {self.hand_str}")
-        
-        self.rank1 = self.hand_str[0]
-        self.rank2 = self.hand_str[1]
-        
+        hand = cls._interned.get(hand_str)
+        if hand is None:
+            hand = cls._interned[cls._canonical(hand_str)]
+        return hand
+
+    @classmethod
+    def _canonical(cls, hand_str):
+        """Validate a hand string and return its canonical form (e.g. 'KAs' -> 'AKs')."""
+        hand_str = hand_str.strip()
+        if len(hand_str) < 2:
+            raise ValueError(f"Invalid hand: {hand_str}")
+
+        rank1 = hand_str[0]
+        rank2 = hand_str[1]
+
         # Validate ranks
-        if self.rank1 not in self.RANKS or self.rank2 not in self.RANKS:
-            raise ValueError(f"Invalid ranks in hand: {self.hand_str}")
-        
+        if rank1 not in cls.RANK_VALUES or rank2 not in cls.RANK_VALUES:
+            raise ValueError(f"Invalid ranks in hand: {hand_str}")
+
         # Ensure rank1 >= rank2 for consistency
-        if self.RANK_VALUES[self.rank1] < self.RANK_VALUES[self.rank2]:
-            self.rank1, self.rank2 = self.rank2, self.rank1
-        
-        # Determine if pair, suited, or offsuit
-        if self.rank1 == self.rank2:
-            self.is_pair = True
-            self.is_suited = None
-        else:
-            self.is_pair = False
-            if len(self.hand_str) >= 3:
-                suit_char = self.hand_str[2].lower()
-                if suit_char == 's':
-                    self.is_suited = True
-                elif suit_char == 'o':
-                    self.is_suited = False
-                else:
-                    raise ValueError(f"Invalid suit designation: {self.hand_str}")
-            else:
-                raise ValueError(f"Non-pair hands must specify s or o: {self.hand_str}")
-    
+        if cls.RANK_VALUES[rank1] < cls.RANK_VALUES[rank2]:
+            rank1, rank2 = rank2, rank1
+
+        if rank1 == rank2:
+            return f"{rank1}{rank2}"
+        if len(hand_str) < 3:
+            raise ValueError(f"Non-pair hands must specify s or o: {hand_str}")
+        suit_char = hand_str[2].lower()
+        if suit_char not in ('s', 'o'):
+            raise ValueError(f"Invalid suit designation: {hand_str}")
+        return f"{rank1}{rank2}{suit_char}"
+
+    @classmethod
+    def from_index(cls, index):
+        """Return the shared hand with canonical index 0..168."""
+        return cls._by_index[index]
+
+    @classmethod
+    def _intern(cls, rank1, rank2, is_suited):
+        """Build and register one canonical hand (import time only)."""
+        hand = object.__new__(cls)
+        is_pair = rank1 == rank2
+        text = f"{rank1}{rank2}" if is_pair else f"{rank1}{rank2}{'s' if is_suited else 'o'}"
+        index = len(cls._by_index)
+        for name, value in (
+            ('rank1', rank1), ('rank2', rank2),
+            ('is_pair', is_pair), ('is_suited', None if is_pair else is_suited),
+            ('rank1_value', cls.RANK_VALUES[rank1]), ('rank2_value', cls.RANK_VALUES[rank2]),
+            ('index', index), ('_str', text), ('_hash', index),
+        ):
+            object.__setattr__(hand, name, value)
+        cls._by_index.append(hand)
+        cls._interned[text] = hand
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Hand instances are shared and immutable")
+
+    def __reduce__(self):
+        return (Hand, (self._str,))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def __str__(self):
         """Return canonical string representation."""
-        if self.is_pair:
-            return f"{self.rank1}{self.rank2}"
-        else:
-            return f"{self.rank1}{self.rank2}{'s' if self.is_suited else 'o'}"
+        return self._str
     
     def __eq__(self, other):
-        """Check equality with another hand."""
-        if not isinstance(other, Hand):
-            return False
-        return str(self) == str(other)
+        """Hands are interned, so equality is identity."""
+        return self is other
     
     def __hash__(self):
         """Make Hand hashable for use in sets."""
-        return hash(str(self))
+        return self._hash
     
     def __repr__(self):
-        return f"Hand('{self}')"
+        return f"Hand('{self._str}')"
     
     def distance_to(self, other):
         """
@@ -78,8 +114,8 @@ class Hand:
         Used to find the "closest" hand in range.
         """
         # Simple heuristic: sum of rank differences
-        rank1_diff = abs(self.RANK_VALUES[self.rank1] - self.RANK_VALUES[other.rank1])
-        rank2_diff = abs(self.RANK_VALUES[self.rank2] - self.RANK_VALUES[other.rank2])
+        rank1_diff = abs(self.rank1_value - other.rank1_value)
+        rank2_diff = abs(self.rank2_value - other.rank2_value)
         
         # Penalize if suited/offsuit differs
         suit_penalty = 0
@@ -90,21 +126,92 @@ class Hand:
         return rank1_diff + rank2_diff + suit_penalty
 
 
+# Pairs first, then suited/offsuit per high card; this order defines Hand.index
+for _rank in Hand.RANKS:
+    Hand._intern(_rank, _rank, None)
+for _i, _rank1 in enumerate(Hand.RANKS):
+    for _rank2 in Hand.RANKS[:_i]:  # rank2 < rank1
+        Hand._intern(_rank1, _rank2, True)
+        Hand._intern(_rank1, _rank2, False)
+del _rank, _i, _rank1, _rank2
+
+
 def generate_all_hands():
-    """Generate all 169 possible starting hands."""
-    hands = []
-    
-    # Pairs
-    for rank in Hand.RANKS:
-        hands.append(Hand(f"{rank}{rank}"))
-    
-    # Non-pairs
-    for i, rank1 in enumerate(Hand.RANKS):
-        for rank2 in Hand.RANKS[:i]:  # rank2 < rank1
-            hands.append(Hand(f"{rank1}{rank2}s"))
-            hands.append(Hand(f"{rank1}{rank2}o"))
-    
-    return hands
+    """Return all 169 possible starting hands in canonical index order."""
+    return list(Hand._by_index)
+
+
+class RangeBits:
+    """
+    A set of hands stored as a 169-bit integer mask (bit i is Hand.from_index(i)).
+
+    Supports |, &, - and ~ (complement), len() as a popcount, membership tests
+    and iteration in canonical hand order.
+    """
+
+    __slots__ = ('mask',)
+
+    FULL_MASK = (1 << 169) - 1
+
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    @classmethod
+    def from_hands(cls, hands):
+        """Build a range from an iterable of Hand objects."""
+        mask = 0
+        for hand in hands:
+            mask |= 1 << hand.index
+        return cls(mask)
+
+    @classmethod
+    def from_notation(cls, range_str):
+        """Build a range from compact notation, e.g. "22+, A2s+, KJo+"."""
+        return cls.from_hands(parse_range_notation(range_str))
+
+    def to_notation(self):
+        """Return minimal canonical range notation, e.g. "22+, A2s+, KTo-K8o"."""
+        return range_to_notation(self)
+
+    def __or__(self, other):
+        return RangeBits(self.mask | other.mask)
+
+    def __and__(self, other):
+        return RangeBits(self.mask & other.mask)
+
+    def __sub__(self, other):
+        return RangeBits(self.mask & ~other.mask)
+
+    def __invert__(self):
+        return RangeBits(self.FULL_MASK & ~self.mask)
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __contains__(self, hand):
+        return (self.mask >> hand.index) & 1 == 1
+
+    def __iter__(self):
+        mask = self.mask
+        by_index = Hand._by_index
+        while mask:
+            low = mask & -mask
+            yield by_index[low.bit_length() - 1]
+            mask ^= low
+
+    def __eq__(self, other):
+        if not isinstance(other, RangeBits):
+            return NotImplemented
+        return self.mask == other.mask
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __repr__(self):
+        return f"RangeBits('{self.to_notation()}')"
 
 
 def parse_range_notation(range_str):
@@ -162,7 +269,7 @@ def expand_plus_notation(base_hand_str):
     
     if base_hand.is_pair:
         # All pairs from this pair to AA
-        start_idx = Hand.RANK_VALUES[base_hand.rank1]
+        start_idx = base_hand.rank1_value
         for i in range(start_idx, len(Hand.RANKS)):
             rank = Hand.RANKS[i]
             hands.append(Hand(f"{rank}{rank}"))
@@ -170,8 +277,8 @@ def expand_plus_notation(base_hand_str):
         # Non-pair: expand to all hands with same first rank
         rank1 = base_hand.rank1
         rank2_start = base_hand.rank2
-        start_idx = Hand.RANK_VALUES[rank2_start]
-        rank1_idx = Hand.RANK_VALUES[rank1]
+        start_idx = base_hand.rank2_value
+        rank1_idx = base_hand.rank1_value
         
         # Go from rank2_start up to (but not including) rank1
         for i in range(start_idx, rank1_idx):
@@ -200,8 +307,8 @@ def expand_dash_notation(range_str):
     # Check if both are pairs
     if start_hand.is_pair and end_hand.is_pair:
         # Pair range like "77-22"
-        start_idx = Hand.RANK_VALUES[start_hand.rank1]
-        end_idx = Hand.RANK_VALUES[end_hand.rank1]
+        start_idx = start_hand.rank1_value
+        end_idx = end_hand.rank1_value
         
         # Make sure start_idx <= end_idx
         if start_idx > end_idx:
@@ -220,8 +327,8 @@ def expand_dash_notation(range_str):
         raise ValueError(f"Dash notation must have same suited/offsuit: {range_str}")
     
     rank1 = start_hand.rank1
-    start_idx = Hand.RANK_VALUES[start_hand.rank2]
-    end_idx = Hand.RANK_VALUES[end_hand.rank2]
+    start_idx = start_hand.rank2_value
+    end_idx = end_hand.rank2_value
     
     # Make sure start_idx <= end_idx
     if start_idx > end_idx:
@@ -237,6 +344,68 @@ def expand_dash_notation(range_str):
     return hands
 
 
+def range_to_notation(hands):
+    """
+    Compress a set of hands into minimal canonical range notation.
+
+    Each maximal run of consecutive hands within a category (pairs, or same
+    high card and suitedness) becomes one token: "22+" / "A2s+" when the run
+    reaches the top, "99-77" / "KTo-K8o" for inner runs, or a single hand.
+    Pairs come first, then each high card from A down, suited before offsuit.
+    Runs in linear time over the 169 hands, and parse_range_notation() of the
+    result gives back the same set.
+    """
+    present = [False] * len(Hand._by_index)
+    for hand in hands:
+        present[hand.index] = True
+
+    n_ranks = len(Hand.RANKS)
+    tokens = []
+
+    # Pairs: index i is the pair of rank i
+    _append_runs(
+        tokens,
+        [present[v] for v in range(n_ranks)],
+        lambda v: Hand._by_index[v]._str,
+    )
+
+    for rank1_value in range(n_ranks - 1, 0, -1):
+        # Suited/offsuit hands of this high card sit in consecutive index pairs
+        base = n_ranks + rank1_value * (rank1_value - 1)
+        for offset in (0, 1):
+            _append_runs(
+                tokens,
+                [present[base + 2 * v + offset] for v in range(rank1_value)],
+                lambda v, base=base, offset=offset: Hand._by_index[base + 2 * v + offset]._str,
+            )
+    return ", ".join(tokens)
+
+
+def _append_runs(tokens, flags, name):
+    """Append one token per run of True flags, scanning from the top rank down."""
+    top = len(flags) - 1
+    v = top
+    while v >= 0:
+        if not flags[v]:
+            v -= 1
+            continue
+        high = v
+        while v >= 0 and flags[v]:
+            v -= 1
+        low = v + 1
+        if high == low:
+            tokens.append(name(high))
+        elif high == top:
+            tokens.append(f"{name(low)}+")
+        else:
+            tokens.append(f"{name(high)}-{name(low)}")
+
+
+def range_to_notation_by_action(range_by_action):
+    """{sub_action: notation} for a {sub_action: hands} split."""
+    return {action: range_to_notation(hands) for action, hands in range_by_action.items()}
+
+
 def find_closest_hand_in_range(hand, range_hands):
     """
     Find the closest hand in a range to the given hand.
@@ -260,7 +429,7 @@ def find_closest_hand_in_range(hand, range_hands):
             if not non_pair_hands: return None
             return min(non_pair_hands, key=lambda h: hand.distance_to(h))
         # For pairs, just find closest rank
-        return min(pair_candidates, key=lambda h: abs(Hand.RANK_VALUES[h.rank1] - Hand.RANK_VALUES[hand.rank1]))
+        return min(pair_candidates, key=lambda h: abs(h.rank1_value - hand.rank1_value))
     
     # Non-pair hand logic
     non_pair_hands = [h for h in range_hands if not h.is_pair]
@@ -275,8 +444,8 @@ def find_closest_hand_in_range(hand, range_hands):
 
     # Sort candidates by distance of high card, then distance of low card
     def strict_priority_sort(h):
-        rank1_dist = abs(Hand.RANK_VALUES[h.rank1] - Hand.RANK_VALUES[hand.rank1])
-        rank2_dist = abs(Hand.RANK_VALUES[h.rank2] - Hand.RANK_VALUES[hand.rank2])
+        rank1_dist = abs(h.rank1_value - hand.rank1_value)
+        rank2_dist = abs(h.rank2_value - hand.rank2_value)
         return (rank1_dist, rank2_dist)
 
     closest = min(candidates_suiting, key=strict_priority_sort)
@@ -312,30 +481,131 @@ def find_bottom_of_range_category(hand, range_hands):
         
     # The "bottom" is the one with the lowest Rank2 (or Rank1 for pairs)
     if hand.is_pair:
-        bottom = min(candidates, key=lambda h: Hand.RANK_VALUES[h.rank1])
+        bottom = min(candidates, key=lambda h: h.rank1_value)
     else:
-        bottom = min(candidates, key=lambda h: Hand.RANK_VALUES[h.rank2])
+        bottom = min(candidates, key=lambda h: h.rank2_value)
         
     return bottom
 
 
-def pick_boundary_hand(current_range: dict, hand_pool: list, window: int = 2) -> "Hand":
+def closest_hand_table(range_hands):
     """
-    Return a hand near an action boundary in current_range.
+    Precompute find_closest_hand_in_range for every hand outside range_hands.
+
+    Returns a 169-entry tuple indexed by Hand.index (None for in-range hands).
+    Ties are broken like find_closest_hand_in_range scanning range_hands in
+    canonical order: the lowest Hand.index wins.
+    """
+    in_range = set(range_hands)
+    ordered = [h for h in Hand._by_index if h in in_range]
+    non_pairs = [h for h in ordered if not h.is_pair]
+    # rows[is_suited][rank1_value] -> in-range rank2 values, ascending
+    rows = {True: [[] for _ in Hand.RANKS], False: [[] for _ in Hand.RANKS]}
+    for h in non_pairs:
+        rows[h.is_suited][h.rank1_value].append(h)
+
+    has_suiting = {
+        True: any(h.is_suited for h in non_pairs),
+        False: any(not h.is_suited for h in non_pairs),
+    }
+
+    table = []
+    for hand in Hand._by_index:
+        if hand in in_range or not ordered:
+            table.append(None)
+        elif hand.is_pair or not non_pairs:
+            table.append(find_closest_hand_in_range(hand, ordered))
+        elif has_suiting[hand.is_suited]:
+            table.append(_closest_by_rows(hand, (rows[hand.is_suited],)))
+        else:
+            # Fallback to wrong suitedness, as find_closest_hand_in_range does
+            table.append(_closest_by_rows(hand, (rows[True], rows[False])))
+    return tuple(table)
+
+
+def _closest_by_rows(hand, row_sets):
+    """Strict-priority closest hand: nearest rank1 row first, then nearest rank2."""
+    rank1_value = hand.rank1_value
+    rank2_value = hand.rank2_value
+    for d in range(len(Hand.RANKS)):
+        best = None
+        best_key = None
+        # Lower rank1 rows have lower indexes, so they are visited first on ties
+        for r1 in ((rank1_value,) if d == 0 else (rank1_value - d, rank1_value + d)):
+            if not 0 <= r1 < len(Hand.RANKS):
+                continue
+            for row_set in row_sets:
+                for h in row_set[r1]:
+                    key = abs(h.rank2_value - rank2_value)
+                    if best is None or key < best_key or (key == best_key and h.index < best.index):
+                        best, best_key = h, key
+        if best is not None:
+            return best
+    return None
+
+
+def bottom_of_range_table(range_by_action):
+    """
+    Precompute find_bottom_of_range_category for every in-range hand.
+
+    `range_by_action` maps each sub-action to its hands; the bottom is searched
+    among the hands of the hand's own sub-action. Returns a 169-entry tuple
+    indexed by Hand.index (None for hands outside the range).
+    """
+    table = [None] * len(Hand._by_index)
+    for hands in range_by_action.values():
+        bottoms = {}
+        for h in sorted(hands, key=lambda h: h.index):
+            key = ("pair",) if h.is_pair else (h.rank1, h.is_suited)
+            value = h.rank1_value if h.is_pair else h.rank2_value
+            if key not in bottoms or value < bottoms[key][0]:
+                bottoms[key] = (value, h)
+        for h in hands:
+            key = ("pair",) if h.is_pair else (h.rank1, h.is_suited)
+            table[h.index] = bottoms[key][1]
+    return tuple(table)
+
+
+class BoundaryIndex:
+    """
+    Precomputed boundary hands of a range over a hand pool (see build_boundary_index).
+
+    `hands` are the hands within the window of a boundary, or the whole pool when
+    the range has no boundary. `weighted_hands` repeats each hand once per step it
+    sits inside the window, so hands right at a boundary are drawn most often.
+    """
+
+    __slots__ = ('hands', 'weighted_hands')
+
+    def __init__(self, hands, weighted_hands=None):
+        self.hands = tuple(hands)
+        self.weighted_hands = tuple(weighted_hands) if weighted_hands is not None else self.hands
+
+    def pick(self, weighted=False, rng=random):
+        """Return one hand with a single O(1) random draw."""
+        return rng.choice(self.weighted_hands if weighted else self.hands)
+
+    def __len__(self):
+        return len(self.hands)
+
+
+def build_boundary_index(current_range, hand_pool, window: int = 2) -> BoundaryIndex:
+    """
+    Collect the hands near an action boundary in current_range.
 
     For each category (same rank1 + suitedness, or pairs), hands are sorted by
     rank2 ascending. Any consecutive pair whose actions differ is a boundary.
-    Hands within `window` steps of any boundary are collected; one is picked at random.
-    Falls back to random from hand_pool when no boundaries exist.
+    Hands within `window` steps of any boundary are collected; when no boundaries
+    exist the index falls back to the whole hand_pool.
     """
     if not current_range or not hand_pool:
-        return random.choice(hand_pool)
+        return BoundaryIndex(hand_pool)
 
     def hand_action(h):
         return current_range.get(h, "fold")
 
     boundary_hands: list = []
-    seen: set = set()
+    weights: dict = {}
 
     categories: dict = {}
     for h in hand_pool:
@@ -344,9 +614,9 @@ def pick_boundary_hand(current_range: dict, hand_pool: list, window: int = 2) ->
 
     for key, hands in categories.items():
         if key == ("pair",):
-            sorted_hands = sorted(hands, key=lambda h: Hand.RANK_VALUES[h.rank1])
+            sorted_hands = sorted(hands, key=lambda h: h.rank1_value)
         else:
-            sorted_hands = sorted(hands, key=lambda h: Hand.RANK_VALUES[h.rank2])
+            sorted_hands = sorted(hands, key=lambda h: h.rank2_value)
 
         actions = [hand_action(h) for h in sorted_hands]
 
@@ -356,14 +626,33 @@ def pick_boundary_hand(current_range: dict, hand_pool: list, window: int = 2) ->
                 hi = min(len(sorted_hands), i + window + 1)
                 for j in range(lo, hi):
                     h = sorted_hands[j]
-                    if h not in seen:
-                        seen.add(h)
+                    # Steps from the boundary: 0 for the two hands either side of it
+                    weight = window - (i - j if j <= i else j - i - 1)
+                    if h not in weights:
                         boundary_hands.append(h)
+                        weights[h] = weight
+                    elif weight > weights[h]:
+                        weights[h] = weight
 
     if not boundary_hands:
-        return random.choice(hand_pool)
+        return BoundaryIndex(hand_pool)
 
-    return random.choice(boundary_hands)
+    return BoundaryIndex(
+        boundary_hands,
+        [h for h in boundary_hands for _ in range(weights[h])],
+    )
+
+
+def pick_boundary_hand(current_range: dict, hand_pool: list, window: int = 2,
+                       weighted: bool = False) -> "Hand":
+    """
+    Return a hand near an action boundary in current_range.
+    Falls back to random from hand_pool when no boundaries exist.
+
+    Ranges compiled by RangeManager carry a prebuilt BoundaryIndex; this builds
+    one on the fly for arbitrary ranges and pools.
+    """
+    return build_boundary_index(current_range, hand_pool, window).pick(weighted)
 
 
 if __name__ == "__main__":
@@ -373,6 +662,11 @@ if __name__ == "__main__":
     print(f"Parsed {len(hands)} hands from range:")
     print(sorted([str(h) for h in hands]))
     
+    # Test the notation round trip
+    compact = range_to_notation(hands)
+    print(f"\nCompressed back to: {compact}")
+    assert parse_range_notation(compact) == hands
+    
     # Test closest hand
     test_hand = Hand("T5o")
     closest = find_closest_hand_in_range(test_hand, hands)
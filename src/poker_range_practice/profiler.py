@@ -0,0 +1,190 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+ProfileMiddleware profiles a random `rate` of requests, plus any request whose
+X-Profile header carries the admin `token`. While a profiled request runs, a
+sampler thread records the Python stacks of every busy thread each `interval`
+seconds: sync endpoints run on threadpool threads and async ones on the event
+loop, so a per-thread profiler like cProfile would miss most of the work.
+
+The sampler cannot tell which thread works for which request: a profile also
+holds the stacks of any other request running at the same time (each stack is
+labelled with its thread name). And while any profile runs, the switch
+interval of the whole process is lowered (see _Sampler), which makes every
+request pay for more GIL hand-offs. Profile an idle or lightly loaded server,
+or treat other threads' stacks as noise.
+
+Each profiled request writes two files under `directory/<route>/`:
+`<time>-<ms>ms.collapsed` (one `stack count` line per stack, the input of
+flamegraph.pl or speedscope) and `<time>-<ms>ms.txt` (functions by own and
+total samples). Only the newest `keep` profiles per route are kept.
+
+The middleware is only installed when profiling is enabled, so it costs
+nothing otherwise.
+"""
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+# Innermost frames of threads that are waiting, not working (idle threadpool
+# workers, the event loop in select)
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+
+def _frame_name(code) -> str:
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+_switch_lock = threading.Lock()
+_active_samplers = 0
+_saved_switch_interval = None
+
+
+class _Sampler(threading.Thread):
+    """
+    Samples the stacks of all other busy threads until stopped.
+
+    The sampler needs the GIL to take a sample, which a busy thread only hands
+    over every sys.getswitchinterval() (5 ms by default): while any sampler
+    runs, the switch interval is lowered to the sampling interval.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def start(self):
+        global _active_samplers, _saved_switch_interval
+        with _switch_lock:
+            if _active_samplers == 0:
+                _saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.interval, _saved_switch_interval))
+            _active_samplers += 1
+        super().start()
+
+    def run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own or os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                if ident not in names:
+                    names.update((t.ident, t.name) for t in threading.enumerate())
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        global _active_samplers
+        self._stop_event.set()
+        self.join()
+        with _switch_lock:
+            _active_samplers -= 1
+            if _active_samplers == 0:
+                sys.setswitchinterval(_saved_switch_interval)
+        return self.stacks
+
+
+def summarize(stacks: Counter, top=40) -> str:
+    """Functions by own samples (innermost frame) and total samples (anywhere on the stack)."""
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]  # drop the thread name
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    samples = sum(stacks.values()) or 1
+    lines = [f"{'own':>6} {'total':>6}  function"]
+    for frame, count in total.most_common(top):
+        lines.append(f"{own[frame] / samples:6.1%} {count / samples:6.1%}  {frame}")
+    return "\n".join(lines)
+
+
+def _route_dir(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", route).strip("_") or "root"
+
+
+class ProfileMiddleware:
+    """Profile a fraction of HTTP requests (and those carrying the admin token)."""
+
+    def __init__(self, app, directory="profiles", rate=0.0, token=None, interval=0.001, keep=50):
+        self.app = app
+        self.directory = Path(directory)
+        self.rate = rate
+        self.token = token.encode() if token else None
+        self.interval = interval
+        self.keep = keep
+
+    def _wanted(self, scope) -> bool:
+        if self.rate and random.random() < self.rate:
+            return True
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return secrets.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        sampler = _Sampler(self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stacks = sampler.stop()
+            elapsed = time.perf_counter() - start
+            # Route template, as labelled for metrics by the matched route
+            route = scope.get("metrics.route", scope["path"])
+            header = (f"{scope['method']} {scope['path']} ({route}) -> {status} in {elapsed * 1e3:.1f} ms, "
+                      f"{sampler.samples} samples every {self.interval * 1e3:g} ms")
+            await run_in_threadpool(self._write, route, elapsed, header, stacks)
+
+    def _write(self, route, elapsed, header, stacks: Counter):
+        try:
+            directory = self.directory / _route_dir(route)
+            directory.mkdir(parents=True, exist_ok=True)
+            stem = f"{time.time_ns()}-{elapsed * 1e3:.0f}ms"
+            (directory / f"{stem}.collapsed").write_text(
+                "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+            )
+            (directory / f"{stem}.txt").write_text(header + "\n\n" + summarize(stacks) + "\n")
+            self._rotate(directory)
+        except OSError as e:  # never fail the request over a profile
+            print(f"Warning: could not write profile for {route}: {e}")
+
+    def _rotate(self, directory: Path):
+        stems = sorted({p.stem for p in directory.glob("*.collapsed")}, key=lambda s: int(s.split("-")[0]))
+        for stem in stems[:-self.keep] if self.keep > 0 else []:
+            for suffix in (".collapsed", ".txt"):
+                (directory / f"{stem}{suffix}").unlink(missing_ok=True)
@@ -1,11 +1,35 @@
 """
-Range management - load and query poker ranges from JSON configuration.
+Range management - load and query poker ranges from JSON configuration,
+a compiled binary range pack or a directory of range shards.
 """
+import hashlib
 import json
+import random
+import threading
+import weakref
+from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
-from .poker_hands import parse_range_notation
+from types import MappingProxyType
+from typing import Mapping
+
+from .combos import ComboRange
+from .fast_json import Fragment
+from .range_pack import PackedNode, load_pack
+from .poker_hands import (
+    generate_all_hands,
+    parse_range_notation,
+    range_to_notation_by_action,
+    build_boundary_index,
+    closest_hand_table,
+    bottom_of_range_table,
+    BoundaryIndex,
+    Hand,
+    RangeBits,
+)
 
 _POSITION_ORDER = ['LJ', 'HJ', 'CO', 'BTN', 'SB', 'BB']
+_ALL_HANDS = generate_all_hands()
 
 
 def _action_label(position: str, action: str) -> str:
@@ -38,63 +62,343 @@ def _parent_open_range(position: str, action: str) -> tuple[str, str] | None:
     return None
 
 
-class RangeManager:
-    """Manages loading and querying poker ranges."""
-    
-    def __init__(self, ranges_file="ranges.json"):
-        """Initialize with path to ranges JSON file."""
-        self.ranges_file = Path(ranges_file)
-        self.ranges = {}
-        self.load_ranges()
-    
-    def load_ranges(self):
-        """Load ranges from JSON file."""
-        if not self.ranges_file.exists():
-            print(f"Warning: {self.ranges_file} not found. Creating empty ranges.")
-            self.ranges = {}
-            return
-        
-        try:
-            with open(self.ranges_file, 'r') as f:
-                self.ranges = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"Error loading ranges file: {e}")
-            self.ranges = {}
+def _validate_ranges(ranges):
+    """Raise ValueError unless `ranges` has the position/action/stack_depth layout."""
+    if not isinstance(ranges, dict):
+        raise ValueError("ranges file must contain a JSON object")
+    for position, actions in ranges.items():
+        if position.startswith('_'):
+            continue
+        if not isinstance(actions, dict):
+            raise ValueError(f"{position}: expected an object of actions")
+        for action, stack_data in actions.items():
+            if not isinstance(stack_data, dict):
+                raise ValueError(f"{position}/{action}: expected an object of stack depths")
+            for stack_depth, range_data in stack_data.items():
+                if isinstance(range_data, dict) and not all(isinstance(v, str) for v in range_data.values()):
+                    raise ValueError(f"{position}/{action}/{stack_depth}: sub-ranges must be strings")
+
+
+@dataclass(frozen=True)
+class CompiledRange:
+    """A range node parsed once at load time.
+
+    `hands` maps every in-range Hand to its action, `by_action` lists the hands
+    of each sub-action and `bits` holds the same split as 169-bit masks.
+    `played` lists every hand whose action is not "fold", `combos` holds the
+    same hands as concrete combos and `actions` keeps the sub-actions in file order.
+    `boundary` is the boundary-hand index over all 169 hands.
+
+    `closest` and `bottom` are 169-entry feedback tables indexed by Hand.index:
+    the closest in-range hand for every out-of-range hand, and the bottom of the
+    category within the hand's own sub-action for every in-range hand.
+
+    `notation` is the compressed notation of each sub-action and `matrix` the
+    pre-encoded JSON {hand: action} matrix, both built on first use.
+    `responses` holds serialized responses built from the node, so they are
+    dropped along with it.
+    """
+    actions: tuple[str, ...]
+    hands: Mapping[Hand, str]
+    by_action: Mapping[str, tuple[Hand, ...]]
+    bits: Mapping[str, RangeBits]
+    played: tuple[Hand, ...]
+    combos: ComboRange
+    boundary: BoundaryIndex
+    closest: tuple[Hand | None, ...]
+    bottom: tuple[Hand | None, ...]
+
+    @cached_property
+    def notation(self) -> dict[str, str]:
+        """{sub_action: compressed notation}, e.g. {"raise": "66+, A6s+, ..."}."""
+        return range_to_notation_by_action(self.by_action)
+
+    @cached_property
+    def matrix(self) -> Fragment:
+        """All 169 hands as a JSON {hand: action} object ("fold" outside the range)."""
+        matrix = dict.fromkeys((str(h) for h in _ALL_HANDS), "fold")
+        for action, bits in self.bits.items():
+            matrix.update(dict.fromkeys((str(h) for h in bits), action))
+        return Fragment.of(matrix)
+
+    @cached_property
+    def responses(self) -> dict:
+        """{key: serialized response} for endpoints whose body depends on this node only."""
+        return {}
+
+
+def compile_range(range_data) -> CompiledRange | None:
+    """
+    Compile a raw range node (notation string, {sub_action: notation} dict, or a
+    PackedNode from a binary range pack). Returns None for unsupported node types.
+    """
+    # Case 1: Simple string range (Binary: In Range vs Fold)
+    if isinstance(range_data, str):
+        parts = [("in_range", range_data)]
+    # Case 2: Complex dict range (Multi-action: 3bet, call, etc)
+    elif isinstance(range_data, dict):
+        parts = list(range_data.items())
+    # Case 3: Precompiled 169-slot action array, nothing to parse
+    elif isinstance(range_data, PackedNode):
+        return _compile_assigned(range_data.actions, range_data.hand_actions())
+    else:
+        return None
+
+    assigned: dict[Hand, str] = {}
+    for sub_action, sub_range_str in parts:
+        for hand in parse_range_notation(sub_range_str):
+            # If a hand is in multiple sub-ranges (which shouldn't happen ideally),
+            # the last one overwrites. Future: handle mixed strategies.
+            assigned[hand] = sub_action
+    return _compile_assigned(tuple(action for action, _ in parts), assigned)
+
+
+def _compile_assigned(actions, assigned) -> CompiledRange:
+    """Build a CompiledRange from sub-actions and a {Hand: sub_action} mapping."""
+    # Canonical hand order keeps iteration stable across processes
+    hands = {h: assigned[h] for h in _ALL_HANDS if h in assigned}
+    by_action = {action: [] for action in actions}
+    for hand, action in hands.items():
+        by_action[action].append(hand)
+
+    played = tuple(h for h, action in hands.items() if action != "fold")
+    return CompiledRange(
+        actions=tuple(actions),
+        hands=MappingProxyType(hands),
+        by_action=MappingProxyType({a: tuple(hs) for a, hs in by_action.items()}),
+        bits=MappingProxyType({a: RangeBits.from_hands(hs) for a, hs in by_action.items()}),
+        played=played,
+        combos=ComboRange.from_hands(played),
+        boundary=build_boundary_index(hands, _ALL_HANDS),
+        closest=closest_hand_table(hands),
+        bottom=bottom_of_range_table(by_action),
+    )
+
+
+@dataclass(frozen=True)
+class EvalScenario:
+    """One eval-mode scenario: a range node with everything next-hand needs."""
+    position: str
+    stack_depth: str
+    action: str
+    label: str
+    available_actions: tuple[str, ...]
+    parent_open: tuple[str, str] | None
+    boundary: BoundaryIndex | None
+
+    def as_dict(self) -> dict:
+        return {
+            'action':            self.action,
+            'label':             self.label,
+            'available_actions': list(self.available_actions),
+            'parent_open':       self.parent_open,  # (position, 'open') or None
+        }
+
+
+class EvalCatalog:
+    """
+    Eval-mode scenarios of a snapshot, grouped by (position, stack depth).
+
+    Groups have compact integer ids, their index in `keys`. `token` fingerprints
+    the grouping, so ids kept in a session stay valid across reloads that only
+    edit ranges. Eager snapshots build every group up front; lazy ones (packs,
+    shards) build a group on first use. Groups hold boundary indexes of the
+    nodes, so they are not kept (`cache=False`) when those nodes may be evicted.
+    """
+
+    def __init__(self, snapshot, eager=True, cache=True):
+        self.keys = tuple(
+            (position, stack_depth)
+            for position in snapshot.get_available_positions()
+            for stack_depth in snapshot.get_eval_stack_depths(position)
+        )
+        self.ids = {key: i for i, key in enumerate(self.keys)}
+        self.token = hashlib.blake2b(repr(self.keys).encode(), digest_size=4).hexdigest()
+        self._snapshot = weakref.ref(snapshot)
+        self._groups: list[tuple[EvalScenario, ...] | None] = [None] * len(self.keys)
+        self.cache = cache
+        if eager:
+            for group_id in range(len(self.keys)):
+                self.group(group_id)
+
+    def group_id(self, position, stack_depth) -> int | None:
+        return self.ids.get((position, stack_depth))
+
+    def group(self, group_id) -> tuple[EvalScenario, ...]:
+        """Scenarios of one (position, stack depth) group, in file order."""
+        group = self._groups[group_id]
+        if group is None:
+            group = self._build_group(*self.keys[group_id])
+            if self.cache:
+                self._groups[group_id] = group
+        return group
+
+    def _build_group(self, position, stack_depth) -> tuple[EvalScenario, ...]:
+        snapshot = self._snapshot()
+        labels = snapshot.ranges.get('_scenario_labels', {})
+        scenarios = []
+        for action, stack_data in snapshot.ranges.get(position, {}).items():
+            if not isinstance(stack_data, dict) or stack_depth not in stack_data:
+                continue
+            scenarios.append(EvalScenario(
+                position=position,
+                stack_depth=stack_depth,
+                action=action,
+                label=labels.get(f'{position}/{action}', _action_label(position, action)),
+                available_actions=tuple(snapshot.get_available_range_actions(position, action, stack_depth)),
+                parent_open=_parent_open_range(position, action),
+                boundary=snapshot.get_eval_boundary_index(position, action, stack_depth),
+            ))
+        return tuple(scenarios)
+
+    def sample(self, group_ids, rng=random) -> EvalScenario | None:
+        """
+        Draw a scenario from the selected groups: each group is equally likely,
+        then each of its scenarios, i.e. weight 1 / (groups * group size).
+        """
+        group = self.group(rng.choice(group_ids))
+        return rng.choice(group) if group else None
+
+
+class RangeSnapshot:
+    """
+    One immutable, fully compiled version of a range library.
+
+    Requests that need several lookups should grab `RangeManager.snapshot` once
+    and query it, so a concurrent reload can't give them a mixed view.
+    """
+
+    # Whether compiled nodes live as long as the snapshot (False when a cache may evict them)
+    pins_nodes = True
+
+    def __init__(self, ranges=None, compiled=None, eval_boundaries=None, version=0, lazy=False):
+        self.ranges = ranges if ranges is not None else {}
+        self._compiled: dict[tuple[str, str, str], CompiledRange] = compiled or {}
+        self._eval_boundaries: dict[tuple[str, str, str], BoundaryIndex] = eval_boundaries or {}
+        self.version = version
+        self.lazy = lazy
+        self.eval_catalog = EvalCatalog(self, eager=not lazy, cache=self.pins_nodes)
+
+    @classmethod
+    def build(cls, ranges, previous=None, lazy=False):
+        """
+        Compile a range library into a new snapshot.
+        Nodes whose raw data is unchanged since `previous` are reused as-is.
+        With `lazy`, nodes are compiled on first lookup instead (used for range
+        packs, whose nodes need no parsing).
+        """
+        if previous is None:
+            previous = cls()
+        if lazy:
+            return cls(ranges, version=previous.version + 1, lazy=True)
+        compiled = {}
+        for position, actions in ranges.items():
+            if position.startswith('_'):
+                continue
+            for action, stack_data in actions.items():
+                for stack_depth, range_data in stack_data.items():
+                    key = (position, action, stack_depth)
+                    if key in previous._compiled and previous._node_data(key) == range_data:
+                        compiled[key] = previous._compiled[key]
+                        continue
+                    node = compile_range(range_data)
+                    if node is None:
+                        print(f"Unknown range data type: {type(range_data)}")
+                        continue
+                    compiled[key] = node
+        eval_boundaries = cls._build_eval_boundaries(compiled, previous)
+        return cls(ranges, compiled, eval_boundaries, previous.version + 1)
+
+    def _node_data(self, key):
+        position, action, stack_depth = key
+        return self.ranges[position][action][stack_depth]
+
+    @staticmethod
+    def _build_eval_boundaries(compiled, previous) -> dict[tuple[str, str, str], BoundaryIndex]:
+        """
+        Boundary indexes for eval scenarios where hero opened first: the hand pool
+        is restricted to hero's opening range at the same stack depth.
+        """
+        boundaries = {}
+        for (position, action, stack_depth), node in compiled.items():
+            parent = _parent_open_range(position, action)
+            if parent is None:
+                continue
+            key = (position, action, stack_depth)
+            parent_key = (*parent, stack_depth)
+            parent_node = compiled.get(parent_key)
+            if parent_node is None or not parent_node.played:
+                continue
+            if (key in previous._eval_boundaries
+                    and previous._compiled.get(key) is node
+                    and previous._compiled.get(parent_key) is parent_node):
+                boundaries[key] = previous._eval_boundaries[key]
+            else:
+                boundaries[key] = build_boundary_index(node.hands, parent_node.played)
+        return boundaries
+
+    def changed_nodes(self, previous) -> int:
+        """Number of compiled nodes that are new or different since `previous`."""
+        return sum(1 for key, node in self._compiled.items() if previous._compiled.get(key) is not node)
+
+    def get_compiled_range(self, position, action, stack_depth="standard") -> CompiledRange | None:
+        """Return the precompiled node for position/action/stack depth, or None."""
+        compiled = self._compiled.get((position, action, stack_depth))
+        if compiled is None and self.lazy and not position.startswith('_'):
+            range_data = self.ranges.get(position, {}).get(action, {}).get(stack_depth)
+            if range_data is not None:
+                compiled = compile_range(range_data)
+                if compiled is not None:
+                    # Concurrent first lookups may both compile; either result is valid
+                    compiled = self._compiled.setdefault((position, action, stack_depth), compiled)
+        return compiled
     
     def get_range(self, position, action, stack_depth="standard"):
         """
         Get a range for given position, action, and stack depth.
-        Returns a dictionary mapping Hand objects to action strings (e.g. "call", "3bet").
-        For simple ranges, returns {"in_range": "range"} (or similar default).
+        Returns a read-only mapping of Hand objects to action strings (e.g. "call", "3bet").
+        For simple ranges, every hand maps to "in_range".
         Returns None if not found.
         """
-        try:
-            range_data = self.ranges[position][action][stack_depth]
-            
-            # Case 1: Simple string range (Binary: In Range vs Fold)
-            if isinstance(range_data, str):
-                hands = parse_range_notation(range_data)
-                # Map all hands to a default "in_range" action
-                return {hand: "in_range" for hand in hands}
-            
-            # Case 2: Complex dict range (Multi-action: 3bet, call, etc)
-            elif isinstance(range_data, dict):
-                full_range = {}
-                for sub_action, sub_range_str in range_data.items():
-                    hands = parse_range_notation(sub_range_str)
-                    for hand in hands:
-                        # If a hand is in multiple sub-ranges (which shouldn't happen ideally),
-                        # the last one overwrites. Future: handle mixed strategies.
-                        full_range[hand] = sub_action
-                return full_range
-                
-            else:
-                print(f"Unknown range data type: {type(range_data)}")
-                return None
-
-        except KeyError:
-            return None
+        compiled = self.get_compiled_range(position, action, stack_depth)
+        return compiled.hands if compiled is not None else None
     
+    def get_eval_boundary_index(self, position, action, stack_depth) -> BoundaryIndex | None:
+        """
+        Boundary index used to draw eval-mode hands: restricted to the parent open
+        range when hero opened first, otherwise over all hands. None if not found.
+        """
+        key = (position, action, stack_depth)
+        boundary = self._eval_boundaries.get(key)
+        if boundary is not None:
+            return boundary
+        compiled = self.get_compiled_range(position, action, stack_depth)
+        if compiled is None:
+            return None
+        parent = _parent_open_range(position, action)
+        if self.lazy and parent is not None:
+            parent_node = self.get_compiled_range(*parent, stack_depth)
+            if parent_node is not None and parent_node.played:
+                boundary = build_boundary_index(compiled.hands, parent_node.played)
+                return self._eval_boundaries.setdefault(key, boundary)
+        return compiled.boundary
+
+    def get_range_bits(self, position, action, stack_depth="standard"):
+        """
+        Get a range as {sub_action: RangeBits}, one 169-bit mask per sub-action.
+        Returns None if not found.
+        """
+        compiled = self.get_compiled_range(position, action, stack_depth)
+        return compiled.bits if compiled is not None else None
+
+    def get_range_notation(self, position, action, stack_depth="standard"):
+        """
+        Get a range as {sub_action: notation} in compressed form ("22+, A2s+, ...").
+        Returns None if not found.
+        """
+        compiled = self.get_compiled_range(position, action, stack_depth)
+        return compiled.notation if compiled is not None else None
+
     def get_available_positions(self):
         """Get list of available positions (excludes metadata keys starting with _)."""
         return [k for k in self.ranges.keys() if not k.startswith('_')]
@@ -109,19 +413,10 @@ class RangeManager:
 
     def get_eval_scenarios(self, position: str, stack_depth: str) -> list[dict]:
         """All scenarios available for this position/stack depth in eval mode."""
-        labels = self.ranges.get('_scenario_labels', {})
-        scenarios = []
-        for action, stack_data in self.ranges.get(position, {}).items():
-            if not isinstance(stack_data, dict) or stack_depth not in stack_data:
-                continue
-            parent = _parent_open_range(position, action)
-            scenarios.append({
-                'action':            action,
-                'label':             labels.get(f'{position}/{action}', _action_label(position, action)),
-                'available_actions': self.get_available_range_actions(position, action, stack_depth),
-                'parent_open':       parent,  # (position, 'open') or None
-            })
-        return scenarios
+        group_id = self.eval_catalog.group_id(position, stack_depth)
+        if group_id is None:
+            return []
+        return [scenario.as_dict() for scenario in self.eval_catalog.group(group_id)]
     
     def get_available_actions(self, position):
         """Get list of available actions for a position, with human-readable labels."""
@@ -144,21 +439,181 @@ class RangeManager:
         Returns a list of action strings.
         Always includes 'fold' (implicitly).
         """
+        compiled = self.get_compiled_range(position, action, stack_depth)
+        return list(compiled.actions) if compiled is not None else []
+
+
+
+
+class RangeManager:
+    """
+    Manages loading and querying poker ranges.
+
+    The compiled library lives in an immutable RangeSnapshot that is swapped
+    atomically on reload; query methods always read the current snapshot.
+    """
+    
+    def __init__(self, ranges_file="ranges.json", cache_bytes=64 * 1024 * 1024):
+        """
+        Initialize with path to a ranges JSON file, a compiled .pack file or a
+        shard directory (see range_shards). `cache_bytes` caps the memory used
+        by compiled shards in directory mode.
+        """
+        self.ranges_file = Path(ranges_file)
+        self.cache_bytes = cache_bytes
+        self.snapshot = RangeSnapshot()
+        self._shard_cache = None
+        self.last_error: str | None = None
+        self._signature = None
+        self._reload_lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop_watching = threading.Event()
+        self.load_ranges()
+
+    @property
+    def is_pack(self) -> bool:
+        """True when the library is a binary range pack (see range_pack)."""
+        return self.ranges_file.suffix == ".pack"
+
+    @property
+    def is_sharded(self) -> bool:
+        """True when the library is a directory of shards loaded on demand."""
+        return self.ranges_file.is_dir()
+
+    @property
+    def ranges(self):
+        """Raw range library of the current snapshot."""
+        return self.snapshot.ranges
+    
+    def load_ranges(self) -> bool:
+        """
+        Load, validate and compile the ranges file, then swap in the new snapshot.
+        On failure the previous snapshot keeps serving and the error is kept in
+        `last_error`. Returns True when a new snapshot was installed.
+        """
+        with self._reload_lock:
+            signature = self._file_signature()
+            if signature is None:
+                print(f"Warning: {self.ranges_file} not found. Keeping current ranges.")
+                self.last_error = f"{self.ranges_file} not found"
+                self._signature = None
+                return False
+
+            try:
+                if self.is_sharded:
+                    from .range_shards import ShardCache, ShardedSnapshot
+                    if self._shard_cache is None:
+                        self._shard_cache = ShardCache(self.cache_bytes)
+                    snapshot = ShardedSnapshot.build(self.ranges_file, self._shard_cache, previous=self.snapshot)
+                else:
+                    if self.is_pack:
+                        ranges = load_pack(self.ranges_file)
+                    else:
+                        with open(self.ranges_file, 'r') as f:
+                            ranges = json.load(f)
+                        _validate_ranges(ranges)
+                    snapshot = RangeSnapshot.build(ranges, previous=self.snapshot, lazy=self.is_pack)
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                # json.JSONDecodeError is a ValueError; bad notation raises ValueError too
+                print(f"Error loading ranges file: {e}")
+                self.last_error = str(e)
+                self._signature = signature
+                return False
+
+            previous, self.snapshot = self.snapshot, snapshot
+            self.last_error = None
+            self._signature = signature
+            if previous.version and not snapshot.lazy:
+                print(f"Reloaded {self.ranges_file}: {snapshot.changed_nodes(previous)} "
+                      f"of {len(snapshot._compiled)} range nodes recompiled")
+            elif previous.version:
+                print(f"Reloaded {self.ranges_file}")
+            return True
+
+    def _file_signature(self):
         try:
-            range_data = self.ranges[position][action][stack_depth]
-            
-            if isinstance(range_data, str):
-                return ["in_range"]
-            elif isinstance(range_data, dict):
-                return list(range_data.keys())
-            return []
-        except KeyError:
-            return []
+            if self.is_sharded:
+                from .range_shards import shard_files
+                return tuple(shard_files(self.ranges_file).items())
+            stat = self.ranges_file.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def cache_stats(self) -> dict:
+        """Shard cache counters (hits, misses, evictions, bytes) in directory mode."""
+        if not self.is_sharded or self._shard_cache is None:
+            return {"sharded": False}
+        return {"sharded": True, "shards": getattr(self.snapshot, "shard_count", 0), **self._shard_cache.stats()}
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the file's mtime or size changed since the last attempt."""
+        if self._file_signature() == self._signature:
+            return False
+        return self.load_ranges()
+
+    def start_watching(self, interval: float = 2.0):
+        """Poll the ranges file in a background thread and hot-reload it on change."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:  # keep the watcher alive whatever happens
+                    print(f"Error watching ranges file: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="ranges-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the background watcher, if running."""
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    # Queries are answered by the current snapshot
+
+    def get_compiled_range(self, position, action, stack_depth="standard") -> CompiledRange | None:
+        return self.snapshot.get_compiled_range(position, action, stack_depth)
+
+    def get_range(self, position, action, stack_depth="standard"):
+        return self.snapshot.get_range(position, action, stack_depth)
+
+    def get_eval_boundary_index(self, position, action, stack_depth) -> BoundaryIndex | None:
+        return self.snapshot.get_eval_boundary_index(position, action, stack_depth)
+
+    def get_range_bits(self, position, action, stack_depth="standard"):
+        return self.snapshot.get_range_bits(position, action, stack_depth)
+
+    def get_range_notation(self, position, action, stack_depth="standard"):
+        return self.snapshot.get_range_notation(position, action, stack_depth)
+
+    def get_available_positions(self):
+        return self.snapshot.get_available_positions()
+
+    def get_eval_stack_depths(self, position: str) -> list[str]:
+        return self.snapshot.get_eval_stack_depths(position)
+
+    def get_eval_scenarios(self, position: str, stack_depth: str) -> list[dict]:
+        return self.snapshot.get_eval_scenarios(position, stack_depth)
+
+    def get_available_actions(self, position):
+        return self.snapshot.get_available_actions(position)
+
+    def get_available_stack_depths(self, position, action):
+        return self.snapshot.get_available_stack_depths(position, action)
+
+    def get_available_range_actions(self, position, action, stack_depth):
+        return self.snapshot.get_available_range_actions(position, action, stack_depth)
 
 
 if __name__ == "__main__":
     # Test range manager
-    rm = RangeManager("ranges.json")
+    rm = RangeManager(Path(__file__).parent / "ranges.json")
     print(f"Available positions: {rm.get_available_positions()}")
     
     if rm.get_available_positions():
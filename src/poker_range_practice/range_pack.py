@@ -0,0 +1,189 @@
+"""
+Binary, memory-mappable range packs.
+
+`poker-practice-compile ranges.json -o ranges.pack` expands every range node into a
+169-byte action array once, so RangeManager can mmap the pack at boot instead of
+running json.load and notation parsing. Worker processes mapping the same file
+share its pages.
+
+Layout (little-endian):
+    header   MAGIC, u32 string count, u32 meta count, u32 node count, u32 slots offset
+    strings  u16 length + UTF-8 bytes each; every name (positions, actions, depths,
+             sub-actions, labels) is stored once and referenced by index
+    meta     u16 name, u32 pair count, pairs of (u16 key, u16 value), e.g. _scenario_labels
+    nodes    u16 position, u16 action, u16 stack depth, u8 sub-action count, u16 sub-actions
+    slots    169 bytes per node, in node order: 0 = fold, k = k-th sub-action
+
+A loaded library keeps views into the mapping, so a pack in use must never be
+rewritten in place: shrinking it crashes the reading process (SIGBUS) and a
+same-size rewrite mixes old and new slots. write_pack replaces the file
+atomically instead; running processes keep the old file until they reload.
+"""
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+from .poker_hands import Hand
+
+MAGIC = b"PRPACK01"
+_HEADER = struct.Struct("<8sIIII")
+_SLOTS = 169
+
+
+class PackedNode:
+    """One range node read from a pack: sub-action names plus a 169-slot array view."""
+
+    __slots__ = ('actions', 'slots')
+
+    def __init__(self, actions, slots):
+        self.actions = actions
+        self.slots = slots
+
+    def hand_actions(self) -> dict:
+        """{Hand: sub_action} for every in-range hand, in canonical order."""
+        actions = self.actions
+        return {
+            Hand.from_index(i): actions[slot - 1]
+            for i, slot in enumerate(self.slots) if slot
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedNode):
+            return NotImplemented
+        return self.actions == other.actions and bytes(self.slots) == bytes(other.slots)
+
+    __hash__ = None
+
+
+def pack_ranges(ranges) -> bytes:
+    """Serialize a raw range library (as loaded from ranges.json) into pack bytes."""
+    from .range_manager import compile_range
+
+    strings: dict[str, int] = {}
+
+    def sid(text):
+        if text not in strings:
+            if len(strings) >= 0xFFFF:
+                raise ValueError("Too many distinct names for a range pack")
+            strings[text] = len(strings)
+        return strings[text]
+
+    meta = []
+    nodes = []
+    slots = bytearray()
+    for position, actions in ranges.items():
+        if position.startswith('_'):
+            if isinstance(actions, dict) and all(isinstance(v, str) for v in actions.values()):
+                meta.append((sid(position), [(sid(k), sid(v)) for k, v in actions.items()]))
+            continue
+        for action, stack_data in actions.items():
+            for stack_depth, range_data in stack_data.items():
+                compiled = compile_range(range_data)
+                if compiled is None:
+                    print(f"Unknown range data type: {type(range_data)}")
+                    continue
+                if len(compiled.actions) > 255:
+                    raise ValueError(f"{position}/{action}/{stack_depth}: too many sub-actions")
+                node_slots = bytearray(_SLOTS)
+                for hand, sub_action in compiled.hands.items():
+                    node_slots[hand.index] = compiled.actions.index(sub_action) + 1
+                nodes.append((sid(position), sid(action), sid(stack_depth),
+                               [sid(a) for a in compiled.actions]))
+                slots += node_slots
+
+    body = bytearray()
+    for text in strings:
+        encoded = text.encode("utf-8")
+        body += struct.pack("<H", len(encoded)) + encoded
+    for name, pairs in meta:
+        body += struct.pack("<HI", name, len(pairs))
+        for key, value in pairs:
+            body += struct.pack("<HH", key, value)
+    for position, action, stack_depth, sub_actions in nodes:
+        body += struct.pack("<HHHB", position, action, stack_depth, len(sub_actions))
+        body += struct.pack(f"<{len(sub_actions)}H", *sub_actions)
+
+    # Align the slot arrays so they start on their own 8-byte boundary
+    slots_offset = _HEADER.size + len(body)
+    padding = -slots_offset % 8
+    slots_offset += padding
+    header = _HEADER.pack(MAGIC, len(strings), len(meta), len(nodes), slots_offset)
+    return header + bytes(body) + bytes(padding) + bytes(slots)
+
+
+def write_pack(path, data: bytes):
+    """Write pack bytes to a temporary file next to `path`, then rename it over `path`."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp, 0o666 & ~umask)  # mkstemp creates the file 0600
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_pack(path) -> dict:
+    """
+    Map a range pack and return a library shaped like ranges.json, whose range
+    nodes are PackedNode views into the mapping (nothing is parsed or copied).
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    magic, n_strings, n_meta, n_nodes, slots_offset = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a range pack")
+
+    offset = _HEADER.size
+    strings = []
+    for _ in range(n_strings):
+        (length,) = struct.unpack_from("<H", view, offset)
+        offset += 2
+        strings.append(str(view[offset:offset + length], "utf-8"))
+        offset += length
+
+    ranges: dict = {}
+    for _ in range(n_meta):
+        name, n_pairs = struct.unpack_from("<HI", view, offset)
+        offset += 6
+        pairs = struct.unpack_from(f"<{2 * n_pairs}H", view, offset)
+        offset += 4 * n_pairs
+        ranges[strings[name]] = {strings[k]: strings[v] for k, v in zip(pairs[::2], pairs[1::2])}
+
+    for i in range(n_nodes):
+        position, action, stack_depth, n_actions = struct.unpack_from("<HHHB", view, offset)
+        offset += 7
+        sub_actions = struct.unpack_from(f"<{n_actions}H", view, offset)
+        offset += 2 * n_actions
+        start = slots_offset + i * _SLOTS
+        node = PackedNode(tuple(strings[a] for a in sub_actions), view[start:start + _SLOTS])
+        ranges.setdefault(strings[position], {}).setdefault(strings[action], {})[strings[stack_depth]] = node
+    return ranges
+
+
+def main(argv=None):
+    """Entry point for `poker-practice-compile`."""
+    import json
+
+    parser = argparse.ArgumentParser(description="Compile a ranges.json library into a binary range pack.")
+    parser.add_argument("source", type=Path, help="ranges JSON file")
+    parser.add_argument("-o", "--output", type=Path, help="output pack (default: SOURCE with a .pack suffix)")
+    args = parser.parse_args(argv)
+
+    output = args.output or args.source.with_suffix(".pack")
+    with open(args.source, "r") as f:
+        data = pack_ranges(json.load(f))
+    write_pack(output, data)
+    print(f"Wrote {output} ({len(data):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Directory-backed range libraries, split into shards that load on first use.
+
+A library directory holds shard files shaped like ranges.json (`*.json`) or
+compiled range packs (`*.pack`), e.g. one shard per stack depth, plus an
+`index.json` listing the positions, actions and stack depths each shard defines.
+At boot only the index is read (a missing or outdated index is rebuilt from the
+shards and saved). A shard is parsed and compiled the first time
+one of its nodes is looked up, and the least recently used shards are dropped
+once the compiled shards outgrow the memory budget.
+
+`poker-practice-shard split ranges.json DIR` splits a library into shards and
+writes the index; `poker-practice-shard index DIR` rebuilds it after edits.
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from .metrics import RANGE_CACHE
+from .poker_hands import build_boundary_index, BoundaryIndex
+from .range_manager import (
+    CompiledRange,
+    RangeSnapshot,
+    compile_range,
+    _parent_open_range,
+    _validate_ranges,
+)
+from .range_pack import PackedNode, load_pack, pack_ranges, write_pack
+
+INDEX_FILE = "index.json"
+SHARD_SUFFIXES = (".json", ".pack")
+
+
+class ShardNode:
+    """Index entry for one range node: the shard defining it and its sub-actions."""
+
+    __slots__ = ('shard', 'actions')
+
+    def __init__(self, shard, actions):
+        self.shard = shard
+        self.actions = actions
+
+
+def shard_files(directory) -> dict[str, tuple[int, int]]:
+    """{shard file name: (mtime_ns, size)} for every shard in a library directory."""
+    files = {}
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix in SHARD_SUFFIXES and path.name != INDEX_FILE and path.is_file():
+            stat = path.stat()
+            files[path.name] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def read_shard(path) -> dict:
+    """Load the raw library of one shard (JSON or range pack)."""
+    path = Path(path)
+    if path.suffix == ".pack":
+        return load_pack(path)
+    with open(path, "r") as f:
+        ranges = json.load(f)
+    _validate_ranges(ranges)
+    return ranges
+
+
+def _node_actions(range_data):
+    """Sub-actions of a raw node, in the order compile_range keeps them."""
+    if isinstance(range_data, str):
+        return ["in_range"]
+    if isinstance(range_data, dict):
+        return list(range_data)
+    if isinstance(range_data, PackedNode):
+        return list(range_data.actions)
+    return None
+
+
+def _index_entry(ranges, signature) -> dict:
+    """Index entry for one shard: file signature, node tree and metadata."""
+    nodes = {}
+    meta = {}
+    for position, actions in ranges.items():
+        if position.startswith('_'):
+            meta[position] = actions
+            continue
+        for action, stack_data in actions.items():
+            for stack_depth, range_data in stack_data.items():
+                sub_actions = _node_actions(range_data)
+                if sub_actions is None:
+                    print(f"Unknown range data type: {type(range_data)}")
+                    continue
+                nodes.setdefault(position, {}).setdefault(action, {})[stack_depth] = sub_actions
+    return {"signature": list(signature), "nodes": nodes, "meta": meta}
+
+
+def build_index(directory, previous=None) -> dict:
+    """
+    Index every shard in `directory`. Entries of a `previous` index whose file
+    signature still matches are reused, so only new or edited shards are read.
+    """
+    known = previous.get("shards", {}) if isinstance(previous, dict) else {}
+    shards = {}
+    for name, signature in shard_files(directory).items():
+        entry = known.get(name)
+        if not isinstance(entry, dict) or entry.get("signature") != list(signature):
+            entry = _index_entry(read_shard(Path(directory) / name), signature)
+        shards[name] = entry
+    return {"shards": shards}
+
+
+def load_index(directory) -> dict:
+    """
+    Read the stored index.json, refreshed against the shards on disk. When that
+    meant reading shards (no index yet, new or edited shards), the refreshed
+    index is written back, so the next boot reads none of them.
+    """
+    path = Path(directory) / INDEX_FILE
+    stored = None
+    if path.is_file():
+        try:
+            with open(path, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable {path}: {e}")
+    index = build_index(directory, stored)
+    if index != stored:
+        try:
+            _save_index(directory, index)
+        except OSError as e:
+            print(f"Warning: could not write {path}, every boot will read the new shards: {e}")
+    return index
+
+
+def write_index(directory) -> dict:
+    """Rebuild index.json from every shard in `directory`."""
+    index = build_index(directory)
+    _save_index(directory, index)
+    return index
+
+
+def _save_index(directory, index):
+    # Replaced atomically like packs: other workers may be reading it
+    write_pack(Path(directory) / INDEX_FILE, json.dumps(index, indent=1).encode("utf-8"))
+
+
+def estimate_bytes(node: CompiledRange) -> int:
+    """Rough memory footprint of a compiled node (Hand objects are shared, not counted)."""
+    size = sys.getsizeof(node.__dict__) + sys.getsizeof(node.combos.mask)
+    size += sys.getsizeof(node.hands) + sys.getsizeof(dict(node.hands))
+    size += sys.getsizeof(node.played) + sys.getsizeof(node.closest) + sys.getsizeof(node.bottom)
+    size += sys.getsizeof(node.boundary.hands)
+    if node.boundary.weighted_hands is not node.boundary.hands:
+        size += sys.getsizeof(node.boundary.weighted_hands)
+    for action, hands in node.by_action.items():
+        size += sys.getsizeof(hands) + sys.getsizeof(node.bits[action].mask) + 2 * 64
+    return size
+
+
+class LoadedShard:
+    """The compiled nodes of one shard, plus eval boundary indexes built on demand."""
+
+    __slots__ = ('nodes', 'eval_boundaries', 'size')
+
+    def __init__(self, nodes):
+        self.nodes: dict[tuple[str, str, str], CompiledRange] = nodes
+        self.eval_boundaries: dict[tuple[str, str, str], BoundaryIndex] = {}
+        self.size = sum(estimate_bytes(node) for node in nodes.values())
+
+
+class ShardCache:
+    """
+    LRU cache of compiled shards under a memory budget, shared by every snapshot.
+
+    Keys are (shard name, file signature), so snapshots from before and after a
+    reload never share a stale shard. Hit, miss and eviction counters are
+    cumulative. A single shard larger than the budget is still kept while it is
+    the only one loaded.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._shards: OrderedDict[tuple, LoadedShard] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load) -> LoadedShard:
+        """Return the cached shard for `key`, calling `load()` on a miss."""
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is not None:
+                self._shards.move_to_end(key)
+                self.hits += 1
+                RANGE_CACHE.inc(1, ("shard", "hit"))
+                return shard
+            self.misses += 1
+            RANGE_CACHE.inc(1, ("shard", "miss"))
+
+        # Compile outside the lock; concurrent misses may both load, the first one wins
+        shard = load()
+        with self._lock:
+            existing = self._shards.get(key)
+            if existing is not None:
+                return existing
+            self._shards[key] = shard
+            self.bytes += shard.size
+            while self.bytes > self.budget_bytes and len(self._shards) > 1:
+                _, evicted = self._shards.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+        return shard
+
+    def retain(self, keys):
+        """Drop every shard whose key is not in `keys` (superseded by a reload)."""
+        with self._lock:
+            for key in [k for k in self._shards if k not in keys]:
+                self.bytes -= self._shards.pop(key).size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": len(self._shards),
+                "bytes": self.bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class ShardedSnapshot(RangeSnapshot):
+    """
+    A RangeSnapshot over a shard directory. `ranges` is the index skeleton, with
+    a ShardNode in place of each range node; lookups compile through the cache.
+    Nothing else keeps a compiled node (eval catalog groups are rebuilt per use,
+    responses are cached on the node), so evicting a shard frees its memory.
+    """
+
+    pins_nodes = False
+
+    def __init__(self, directory, index, cache: ShardCache, version=0):
+        ranges: dict = {}
+        for name, entry in index["shards"].items():
+            for key, value in entry["meta"].items():
+                if isinstance(value, dict) and isinstance(ranges.get(key), dict):
+                    ranges[key].update(value)
+                else:
+                    ranges[key] = value
+            for position, actions in entry["nodes"].items():
+                for action, stack_data in actions.items():
+                    for stack_depth, sub_actions in stack_data.items():
+                        depths = ranges.setdefault(position, {}).setdefault(action, {})
+                        if stack_depth in depths:
+                            print(f"{position}/{action}/{stack_depth} is defined by "
+                                  f"{depths[stack_depth].shard} and {name}; using {name}")
+                        depths[stack_depth] = ShardNode(name, tuple(sub_actions))
+        super().__init__(ranges, version=version, lazy=True)
+        self.directory = Path(directory)
+        self.cache = cache
+        self._signatures = {name: tuple(entry["signature"]) for name, entry in index["shards"].items()}
+
+    @classmethod
+    def build(cls, directory, cache: ShardCache, previous=None):
+        """Index a shard directory into a new snapshot; nothing is compiled yet."""
+        snapshot = cls(directory, load_index(directory), cache,
+                       version=(previous.version if previous is not None else 0) + 1)
+        cache.retain(set(snapshot._signatures.items()))
+        return snapshot
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._signatures)
+
+    def _load_shard(self, name) -> LoadedShard:
+        nodes = {}
+        for position, actions in read_shard(self.directory / name).items():
+            if position.startswith('_'):
+                continue
+            for action, stack_data in actions.items():
+                for stack_depth, range_data in stack_data.items():
+                    entry = self.ranges.get(position, {}).get(action, {}).get(stack_depth)
+                    if not isinstance(entry, ShardNode) or entry.shard != name:
+                        continue
+                    compiled = compile_range(range_data)
+                    if compiled is not None:
+                        nodes[(position, action, stack_depth)] = compiled
+        return LoadedShard(nodes)
+
+    def _lookup(self, position, action, stack_depth) -> tuple[LoadedShard | None, CompiledRange | None]:
+        if position.startswith('_'):
+            return None, None
+        entry = self.ranges.get(position, {}).get(action, {}).get(stack_depth)
+        if not isinstance(entry, ShardNode):
+            return None, None
+        name = entry.shard
+        try:
+            shard = self.cache.get((name, self._signatures[name]), lambda: self._load_shard(name))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"Error loading range shard {name}: {e}")
+            return None, None
+        return shard, shard.nodes.get((position, action, stack_depth))
+
+    def get_compiled_range(self, position, action, stack_depth="standard") -> CompiledRange | None:
+        """Return the compiled node, loading its shard on first use; None if not found."""
+        return self._lookup(position, action, stack_depth)[1]
+
+    def get_eval_boundary_index(self, position, action, stack_depth) -> BoundaryIndex | None:
+        shard, compiled = self._lookup(position, action, stack_depth)
+        if compiled is None:
+            return None
+        parent = _parent_open_range(position, action)
+        parent_node = self.get_compiled_range(*parent, stack_depth) if parent is not None else None
+        if parent_node is None or not parent_node.played:
+            return compiled.boundary
+        key = (position, action, stack_depth)
+        boundary = shard.eval_boundaries.get(key)
+        if boundary is None:
+            boundary = build_boundary_index(compiled.hands, parent_node.played)
+            boundary = shard.eval_boundaries.setdefault(key, boundary)
+        return boundary
+
+    def get_available_range_actions(self, position, action, stack_depth):
+        """Sub-actions of a node, answered from the index without loading its shard."""
+        if position.startswith('_'):
+            return []
+        entry = self.ranges.get(position, {}).get(action, {}).get(stack_depth)
+        return list(entry.actions) if isinstance(entry, ShardNode) else []
+
+
+def _shard_name(i, key, suffix) -> str:
+    # Numbered so that sorted file order keeps the library's original order
+    return f"{i:02d}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', key)}{suffix}"
+
+
+def split_ranges(ranges, by="stack_depth") -> dict[str, dict]:
+    """
+    Split a raw library into {shard key: sub-library}, one shard per stack depth
+    or per position. Metadata entries (keys starting with _) go into every shard.
+    """
+    meta = {k: v for k, v in ranges.items() if k.startswith('_')}
+    shards: dict[str, dict] = {}
+    for position, actions in ranges.items():
+        if position.startswith('_'):
+            continue
+        for action, stack_data in actions.items():
+            for stack_depth, range_data in stack_data.items():
+                shard_key = stack_depth if by == "stack_depth" else position
+                shard = shards.setdefault(shard_key, dict(meta))
+                shard.setdefault(position, {}).setdefault(action, {})[stack_depth] = range_data
+    return shards
+
+
+def main(argv=None):
+    """Entry point for `poker-practice-shard`."""
+    parser = argparse.ArgumentParser(description="Split a range library into shards and index it.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    split = commands.add_parser("split", help="split a ranges.json library into a shard directory")
+    split.add_argument("source", type=Path, help="ranges JSON file")
+    split.add_argument("directory", type=Path, help="output shard directory")
+    split.add_argument("--by", choices=["stack_depth", "position"], default="stack_depth")
+    split.add_argument("--pack", action="store_true", help="write compiled range packs instead of JSON")
+    reindex = commands.add_parser("index", help="rebuild index.json for a shard directory")
+    reindex.add_argument("directory", type=Path, help="shard directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "split":
+        with open(args.source, "r") as f:
+            ranges = json.load(f)
+        _validate_ranges(ranges)
+        args.directory.mkdir(parents=True, exist_ok=True)
+        for i, (key, shard) in enumerate(split_ranges(ranges, args.by).items()):
+            path = args.directory / _shard_name(i, key, ".pack" if args.pack else ".json")
+            if args.pack:
+                write_pack(path, pack_ranges(shard))
+            else:
+                with open(path, "w") as f:
+                    json.dump(shard, f, indent=2)
+    index = write_index(args.directory)
+    nodes = sum(
+        len(stack_data)
+        for entry in index["shards"].values()
+        for actions in entry["nodes"].values()
+        for stack_data in actions.values()
+    )
+    print(f"Indexed {len(index['shards'])} shards ({nodes} range nodes) in {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Per-user range libraries stored in SQLite.
+
+Each user's library overlays the shared one loaded from RANGES_FILE: a stored
+node replaces the shared node at the same position/action/stack depth (or adds
+a new one), so a coach only stores the ranges they changed. Rows are keyed by
+(user, position, action, stack_depth); the database runs in WAL mode so readers
+never block the writer, and a small pool of connections is shared by the
+request threads.
+
+Writing a library takes its token: the first write to a library issues one,
+and only its SHA-256 is stored.
+"""
+import hashlib
+import json
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from .metrics import RANGE_CACHE
+from .poker_hands import build_boundary_index, BoundaryIndex
+from .range_manager import (
+    CompiledRange,
+    RangeManager,
+    RangeSnapshot,
+    compile_range,
+    _parent_open_range,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ranges (
+    user        TEXT NOT NULL,
+    position    TEXT NOT NULL,
+    action      TEXT NOT NULL,
+    stack_depth TEXT NOT NULL,
+    data        TEXT NOT NULL,  -- JSON: notation string or {sub_action: notation}
+    PRIMARY KEY (user, position, action, stack_depth)
+);
+CREATE TABLE IF NOT EXISTS library_versions (
+    user    TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS library_owners (
+    user       TEXT PRIMARY KEY,
+    token_hash TEXT NOT NULL  -- hex SHA-256 of the library's write token
+);
+"""
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class ConnectionPool:
+    """A fixed-size pool of SQLite connections in WAL mode, shared across threads."""
+
+    def __init__(self, path, size=4, timeout=5.0):
+        self.path = str(path)
+        self.size = size
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except sqlite3.Error:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No SQLite connection free after {self.timeout}s") from None
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Close the idle connections; the pool reconnects if used again."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+class RangeStore:
+    """SQLite storage for per-user range nodes, with a version counter per user."""
+
+    def __init__(self, path, pool_size=4):
+        self.path = Path(path)
+        self.pool = ConnectionPool(self.path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def version(self, user) -> int:
+        """Version of a user's library; bumped by every write, 0 if never written."""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT version FROM library_versions WHERE user = ?", (user,)).fetchone()
+        return row[0] if row else 0
+
+    def load(self, user) -> tuple[int, list[tuple[str, str, str, object]]]:
+        """(version, [(position, action, stack_depth, range_data), ...]) in write order."""
+        with self.pool.connection() as conn:
+            # One read transaction, so the version matches the rows
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute("SELECT version FROM library_versions WHERE user = ?", (user,)).fetchone()
+                rows = conn.execute(
+                    "SELECT position, action, stack_depth, data FROM ranges WHERE user = ? ORDER BY rowid",
+                    (user,),
+                ).fetchall()
+            finally:
+                conn.rollback()
+        return (row[0] if row else 0), [(p, a, d, json.loads(data)) for p, a, d, data in rows]
+
+    def claim(self, user):
+        """Issue the write token of a library nobody owns yet; None if it already has one."""
+        token = secrets.token_urlsafe(24)
+        with self.pool.connection() as conn, conn:
+            claimed = conn.execute(
+                "INSERT INTO library_owners (user, token_hash) VALUES (?, ?) ON CONFLICT (user) DO NOTHING",
+                (user, _token_hash(token)),
+            ).rowcount
+        return token if claimed else None
+
+    def check_token(self, user, token) -> bool:
+        """Whether `token` is the write token of the user's library."""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT token_hash FROM library_owners WHERE user = ?", (user,)).fetchone()
+        return row is not None and secrets.compare_digest(row[0], _token_hash(token))
+
+    def _write(self, user, statement, params) -> int:
+        with self.pool.connection() as conn, conn:
+            changed = conn.execute(statement, params).rowcount
+            if changed:
+                conn.execute(
+                    "INSERT INTO library_versions (user, version) VALUES (?, 1) "
+                    "ON CONFLICT (user) DO UPDATE SET version = version + 1",
+                    (user,),
+                )
+        return changed
+
+    def put_range(self, user, position, action, stack_depth, range_data):
+        """Store (insert or replace) one range node for a user."""
+        self._write(
+            user,
+            "INSERT INTO ranges (user, position, action, stack_depth, data) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (user, position, action, stack_depth) DO UPDATE SET data = excluded.data",
+            (user, position, action, stack_depth, json.dumps(range_data)),
+        )
+
+    def delete_range(self, user, position, action, stack_depth) -> bool:
+        """Delete one of a user's nodes; the shared node (if any) shows through again."""
+        return bool(self._write(
+            user,
+            "DELETE FROM ranges WHERE user = ? AND position = ? AND action = ? AND stack_depth = ?",
+            (user, position, action, stack_depth),
+        ))
+
+    def close(self):
+        self.pool.close()
+
+
+class OverlaySnapshot(RangeSnapshot):
+    """
+    A user's library: their own compiled nodes on top of a shared snapshot.
+
+    `ranges` merges both trees for the listing queries; lookups of nodes the user
+    did not override go straight to the shared snapshot and its precomputed indexes.
+    """
+
+    def __init__(self, base: RangeSnapshot, nodes, previous=None):
+        ranges = {
+            position: {action: dict(stack_data) for action, stack_data in actions.items()}
+            if not position.startswith('_') else actions
+            for position, actions in base.ranges.items()
+        }
+        own: dict[tuple[str, str, str], object] = {}
+        compiled: dict[tuple[str, str, str], CompiledRange] = {}
+        reusable = previous if isinstance(previous, OverlaySnapshot) else None
+        for position, action, stack_depth, range_data in nodes:
+            key = (position, action, stack_depth)
+            if reusable is not None and reusable._own.get(key) == range_data:
+                node = reusable._compiled[key]
+            else:
+                node = compile_range(range_data)
+                if node is None:
+                    print(f"Unknown range data type: {type(range_data)}")
+                    continue
+            own[key] = range_data
+            compiled[key] = node
+            ranges.setdefault(position, {}).setdefault(action, {})[stack_depth] = range_data
+        # Set before the base initializer, which builds the eval catalog through the lookups below
+        self.base = base
+        self._own = own
+        super().__init__(ranges, compiled, version=(previous.version if previous is not None else base.version) + 1,
+                         lazy=base.lazy)
+
+    @property
+    def pins_nodes(self) -> bool:
+        return self.base.pins_nodes
+
+    def get_compiled_range(self, position, action, stack_depth="standard") -> CompiledRange | None:
+        compiled = self._compiled.get((position, action, stack_depth))
+        if compiled is not None:
+            return compiled
+        return self.base.get_compiled_range(position, action, stack_depth)
+
+    def get_eval_boundary_index(self, position, action, stack_depth) -> BoundaryIndex | None:
+        key = (position, action, stack_depth)
+        parent = _parent_open_range(position, action)
+        if key not in self._own and (parent is None or (*parent, stack_depth) not in self._own):
+            return self.base.get_eval_boundary_index(position, action, stack_depth)
+        boundary = self._eval_boundaries.get(key)
+        if boundary is not None:
+            return boundary
+        compiled = self.get_compiled_range(position, action, stack_depth)
+        if compiled is None:
+            return None
+        parent_node = self.get_compiled_range(*parent, stack_depth) if parent is not None else None
+        if parent_node is None or not parent_node.played:
+            return compiled.boundary
+        boundary = build_boundary_index(compiled.hands, parent_node.played)
+        return self._eval_boundaries.setdefault(key, boundary)
+
+    def get_available_range_actions(self, position, action, stack_depth):
+        if (position, action, stack_depth) in self._compiled:
+            return super().get_available_range_actions(position, action, stack_depth)
+        return self.base.get_available_range_actions(position, action, stack_depth)
+
+
+class _TenantEntry:
+    __slots__ = ('snapshot', 'version', 'base', 'checked_at')
+
+    def __init__(self, snapshot, version, base, checked_at):
+        self.snapshot = snapshot
+        self.version = version
+        self.base = base
+        self.checked_at = checked_at
+
+
+class TenantRanges:
+    """
+    Compiled libraries of each user, cached per tenant (least recently used
+    tenants are dropped past `max_tenants`).
+
+    Writes through this object invalidate the writer's cached library at once.
+    Writes from other processes are picked up when the stored version changes,
+    which is checked at most every `check_interval` seconds per tenant.
+    """
+
+    def __init__(self, store: RangeStore, shared: RangeManager, max_tenants=256, check_interval=1.0):
+        self.store = store
+        self.shared = shared
+        self.max_tenants = max_tenants
+        self.check_interval = check_interval
+        self._entries: OrderedDict[str, _TenantEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def snapshot(self, user) -> RangeSnapshot:
+        """The user's compiled library (the shared one if they stored nothing)."""
+        base = self.shared.snapshot
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user)
+            if entry is not None:
+                self._entries.move_to_end(user)
+        if entry is not None and entry.base is base:
+            if now - entry.checked_at < self.check_interval:
+                RANGE_CACHE.inc(1, ("tenant", "hit"))
+                return entry.snapshot
+            if self.store.version(user) == entry.version:
+                entry.checked_at = now
+                RANGE_CACHE.inc(1, ("tenant", "hit"))
+                return entry.snapshot
+
+        RANGE_CACHE.inc(1, ("tenant", "miss"))
+        version, nodes = self.store.load(user)
+        if nodes:
+            snapshot = OverlaySnapshot(base, nodes, previous=entry.snapshot if entry is not None else None)
+        else:
+            snapshot = base
+        with self._lock:
+            self._entries[user] = _TenantEntry(snapshot, version, base, now)
+            self._entries.move_to_end(user)
+            while len(self._entries) > self.max_tenants:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user):
+        """Mark a user's cached library stale; the next lookup rebuilds it."""
+        with self._lock:
+            entry = self._entries.get(user)
+            if entry is not None:
+                # Keep the snapshot so unchanged nodes are reused by the rebuild
+                entry.checked_at = float("-inf")
+                entry.version = -1
+
+    @staticmethod
+    def check_range(position, range_data) -> CompiledRange:
+        """Compile a node about to be stored; ValueError if it cannot be."""
+        if position.startswith('_'):
+            raise ValueError("Position names starting with '_' are reserved")
+        if not isinstance(range_data, str) and not (
+                isinstance(range_data, dict) and all(isinstance(v, str) for v in range_data.values())):
+            raise ValueError("Range must be a notation string or an object of notation strings")
+        return compile_range(range_data)
+
+    def put_range(self, user, position, action, stack_depth, range_data) -> CompiledRange:
+        """Validate, store and return one of a user's range nodes."""
+        compiled = self.check_range(position, range_data)
+        self.store.put_range(user, position, action, stack_depth, range_data)
+        self.invalidate(user)
+        return compiled
+
+    def delete_range(self, user, position, action, stack_depth) -> bool:
+        deleted = self.store.delete_range(user, position, action, stack_depth)
+        if deleted:
+            self.invalidate(user)
+        return deleted
@@ -0,0 +1,243 @@
+"""
+Server-side sessions: the cookie holds only an opaque random id.
+
+Starlette's SessionMiddleware signs the whole session into the cookie, so every
+request re-sends and re-verifies data that grows with the eval selection.
+ServerSessionMiddleware keeps the data in a store instead and provides the same
+`request.session` dict; the store is written only when a request changed it.
+
+Both middlewares also save a session a websocket handler changed before
+accepting, through a Set-Cookie header on the accept.
+
+Stores: MemorySessionStore (per process, LRU with TTL) and SQLiteSessionStore
+(shared by every worker using the same database file).
+"""
+import json
+import secrets
+import threading
+import time
+from base64 import b64encode
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.requests import HTTPConnection
+
+from .range_store import ConnectionPool
+
+DEFAULT_TTL = 14 * 24 * 60 * 60  # same as SessionMiddleware's cookie max_age
+
+
+class Session(dict):
+    """A session dict that records whether the request changed it."""
+
+    modified = False
+
+    def __setitem__(self, key, value):
+        self.modified = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.modified = True
+        super().__delitem__(key)
+
+    def clear(self):
+        self.modified = True
+        super().clear()
+
+    def pop(self, *args):
+        self.modified = True
+        return super().pop(*args)
+
+    def popitem(self):
+        self.modified = True
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.modified = True
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.modified = True
+        super().update(*args, **kwargs)
+
+
+class MemorySessionStore:
+    """
+    Sessions in this process's memory, least recently used dropped past
+    `max_sessions`. Sessions expire `ttl` seconds after their last write.
+    """
+
+    blocking = False
+
+    def __init__(self, max_sessions=10_000, ttl=DEFAULT_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, session_id) -> dict | None:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.monotonic():
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return dict(data)
+
+    def save(self, session_id, data: dict):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic() + self.ttl, data)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    """
+    Sessions as JSON rows in SQLite (WAL mode, pooled connections), shared by
+    every worker process. Expired rows are purged every `purge_every` writes.
+    """
+
+    blocking = True
+
+    def __init__(self, path, ttl=DEFAULT_TTL, pool_size=4, purge_every=1000):
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self.pool = ConnectionPool(path, pool_size)
+        self._writes = 0
+        with self.pool.connection() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires);"
+            )
+
+    def load(self, session_id) -> dict | None:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires >= ?", (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id, data: dict):
+        now = time.time()
+        self._writes += 1
+        with self.pool.connection() as conn, conn:
+            conn.execute(
+                "INSERT INTO sessions (id, data, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET data = excluded.data, expires = excluded.expires",
+                (session_id, json.dumps(data, separators=(",", ":")), now + self.ttl),
+            )
+            if self._writes % self.purge_every == 0:
+                conn.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+
+    def delete(self, session_id):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def close(self):
+        self.pool.close()
+
+
+class CookieSessionMiddleware(SessionMiddleware):
+    """
+    Starlette's signed-cookie SessionMiddleware, which only sets its cookie on
+    HTTP responses, extended to websockets: the cookie goes on the accept.
+    Changes made after the accept cannot reach the client and are lost.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "websocket":
+            await super().__call__(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            session = scope["session"]
+            if message["type"] == "websocket.accept" and session and getattr(session, "modified", True):
+                data = self.signer.sign(b64encode(json.dumps(session).encode("utf-8"))).decode("utf-8")
+                max_age = f"Max-Age={self.max_age}; " if self.max_age is not None else ""
+                message.setdefault("headers", [])
+                MutableHeaders(scope=message).append(
+                    "Set-Cookie", f"{self.session_cookie}={data}; path={self.path}; {max_age}{self.security_flags}"
+                )
+            await send(message)
+
+        await super().__call__(scope, receive, send_wrapper)
+
+
+class ServerSessionMiddleware:
+    """
+    Drop-in replacement for SessionMiddleware backed by a session store.
+    The cookie carries a random 32-character id and is (re)sent only when the
+    session changes; an emptied session is deleted and its cookie expired.
+    """
+
+    def __init__(self, app, store, session_cookie="session", max_age=DEFAULT_TTL,
+                 path="/", same_site="lax", https_only=False):
+        self.app = app
+        self.store = store
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.security_flags = f"path={path}; httponly; samesite={same_site}" + ("; secure" if https_only else "")
+
+    async def _call_store(self, method, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = HTTPConnection(scope).cookies.get(self.session_cookie)
+        data = await self._call_store(self.store.load, session_id) if session_id else None
+        if data is None:
+            session_id = None
+        session = Session(data or {})
+        scope["session"] = session
+
+        async def persist(headers):
+            nonlocal session_id
+            session.modified = False
+            if session:
+                if session_id is None:
+                    session_id = secrets.token_urlsafe(24)
+                await self._call_store(self.store.save, session_id, dict(session))
+                headers.append(
+                    "Set-Cookie",
+                    f"{self.session_cookie}={session_id}; Max-Age={self.max_age}; {self.security_flags}",
+                )
+            elif session_id is not None:
+                await self._call_store(self.store.delete, session_id)
+                headers.append(
+                    "Set-Cookie",
+                    f"{self.session_cookie}=null; expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}",
+                )
+
+        async def send_wrapper(message):
+            # A websocket's only chance to set the cookie is its accept message
+            if message["type"] in ("http.response.start", "websocket.accept") and session.modified:
+                message.setdefault("headers", [])
+                await persist(MutableHeaders(scope=message))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Changes made after a websocket was accepted: saved under the id its cookie already carries
+            if scope["type"] == "websocket" and session.modified and session_id is not None:
+                await persist(MutableHeaders())
@@ -22,6 +22,17 @@ let evalHandCount = 20;
 let evalHandsDone = 0;
 let evalResults = {};  // key -> { correct, total, label, position, action, stackDepth }
 
+// Classic mode drills from a prefetched batch of hands graded locally;
+// answers are reported back to the server in bulk
+const HAND_BATCH_SIZE   = 50;
+const HAND_REFILL_AT    = 5;
+const ANSWER_FLUSH_SIZE = 25;
+let handQueue = [];
+let handQueueRefill = null;
+let pendingAnswers = [];
+let answersInFlight = Promise.resolve();
+let currentItem = null;
+
 let currentHand = null;
 let currentScenario = { action: null, label: null, position: null, stackDepth: null };
 
@@ -68,6 +79,8 @@ function setupEventListeners() {
     document.getElementById('results-back-btn').addEventListener('click', backToMenu);
     document.getElementById('results-retry-btn').addEventListener('click', retryEval);
 
+    window.addEventListener('pagehide', flushAnswers);
+
     document.getElementById('eval-count-input').addEventListener('input', e => {
         const v = parseInt(e.target.value, 10);
         if (v > 0) evalHandCount = v;
@@ -262,8 +275,12 @@ async function startPractice() {
     currentConfig.position   = evalMode ? null : positionSelect.value;
     currentConfig.action     = evalMode ? null : actionSelect.value;
     currentConfig.stackDepth = evalMode ? null : stackDepthSelect.value;
+    handQueue = [];
+    handQueueRefill = null;
 
     try {
+        // Answers from the previous drill are graded against its range
+        await flushAnswers();
         let data;
         if (evalMode) {
             const positions   = [...evalSelectedPositions];
@@ -293,7 +310,7 @@ async function startPractice() {
             data = await res.json();
             const actionLabel = actionSelect.options[actionSelect.selectedIndex].textContent;
             configDisplay.textContent =
-                `${currentConfig.position} - ${actionLabel} - ${currentConfig.stackDepth} (${data.range_size} hands)`;
+                `${currentConfig.position} - ${actionLabel} - ${currentConfig.stackDepth} (${data.range_size} combos)`;
             currentConfig.availableActions = data.available_actions || ['in_range'];
             setupActionButtons();
         }
@@ -398,8 +415,10 @@ async function loadNextHand() {
             preflopQuestion.style.display = 'none';
             setupActionButtons();
         } else {
-            const data = await fetch('/api/next-hand').then(r => r.json());
-            currentHand = data.hand;
+            if (!handQueue.length) await refillHandQueue();
+            else if (handQueue.length <= HAND_REFILL_AT) refillHandQueue();
+            currentItem = handQueue.shift();
+            currentHand = currentItem.hand;
             evalContext.classList.add('hidden');
             preflopQuestion.style.display = '';
         }
@@ -428,12 +447,9 @@ async function submitAnswer(action) {
             });
             data = await res.json();
         } else {
-            const res = await fetch('/api/check-answer', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ hand: currentHand, action }),
-            });
-            data = await res.json();
+            data = gradeLocally(currentItem, action);
+            pendingAnswers.push({ hand: currentHand, action });
+            if (pendingAnswers.length >= ANSWER_FLUSH_SIZE) flushAnswers();
         }
 
         stats.total++;
@@ -474,6 +490,45 @@ async function submitAnswer(action) {
     }
 }
 
+function refillHandQueue() {
+    if (!handQueueRefill) {
+        // A new drill replaces handQueue, so a late batch lands in the old one
+        const queue = handQueue;
+        const refill = fetch(`/api/next-hands?n=${HAND_BATCH_SIZE}`)
+            .then(r => r.json())
+            .then(data => { queue.push(...data.hands); })
+            .finally(() => { if (handQueueRefill === refill) handQueueRefill = null; });
+        handQueueRefill = refill;
+    }
+    return handQueueRefill;
+}
+
+// Same result as /api/check-answer, from the grading data of /api/next-hands
+function gradeLocally(item, action) {
+    const correct = action === item.actual_action;
+    const data = { correct, actual_action: item.actual_action, user_action: action };
+    if (item.bottom_of_range) data.bottom_of_range = item.bottom_of_range;
+    if (!correct && item.closest_hand) data.closest_hand = item.closest_hand;
+    return data;
+}
+
+// Resolves once every batch sent so far is recorded, including those of
+// earlier calls still in flight. The request starts at once so it survives pagehide.
+function flushAnswers() {
+    if (pendingAnswers.length) {
+        const answers = pendingAnswers;
+        pendingAnswers = [];
+        const sent = fetch('/api/check-answers', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ answers }),
+            keepalive: true,
+        }).catch(e => console.error('Error reporting answers:', e));
+        answersInFlight = Promise.all([answersInFlight, sent]);
+    }
+    return answersInFlight;
+}
+
 function showFeedback(data) {
     feedbackDiv.classList.remove('hidden', 'correct', 'incorrect');
 
@@ -592,7 +647,9 @@ function retryEval() {
     startPractice();
 }
 
-function backToMenu() {
+async function backToMenu() {
+    // Graded against the drill's range: done before another drill can start
+    await flushAnswers();
     practiceScreen.classList.remove('active');
     document.getElementById('results-screen').classList.remove('active');
     document.getElementById('preflop-guide-screen').classList.remove('active');
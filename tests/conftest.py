@@ -0,0 +1,13 @@
+"""Shared fixtures."""
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The app, with flop deals on the threadpool instead of worker processes."""
+    os.environ.setdefault("FLOP_WORKERS", "0")
+    from poker_range_practice import create_app
+
+    return create_app()
@@ -0,0 +1,68 @@
+"""The adaptive sampler's Fenwick tree and error weighting."""
+import random
+
+import pytest
+
+from poker_range_practice.adaptive import AdaptiveSampler, FenwickTree, pool_weights
+from poker_range_practice.poker_hands import Hand
+
+
+def test_fenwick_total_and_updates():
+    tree = FenwickTree([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert tree.total() == 15.0
+    tree.set(2, 0.0)
+    tree.add(4, 1.0)
+    assert tree.total() == 13.0
+    assert [tree[i] for i in range(5)] == [1.0, 2.0, 0.0, 4.0, 6.0]
+
+
+def test_fenwick_find_matches_prefix_sums():
+    weights = [0.0, 2.0, 0.0, 1.0, 3.0, 0.0, 4.0]
+    tree = FenwickTree(weights)
+    start = 0.0
+    for index, weight in enumerate(weights):
+        if weight:
+            assert tree.find(start) == index
+            assert tree.find(start + weight * 0.999) == index
+        start += weight
+
+
+def test_fenwick_find_never_returns_a_zero_weight_entry():
+    # Zeroing entries by deltas leaves a rounding residue in the inner sums
+    tree = FenwickTree([0.1, 0.2, 0.0, 1.0])
+    tree.set(0, 0.0)
+    tree.set(1, 0.0)
+    assert tree.find(0.0) == 3
+    assert tree.find(tree.total()) == 3
+
+
+def test_fenwick_find_draws_in_proportion():
+    tree = FenwickTree([1.0, 0.0, 3.0])
+    rng = random.Random(0)
+    draws = [tree.find(rng.random() * tree.total()) for _ in range(8000)]
+    assert draws.count(1) == 0
+    assert draws.count(2) / draws.count(0) == pytest.approx(3.0, rel=0.1)
+
+
+def test_sampler_draws_only_from_the_pool():
+    hands = [Hand("AKs"), Hand("AQo"), Hand("22")]
+    sampler = AdaptiveSampler(pool_weights(hands))
+    rng = random.Random(1)
+    assert {sampler.pick(rng) for _ in range(300)} == set(hands)
+
+
+def test_sampler_boosts_missed_hands_and_fades_them():
+    hands = [Hand("AKs"), Hand("72o")]
+    sampler = AdaptiveSampler(pool_weights(hands))
+    for _ in range(5):
+        sampler.observe(Hand("72o"), correct=False)
+    missed = sampler.error(Hand("72o"))
+    assert missed > 0.8 and sampler.error(Hand("AKs")) == 0
+
+    rng = random.Random(2)
+    draws = [sampler.pick(rng) for _ in range(4000)]
+    assert draws.count(Hand("72o")) > 3 * draws.count(Hand("AKs"))
+
+    for _ in range(150):
+        sampler.observe(Hand("AKs"), correct=True)
+    assert sampler.error(Hand("72o")) == pytest.approx(missed / 2)
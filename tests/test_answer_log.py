@@ -0,0 +1,88 @@
+"""The answer log: counters, replay at startup, retried appends and the single writer."""
+import pytest
+
+from poker_range_practice.answer_log import AnswerLog, AnswerStats
+
+
+def test_counters_by_dimension():
+    stats = AnswerStats()
+    stats.add("u", "preflop", "BTN/open@20bb", "AKs", None, True)
+    stats.add("u", "preflop", "BTN/open@20bb", "72o", None, False)
+    stats.add("u", "cbet", "BTN_vs_BB@100", "AKs", "dry", True)
+    assert stats.get("u", "scenario", "preflop/BTN/open@20bb") == {"correct": 1, "total": 2, "accuracy": 0.5}
+    summary = stats.summary("u")
+    assert summary["overall"] == {"correct": 2, "total": 3, "accuracy": 0.6667}
+    assert summary["hand"]["AKs"]["total"] == 2
+    assert summary["texture"] == {"cbet/dry": {"correct": 1, "total": 1, "accuracy": 1.0}}
+    assert stats.summary("nobody")["overall"]["total"] == 0
+
+
+def test_least_recently_active_users_are_dropped():
+    stats = AnswerStats(max_users=2)
+    for user in ("a", "b", "a", "c"):
+        stats.add(user, "preflop", "s", "AA", None, True)
+    assert stats.summary("b")["overall"]["total"] == 0
+    assert stats.summary("a")["overall"]["total"] == 2
+
+
+def test_replay_rebuilds_the_counters(tmp_path):
+    path = tmp_path / "answers.log"
+    log = AnswerLog(path)
+    log.record("u", "preflop", "BTN/open@20bb", "AKs", correct=True)
+    log.record("u", "preflop", "BTN/open@20bb", "72o", correct=False)
+    log.close()
+    assert log.written == 2
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('[1.0,"u","preflop"')  # torn line left by a crash
+
+    replayed = AnswerLog(path)
+    assert replayed.stats.summary("u") == log.stats.summary("u")
+
+
+class _FailingFile:
+    """Writes `budget` bytes, then fails like a full disk."""
+
+    def __init__(self, f, budget):
+        self.f = f
+        self.budget = budget
+
+    def write(self, data):
+        if self.budget <= 0:
+            raise OSError(28, "No space left on device")
+        n = min(len(data), self.budget)
+        self.budget -= n
+        return self.f.write(data[:n])
+
+
+def test_failed_append_is_retried(tmp_path):
+    path = tmp_path / "answers.log"
+    log = AnswerLog(path)
+    log._open()
+    real = log._file
+    log._file = _FailingFile(real, 40)  # cuts the first record in half
+    for i in range(3):
+        log.record(f"u{i}", "preflop", "s", "AA", correct=True)
+    with pytest.raises(OSError):
+        log.flush()
+    assert log.written == 0
+
+    log._file = real
+    log.record("u3", "preflop", "s", "AA", correct=True)
+    log.close()
+    assert log.written == 4
+    assert [s["overall"]["total"] for s in map(AnswerLog(path).stats.summary, ["u0", "u1", "u2", "u3"])] == [1] * 4
+
+
+def test_a_second_writer_is_refused(tmp_path):
+    pytest.importorskip("fcntl")
+    path = tmp_path / "answers.log"
+    first = AnswerLog(path)
+    first.start()
+    try:
+        with pytest.raises(RuntimeError):
+            AnswerLog(path).start()
+    finally:
+        first.close()
+    second = AnswerLog(path)
+    second.start()
+    second.close()
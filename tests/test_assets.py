@@ -0,0 +1,118 @@
+"""The static asset pipeline: JS/CSS minifiers, build freshness and encoding negotiation."""
+import shutil
+import subprocess
+
+import pytest
+
+from starlette.testclient import TestClient
+
+from poker_range_practice import assets
+from poker_range_practice.assets import (
+    STATIC_DIR,
+    StaticAssets,
+    accepts_encoding,
+    build_assets,
+    is_fresh,
+    minify_css,
+    minify_js,
+)
+
+
+@pytest.mark.parametrize("src, expected", [
+    ("// line comment\nlet a = 1;  /* block */ let b = 2;\n", "let a=1;let b=2;\n"),
+    ("function f ( x ) {\n    return x + 1;\n}\n", "function f(x){return x + 1;}\n"),
+    # Literals are copied untouched, comment markers and spaces included
+    ("const s = 'a // b' + \"c /* d */\";", "const s='a // b' + \"c /* d */\";\n"),
+    ("const t = `x  ${ a + '`' }  y`;", "const t=`x  ${ a + '`' }  y`;\n"),
+    ("const r = /a\\/b [/]  c/g.test(s);", "const r=/a\\/b [/]  c/g.test(s);\n"),
+    ("if (x) return /  re/.test(y);", "if(x)return /  re/.test(y);\n"),
+    # Spaces around + - / are kept: "a + +b", "a / /re/" must not fuse
+    ("const q = a / b / c;", "const q=a / b / c;\n"),
+    ("a = b + +c - -d;", "a=b + +c - -d;\n"),
+    # Line breaks that automatic semicolon insertion may rely on are kept
+    ("let a = b\n(c || d).run()\nx++\n", "let a=b\n(c||d).run()\nx++\n"),
+    ("return\nvalue", "return\nvalue\n"),
+])
+def test_minify_js(src, expected):
+    assert minify_js(src) == expected
+
+
+@pytest.mark.parametrize("src, expected", [
+    ("/* header */\nbody {\n    margin: 0;\n    color: red;\n}\n", "body{margin:0;color:red}\n"),
+    ("a:hover, .b > .c {\n  width: calc(100% - 2px);\n}", "a:hover,.b>.c{width:calc(100% - 2px)}\n"),
+    (".x::after { content: \"  /* kept */  \"; }", ".x::after{content:\"  /* kept */  \"}\n"),
+    ("div p { margin: 0 auto ; }", "div p{margin:0 auto}\n"),
+])
+def test_minify_css(src, expected):
+    assert minify_css(src) == expected
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+@pytest.mark.parametrize("name", sorted(p.name for p in STATIC_DIR.glob("*.js")))
+def test_minified_bundle_parses(name, tmp_path):
+    minified = tmp_path / name
+    minified.write_text(minify_js((STATIC_DIR / name).read_text("utf-8")), "utf-8")
+    result = subprocess.run(["node", "--check", str(minified)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_build_is_fresh_until_a_source_changes(tmp_path):
+    source = tmp_path / "static"
+    shutil.copytree(STATIC_DIR, source)
+    output = tmp_path / "dist"
+    manifest = build_assets(source, output)
+    assert (output / manifest["app.js"]).is_file()
+    assert is_fresh(output, source)
+
+    (source / "style.css").write_text("body { margin: 1px; }\n")
+    assert not is_fresh(output, source)
+    assert not is_fresh(tmp_path / "missing", source)
+
+
+@pytest.mark.parametrize("header, coding, expected", [
+    ("gzip, deflate, br", "br", True),
+    ("gzip;q=0.5, br;q=0", "br", False),
+    ("gzip;q=0.5, br;q=0", "gzip", True),
+    ("GZIP ; Q=0", "gzip", False),
+    ("*", "br", True),
+    ("*;q=0, gzip", "br", False),
+    ("br;q=0, *", "br", False),
+    ("identity", "gzip", False),
+    ("", "gzip", False),
+])
+def test_accepts_encoding(header, coding, expected):
+    assert accepts_encoding(header, coding) is expected
+
+
+@pytest.fixture(scope="module")
+def assets_client(tmp_path_factory):
+    output = tmp_path_factory.mktemp("dist")
+    build_assets(STATIC_DIR, output)
+    return TestClient(StaticAssets(output))
+
+
+@pytest.mark.parametrize("accept, encoding", [
+    ("gzip, br", "br"),
+    ("gzip, br;q=0", "gzip"),
+    ("gzip;q=0, br;q=0", None),
+    ("identity", None),
+])
+def test_static_assets_negotiate_encoding(assets_client, accept, encoding):
+    if encoding == "br" and assets.brotli is None:
+        pytest.skip("brotli is not installed")
+    response = assets_client.get("/index.html", headers={"Accept-Encoding": accept})
+    assert response.headers.get("content-encoding") == encoding
+
+
+def test_static_assets_etag_per_encoding(assets_client):
+    gzipped = assets_client.get("/index.html", headers={"Accept-Encoding": "gzip"})
+    plain = assets_client.get("/index.html", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+
+    revalidated = assets_client.get("/index.html", headers={"Accept-Encoding": "identity",
+                                                            "If-None-Match": plain.headers["etag"]})
+    assert revalidated.status_code == 304
+    # The gzip variant's validator does not match the identity representation
+    mismatched = assets_client.get("/index.html", headers={"Accept-Encoding": "identity",
+                                                           "If-None-Match": gzipped.headers["etag"]})
+    assert mismatched.status_code == 200
@@ -0,0 +1,47 @@
+"""ComboRange: per-class combo counts, card removal and uniform sampling."""
+import random
+from collections import Counter
+
+import pytest
+
+from poker_range_practice.combos import COMBOS, ComboRange, combo_hand
+from poker_range_practice.poker_hands import Hand
+
+
+def test_class_combo_counts():
+    combos = ComboRange.from_hands([Hand("AA"), Hand("AKs"), Hand("AKo")])
+    assert len(combos) == 6 + 4 + 12
+    assert combos.counts_by_hand() == {Hand("AA"): 6, Hand("AKs"): 4, Hand("AKo"): 12}
+    assert len(ComboRange.full()) == len(COMBOS) == 1326
+
+
+def test_card_removal():
+    combos = ComboRange.from_hands([Hand("AA"), Hand("AKs"), Hand("AKo")])
+    live = combos.without_cards([("A", "♠"), ("K", "♥")])
+    # AA keeps the 3 pairs without A♠, AKs the ♦ and ♣ combos, AKo 3 aces x 3 kings
+    # minus the 2 suited pairs left (A♦K♦, A♣K♣)
+    assert live.counts_by_hand() == {Hand("AA"): 3, Hand("AKs"): 2, Hand("AKo"): 7}
+    assert (("A", "♠"), ("A", "♥")) not in live
+    assert (("A", "♥"), ("A", "♦")) in live
+
+    one_less = live.without_combo((("A", "♥"), ("A", "♦")))
+    assert len(one_less) == len(live) - 1
+
+
+def test_combo_hand():
+    assert combo_hand((("K", "♠"), ("A", "♠"))) == Hand("AKs")
+    assert combo_hand([["7", "♦"], ["2", "♣"]]) == Hand("72o")
+
+
+def test_sample_is_uniform_over_combos():
+    combos = ComboRange.from_hands([Hand("AKs"), Hand("AKo")])
+    rng = random.Random(0)
+    draws = Counter(combo_hand(combos.sample(rng)) for _ in range(8000))
+    # 12 offsuit combos to 4 suited ones
+    assert draws[Hand("AKo")] / draws[Hand("AKs")] == pytest.approx(3.0, rel=0.1)
+    assert all(combos.sample(rng) in combos for _ in range(100))
+
+
+def test_sample_empty_range():
+    with pytest.raises(ValueError):
+        ComboRange().sample()
@@ -0,0 +1,71 @@
+"""
+The precomputed feedback tables of CompiledRange must give the same answers as
+the reference functions in poker_hands, for every range node of ranges.json,
+whether it is compiled from the JSON file or from a binary range pack.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from poker_range_practice.poker_hands import (
+    find_bottom_of_range_category,
+    find_closest_hand_in_range,
+    generate_all_hands,
+)
+from poker_range_practice.range_manager import RangeManager
+from poker_range_practice.range_pack import pack_ranges, write_pack
+
+RANGES_FILE = Path(__file__).resolve().parent.parent / "src" / "poker_range_practice" / "ranges.json"
+ALL_HANDS = generate_all_hands()
+
+
+def _keys(rm):
+    return [
+        (pos, action["value"], depth)
+        for pos in rm.get_available_positions()
+        for action in rm.get_available_actions(pos)
+        for depth in rm.get_available_stack_depths(pos, action["value"])
+    ]
+
+
+_json_manager = RangeManager(str(RANGES_FILE))
+KEYS = _keys(_json_manager)
+
+
+@pytest.fixture(scope="module")
+def pack_manager(tmp_path_factory):
+    path = tmp_path_factory.mktemp("pack") / "ranges.pack"
+    with open(RANGES_FILE) as f:
+        write_pack(path, pack_ranges(json.load(f)))
+    return RangeManager(str(path))
+
+
+def test_every_node_is_checked(pack_manager):
+    assert len(KEYS) > 100
+    assert _keys(pack_manager) == KEYS
+
+
+@pytest.mark.parametrize("source", ["json", "pack"])
+@pytest.mark.parametrize("key", KEYS, ids="/".join)
+def test_tables_match_reference(key, source, request):
+    rm = _json_manager if source == "json" else request.getfixturevalue("pack_manager")
+    compiled = rm.get_compiled_range(*key)
+    range_hands = list(compiled.hands)
+    for hand in ALL_HANDS:
+        action = compiled.hands.get(hand, "fold")
+        if action == "fold":
+            assert compiled.closest[hand.index] == find_closest_hand_in_range(hand, range_hands), hand
+            assert compiled.bottom[hand.index] is None, hand
+        else:
+            assert compiled.closest[hand.index] is None, hand
+            assert compiled.bottom[hand.index] == find_bottom_of_range_category(hand, compiled.by_action[action]), hand
+
+
+@pytest.mark.parametrize("key", [k for k in KEYS if len(_json_manager.get_compiled_range(*k).actions) > 1],
+                         ids="/".join)
+def test_bottom_stays_within_sub_action(key):
+    compiled = _json_manager.get_compiled_range(*key)
+    for action, hands in compiled.by_action.items():
+        for hand in hands:
+            assert compiled.hands[compiled.bottom[hand.index]] == action, (action, hand)
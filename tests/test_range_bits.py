@@ -0,0 +1,49 @@
+"""RangeBits set algebra and the range-to-notation compressor."""
+import random
+
+import pytest
+
+from poker_range_practice.poker_hands import Hand, RangeBits, generate_all_hands, parse_range_notation, range_to_notation
+
+ALL_HANDS = generate_all_hands()
+
+
+def test_set_algebra():
+    pairs = RangeBits.from_notation("22+")
+    aces = RangeBits.from_notation("A2s+, A2o+")
+    assert len(pairs) == 13 and len(aces) == 24
+    assert (pairs | aces) - aces == pairs
+    assert pairs & aces == RangeBits()
+    assert Hand("AA") in pairs | aces and Hand("AA") not in aces
+    assert len(~pairs) == 169 - 13
+    assert ~~aces == aces
+    assert not RangeBits() and RangeBits.from_hands([Hand("72o")])
+
+
+def test_iterates_in_canonical_order():
+    hands = RangeBits.from_notation("AKs, 22, KQo, AA")
+    indexes = [hand.index for hand in hands]
+    assert indexes == sorted(indexes)
+    assert set(hands) == {Hand("AKs"), Hand("22"), Hand("KQo"), Hand("AA")}
+
+
+@pytest.mark.parametrize("notation, expected", [
+    ("22+", "22+"),
+    ("AA, KK, QQ, 55, 44", "QQ+, 55-44"),
+    ("A2s, A3s, A4s, A5s, A6s, A7s, A8s, A9s, ATs, AJs, AQs, AKs", "A2s+"),
+    ("KTo, K9o, K8o", "KTo-K8o"),
+    ("K9s+, 76s", "K9s+, 76s"),
+    ("", ""),
+])
+def test_to_notation(notation, expected):
+    assert RangeBits.from_notation(notation).to_notation() == expected
+
+
+def test_notation_round_trips_random_ranges():
+    rng = random.Random(0)
+    for _ in range(200):
+        hands = set(rng.sample(ALL_HANDS, rng.randrange(170)))
+        notation = range_to_notation(hands)
+        assert set(parse_range_notation(notation)) == hands
+        # Canonical: compressing the parsed notation gives the same string back
+        assert range_to_notation(parse_range_notation(notation)) == notation
@@ -0,0 +1,71 @@
+"""Per-user range libraries: the SQLite store, write tokens and the overlay on the shared library."""
+import pytest
+from starlette.testclient import TestClient
+
+import poker_range_practice
+from poker_range_practice.range_store import RangeStore, TenantRanges
+
+URL = "/api/ranges/BTN/open/20bb"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RangeStore(tmp_path / "ranges.db")
+    yield store
+    store.close()
+
+
+def test_claim_issues_one_token_per_library(store):
+    token = store.claim("alice")
+    assert token
+    assert store.claim("alice") is None
+    assert store.check_token("alice", token)
+    assert not store.check_token("alice", token + "x")
+    assert not store.check_token("bob", token)
+
+
+def test_writes_bump_the_version(store):
+    assert store.load("alice") == (0, [])
+    store.put_range("alice", "BTN", "open", "20bb", "22+")
+    store.put_range("alice", "BTN", "open", "20bb", {"raise": "33+", "call": "22"})
+    assert store.load("alice") == (2, [("BTN", "open", "20bb", {"raise": "33+", "call": "22"})])
+    assert store.delete_range("alice", "BTN", "open", "20bb")
+    assert not store.delete_range("alice", "BTN", "open", "20bb")
+    assert store.version("alice") == 3
+
+
+def test_overlay_replaces_shared_nodes(store, app):
+    shared = poker_range_practice._range_manager
+    tenants = TenantRanges(store, shared, check_interval=0)
+    tenants.put_range("alice", "BTN", "open", "20bb", "AA, KK")
+    alice = tenants.snapshot("alice")
+    assert set(map(str, alice.get_range("BTN", "open", "20bb"))) == {"AA", "KK"}
+    # Nodes alice did not store come from the shared library
+    assert alice.get_range("CO", "open", "100bb") == shared.snapshot.get_range("CO", "open", "100bb")
+    assert tenants.snapshot("bob") is shared.snapshot
+    with pytest.raises(ValueError):
+        tenants.put_range("alice", "_meta", "open", "20bb", "AA")
+
+
+@pytest.fixture
+def tenant_client(app, store, monkeypatch):
+    monkeypatch.setattr(poker_range_practice, "_tenant_ranges",
+                        TenantRanges(store, poker_range_practice._range_manager))
+    return TestClient(app)
+
+
+def test_api_writes_need_the_library_token(tenant_client):
+    alice = {"X-Range-User": "alice"}
+    first = tenant_client.put(URL, headers=alice, json={"range": "22+"})
+    assert first.status_code == 200
+    token = first.json()["token"]
+
+    assert tenant_client.put(URL, headers=alice, json={"range": "33+"}).status_code == 401
+    assert tenant_client.put(URL, headers={**alice, "X-Range-Token": "wrong"}, json={"range": "33+"}).status_code == 403
+    second = tenant_client.put(URL, headers={**alice, "X-Range-Token": token}, json={"range": "33+"})
+    assert second.status_code == 200 and "token" not in second.json()
+
+    assert tenant_client.delete(URL, headers=alice).status_code == 401
+    assert tenant_client.delete(URL, headers={**alice, "X-Range-Token": token}).status_code == 200
+    # Deleting never claims a library
+    assert tenant_client.delete(URL, headers={"X-Range-User": "bob"}).status_code == 401
@@ -0,0 +1,84 @@
+"""Server-side session stores and the middleware that keys them by cookie."""
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from poker_range_practice.sessions import MemorySessionStore, ServerSessionMiddleware, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield MemorySessionStore(max_sessions=2, ttl=60)
+    else:
+        store = SQLiteSessionStore(tmp_path / "sessions.db", ttl=60)
+        yield store
+        store.close()
+
+
+def test_store_round_trip(store):
+    assert store.load("a") is None
+    store.save("a", {"uid": "anon:1", "config": {"position": "BTN"}})
+    assert store.load("a") == {"uid": "anon:1", "config": {"position": "BTN"}}
+    store.delete("a")
+    assert store.load("a") is None
+
+
+def test_store_expires_sessions(store):
+    store.ttl = -1
+    store.save("a", {"x": 1})
+    assert store.load("a") is None
+
+
+def test_memory_store_drops_least_recently_used():
+    store = MemorySessionStore(max_sessions=2)
+    store.save("a", {"n": 1})
+    store.save("b", {"n": 2})
+    store.load("a")
+    store.save("c", {"n": 3})
+    assert store.load("b") is None
+    assert store.load("a") == {"n": 1} and len(store) == 2
+
+
+def _counter_app(store):
+    async def bump(request):
+        request.session["n"] = request.session.get("n", 0) + 1
+        return JSONResponse(request.session["n"])
+
+    async def peek(request):
+        return JSONResponse(request.session.get("n"))
+
+    async def clear(request):
+        request.session.clear()
+        return JSONResponse(None)
+
+    app = Starlette(routes=[Route("/bump", bump), Route("/peek", peek), Route("/clear", clear)])
+    return ServerSessionMiddleware(app, store=store, max_age=60)
+
+
+def test_middleware_keeps_the_session_server_side():
+    store = MemorySessionStore()
+    client = TestClient(_counter_app(store))
+    assert client.get("/bump").json() == 1
+    session_id = client.cookies["session"]
+    assert store.load(session_id) == {"n": 1}
+    assert client.get("/bump").json() == 2
+    assert client.cookies["session"] == session_id
+
+    # Unchanged sessions send no cookie
+    assert "set-cookie" not in client.get("/peek").headers
+
+    client.get("/clear")
+    assert store.load(session_id) is None
+    assert "session" not in client.cookies
+
+
+def test_middleware_ignores_unknown_ids():
+    client = TestClient(_counter_app(MemorySessionStore()))
+    response = client.get("/bump", headers={"Cookie": "session=forged"})
+    assert response.json() == 1
+    assert response.cookies["session"] != "forged"
@@ -0,0 +1,72 @@
+"""The /ws/practice drill protocol."""
+import pytest
+from starlette.testclient import TestClient
+
+START = {"type": "start", "mode": "preflop", "position": "BTN", "action": "open", "stack_depth": "100bb"}
+
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+
+def test_preflop_drill(client):
+    with client.websocket_connect("/ws/practice") as ws:
+        ws.send_json(START)
+        hand = ws.receive_json()
+        assert hand["type"] == "hand" and hand["mode"] == "preflop"
+
+        ws.send_json({"type": "answer", "action": "fold"})
+        result = ws.receive_json()
+        assert result["type"] == "result"
+        assert result["user_action"] == "fold"
+        assert result["correct"] == (result["actual_action"] == "fold")
+        assert ws.receive_json()["type"] == "hand"
+
+
+def test_answers_count_for_the_session(client):
+    before = client.get("/api/stats").json()["overall"]["total"]
+    with client.websocket_connect("/ws/practice") as ws:
+        ws.send_json(START)
+        ws.receive_json()
+        ws.send_json({"type": "answer", "action": "fold"})
+        ws.receive_json()
+        ws.receive_json()
+    assert client.get("/api/stats").json()["overall"]["total"] == before + 1
+
+
+@pytest.mark.parametrize("message, status", [
+    ({"type": "answer", "action": "fold"}, 400),
+    ({"type": "dance"}, 400),
+    ({**START, "position": "nowhere"}, 404),
+    ({"type": "start", "mode": "cbet", "hero": "BB", "villain": "BTN", "stack_depth": 20}, 400),
+    ({"type": "start", "mode": "bb_defense", "villain": "CO", "stack_depth": "deep"}, 400),
+])
+def test_errors_keep_the_socket_open(client, message, status):
+    with client.websocket_connect("/ws/practice") as ws:
+        ws.send_json(message)
+        error = ws.receive_json()
+        assert error["type"] == "error" and error["status"] == status
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+
+def test_malformed_message(client):
+    with client.websocket_connect("/ws/practice") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json() == {"type": "error", "status": 400, "detail": "Malformed message"}
+
+
+def test_flop_drills_deal_cards(client):
+    with client.websocket_connect("/ws/practice") as ws:
+        ws.send_json({"type": "start", "mode": "cbet", "hero": "BTN", "villain": "BB", "stack_depth": 100})
+        hand = ws.receive_json()
+        assert len(hand["hero_cards"]) == 2 and len(hand["board_cards"]) == 3
+        ws.send_json({"type": "answer", "action": "check"})
+        assert ws.receive_json()["type"] == "result"
+        assert ws.receive_json()["type"] == "hand"
+
+        ws.send_json({"type": "start", "mode": "bb_defense", "villain": "BTN", "stack_depth": 100})
+        deal = ws.receive_json()
+        assert deal["mode"] == "bb_defense"
+        assert sum(deal["villain_range"].values()) == deal["villain_combos"]